@@ -1,6 +1,8 @@
 import os
 # Module standard Python pour accéder aux variables d'environnement et aux chemins de fichiers
 
+from utils.metrics import MeteredQueuePool
+
 # On récupère le chemin absolu du dossier où se trouve ce fichier (utile si on stocke des fichiers locaux)
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -16,12 +18,150 @@ class Config:
     JWT_EXP_MINUTES = int(os.getenv("JWT_EXP_MINUTES", "60"))
     JWT_REFRESH_EXP_MINUTES = int(os.getenv("JWT_REFRESH_EXP_MINUTES", "10080"))
 
+    # Durée (en secondes) pendant laquelle l'existence d'un compte vérifiée par
+    # verify_token_and_get_user_id() est gardée en cache (délai max avant
+    # qu'un compte supprimé soit refusé).
+    AUTH_USER_CACHE_TTL_SECONDS = int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+    # Nombre de tokens d'accès vérifiés gardés en mémoire (jusqu'à leur expiration) ;
+    # 0 désactive le cache et vérifie la signature à chaque requête.
+    JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+    # Refresh tokens révoqués (rotation, déconnexion) : filtre de Bloom en mémoire
+    # dimensionné pour REVOKED_TOKENS_FILTER_CAPACITY révocations non expirées
+    # (~120 Ko pour 100 000 à 1 % de faux positifs), reconstruit après purge
+    # des révocations expirées toutes les REVOKED_TOKENS_PRUNE_SECONDS secondes.
+    REVOKED_TOKENS_FILTER_CAPACITY = int(os.getenv("REVOKED_TOKENS_FILTER_CAPACITY", "100000"))
+    REVOKED_TOKENS_PRUNE_SECONDS = float(os.getenv("REVOKED_TOKENS_PRUNE_SECONDS", "3600"))
+
+    # Durée (en secondes) après laquelle le classement en mémoire est rechargé
+    # depuis la table users, pour rattraper les scores écrits par les autres workers.
+    LEADERBOARD_RESYNC_SECONDS = int(os.getenv("LEADERBOARD_RESYNC_SECONDS", "60"))
+
+    # Durée (en secondes) pendant laquelle le top du jour, de la semaine ou du
+    # mois (/api/leaderboard?window=...) est servi depuis le cache du worker.
+    LEADERBOARD_WINDOW_CACHE_SECONDS = float(os.getenv("LEADERBOARD_WINDOW_CACHE_SECONDS", "30"))
+
+    # Attribution des badges après une partie, hors du temps de réponse de /api/scores :
+    # "thread" (file en mémoire, par défaut), "db" (file durable dans badge_events)
+    # ou "inline" (évaluation immédiate, comme avant).
+    BADGE_WORKER_MODE = os.getenv("BADGE_WORKER_MODE", "thread")
+    BADGE_WORKER_BATCH_SIZE = int(os.getenv("BADGE_WORKER_BATCH_SIZE", "100"))
+    BADGE_WORKER_FLUSH_SECONDS = float(os.getenv("BADGE_WORKER_FLUSH_SECONDS", "0.2"))
+    # Événements en attente en mémoire au-delà desquels l'évaluation se fait dans la requête
+    BADGE_WORKER_MAX_QUEUE = int(os.getenv("BADGE_WORKER_MAX_QUEUE", "10000"))
+
+    # Calculs bcrypt (inscription, connexion) hors du thread de la requête :
+    # "process" (pool de processus, par défaut), "thread" ou "inline".
+    # Au-delà de WORKERS calculs + MAX_PENDING en attente, la requête reçoit un 503
+    # si aucune place ne se libère en QUEUE_TIMEOUT secondes.
+    PASSWORD_EXECUTOR_MODE = os.getenv("PASSWORD_EXECUTOR_MODE", "process")
+    PASSWORD_EXECUTOR_WORKERS = int(os.getenv("PASSWORD_EXECUTOR_WORKERS", "0")) or os.cpu_count() or 1
+    PASSWORD_EXECUTOR_MAX_PENDING = int(os.getenv("PASSWORD_EXECUTOR_MAX_PENDING", str(PASSWORD_EXECUTOR_WORKERS * 4)))
+    PASSWORD_EXECUTOR_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_EXECUTOR_QUEUE_TIMEOUT", "0.5"))
+
+    # Durée (en secondes) pendant laquelle le navigateur réutilise /api/rules
+    # sans revalider ; ensuite une requête avec If-None-Match reçoit un 304.
+    RULES_CACHE_MAX_AGE = int(os.getenv("RULES_CACHE_MAX_AGE", "300"))
+
+    # Délai maximal (en secondes) avant qu'un worker voie une modification de la
+    # boutique ou des badges faite par un autre worker (lecture de catalog_versions).
+    CATALOG_VERSION_POLL_SECONDS = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "5"))
+
+    # Mesure des temps de réponse et des requêtes SQL par route, exportée sur /metrics
+    # (désactivée par défaut : la route révèle les routes et la charge de l'API).
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    # Accès à /metrics : avec METRICS_TOKEN, en-tête "Authorization: Bearer <jeton>"
+    # obligatoire ; sans jeton, seules les adresses de METRICS_ALLOWED_IPS sont acceptées.
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_ALLOWED_IPS = [
+        adresse.strip() for adresse in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if adresse.strip()
+    ]
+
+    # Journalisation (utils/structured_logging.py) : une ligne JSON par
+    # enregistrement ("text" pour une lecture humaine), écrite par un thread
+    # de fond. Au-delà de LOG_QUEUE_SIZE enregistrements en attente, les
+    # suivants sont abandonnés plutôt que de ralentir les requêtes.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Journal des requêtes HTTP (route, code, durée) sur le logger recyco.requests
+    LOG_REQUESTS = os.getenv("LOG_REQUESTS", "true").lower() in ("1", "true", "yes")
+    # Fraction gardée des enregistrements sous WARNING, par logger :
+    # "services.score_service=0.1,recyco.requests=0.5"
+    LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+    # Pool de connexions à la base (un pool par processus).
+    # Chaque worker (gunicorn, etc.) ouvre jusqu'à DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # connexions, threads de fond compris (worker de badges) : avec 4 workers et
+    # les valeurs par défaut, 4 × (5 + 5) = 40 connexions au plus, à garder sous
+    # max_connections du serveur MySQL (151 par défaut).
+    # DB_POOL_TIMEOUT : attente maximale d'une connexion libre avant erreur ;
+    # court, pour qu'un pool saturé échoue vite plutôt que d'empiler les requêtes.
+    # DB_POOL_RECYCLE : connexion rouverte au-delà de cet âge (secondes), sous le
+    # wait_timeout MySQL et le délai d'inactivité des proxys/pare-feux.
+    # DB_POOL_PRE_PING : connexion testée à l'emprunt, une connexion coupée
+    # ("MySQL server has gone away") est remplacée au lieu de faire échouer la requête.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+    # Réplica en lecture (utils/read_routing.py) : les méthodes de service en
+    # lecture seule (classement, statistiques, badges, boutique) y lisent ; les
+    # écritures restent sur la base principale. Après une écriture, un client
+    # relit la base principale pendant REPLICA_STICKY_SECONDS secondes (au-delà
+    # du retard de réplication attendu).
+    REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL", "")
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+    # Chargement au démarrage des caches (badges, boutique, consignes, classement)
+    # pour que la première requête de chaque worker ne les paie pas.
+    WARM_CACHES = os.getenv("WARM_CACHES", "false").lower() in ("1", "true", "yes")
+
+    # Création des tables depuis les modèles au démarrage (profil local, sans migrations)
+    AUTO_CREATE_SCHEMA = False
+    # PRAGMA appliqués à chaque connexion SQLite (utils/sqlite_tuning.py)
+    SQLITE_PRAGMAS = {}
+
     # Mode debug désactivé par défaut (plus sûr pour la production).
     DEBUG = False
 
         # Important pour éviter un warning Flask-SQLAlchemy
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        """
+        Options create_engine construites depuis les réglages DB_POOL_*.
+
+        Une base SQLite en mémoire garde le pool à connexion unique choisi par
+        Flask-SQLAlchemy : seuls le recyclage et le pre-ping s'y appliquent.
+        """
+        options = {"pool_recycle": self.DB_POOL_RECYCLE, "pool_pre_ping": self.DB_POOL_PRE_PING}
+        uri = getattr(self, "SQLALCHEMY_DATABASE_URI", None) or ""
+        if uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri:
+            return options
+        options.update(
+            poolclass=MeteredQueuePool,
+            pool_size=self.DB_POOL_SIZE,
+            max_overflow=self.DB_MAX_OVERFLOW,
+            pool_timeout=self.DB_POOL_TIMEOUT
+        )
+        return options
+
+
+    @property
+    def SQLALCHEMY_BINDS(self):
+        """
+        Bind "replica" lorsque REPLICA_DATABASE_URL est défini, avec les mêmes
+        options de pool que la base principale (Flask-SQLAlchemy ne les
+        applique qu'à celle-ci).
+        """
+        if not self.REPLICA_DATABASE_URL:
+            return {}
+        return {"replica": {"url": self.REPLICA_DATABASE_URL, **self.SQLALCHEMY_ENGINE_OPTIONS}}
+
 
 class DevelopmentConfig(Config):
     """
@@ -40,6 +180,12 @@ class DevelopmentConfig(Config):
 
     SESSION_COOKIE_SECURE = False
 
+    # Mesures actives en développement (/metrics reste limitée à la machine locale)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Journal lisible dans le terminal en développement
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
 class ProductionConfig(Config):
     """
     Configuration spécifique pour l'environnement de production.
@@ -60,10 +206,65 @@ class ProductionConfig(Config):
         if not self.SQLALCHEMY_DATABASE_URI:
             raise ValueError("Base de données en production manquante.")
 
+class LocalConfig(Config):
+    """
+    Configuration locale sans service externe : base SQLite embarquée.
+
+    Fichier instance/recyco_local.db par défaut (LOCAL_DATABASE_URL pour
+    une autre base, "sqlite://" pour une base en mémoire), tables créées
+    au démarrage depuis les modèles, PRAGMA réglés pour la vitesse. Sert
+    aussi de référence aux benchmarks (app/benchmarks).
+    """
+    # Variable distincte de DATABASE_URL : le .env de développement pointe souvent vers MySQL
+    SQLALCHEMY_DATABASE_URI = os.getenv("LOCAL_DATABASE_URL", "sqlite:///recyco_local.db")
+
+    SESSION_COOKIE_SECURE = False
+
+    # Mesures actives (/metrics reste limitée à la machine locale)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    AUTO_CREATE_SCHEMA = True
+
+    # WAL : lectures concurrentes de l'écriture ; NORMAL : pas de fsync par commit en WAL.
+    # SQLITE_CACHE_MB : cache de pages par connexion ; SQLITE_MMAP_MB : lecture par mmap.
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": -int(os.getenv("SQLITE_CACHE_MB", "64")) * 1024,
+        "mmap_size": int(os.getenv("SQLITE_MMAP_MB", "256")) * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+        "busy_timeout": 5000,
+    }
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):
+        """
+        Pool du profil local : celui de Config (connexions réutilisées entre
+        threads), sans pre-ping ni recyclage, inutiles pour un fichier local.
+        """
+        options = super().SQLALCHEMY_ENGINE_OPTIONS
+        options.update(pool_pre_ping=False, pool_recycle=-1)
+        return options
+
+class TestingConfig(DevelopmentConfig):
+    """
+    Configuration des tests automatisés (pytest).
+    Base lue dans TEST_DATABASE_URL, à défaut DATABASE_URL, à défaut un
+    fichier SQLite local (instance/recyco_test.db).
+    """
+    TESTING = True
+
+    SQLALCHEMY_DATABASE_URI = (
+        os.getenv("TEST_DATABASE_URL") or os.getenv("DATABASE_URL") or "sqlite:///recyco_test.db"
+    )
+
 # Dictionnaire permettant de choisir facilement une configuration
 # selon l'environnement ("development", "production", etc.).
 config = {
     'development': DevelopmentConfig,
     'production' : ProductionConfig,
+    'testing': TestingConfig,
+    'local': LocalConfig,
     'default': ProductionConfig
 }
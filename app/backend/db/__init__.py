@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 
+from utils.read_routing import RoutingSession
+
 # On instancie un objet global db
 # qui sera importé dans models.py et initialisé dans app.py
-db = SQLAlchemy()
+# (RoutingSession : lectures des services marqués @replica_read vers le réplica, s'il existe)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
@@ -7,15 +7,21 @@ de la base de données du projet éducatif de tri des déchets.
 Models:
     User: Représente un utilisateur de l'application
     Score: Enregistre les scores des parties jouées
+    UserStats: Agrégats de jeu par utilisateur, tenus à jour à chaque partie
+    ScoreRollup: Points par utilisateur et par période (jour, semaine, mois)
     Badge: Définit les badges disponibles dans l'application
     UserBadge: Table de liaison entre utilisateurs et badges
+    BadgeEvent: File durable des événements de score à traiter par le worker de badges
     ShopItem: Représente un article de la boutique virtuelle
     UserInventory: Table de liaison entre utilisateurs et articles achetés
+    CatalogVersion: Compteur de version des catalogues (boutique, badges)
 
 Author: Roche Samira
 Project: Récy&Co - Sorting is fun!
 """
 
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from . import db
 
@@ -38,6 +44,7 @@ class User(db.Model):
 
     Relationships:
         scores (list[Score]): Liste des scores enregistrés par l'utilisateur
+        stats (UserStats): Statistiques de jeu agrégées de l'utilisateur
         badges (list[UserBadge]): Liste des badges débloqués par l'utilisateur
         inventory (list[UserInventory]): Liste des articles achetés par l'utilisateur
     """
@@ -62,6 +69,7 @@ class User(db.Model):
 
     # Relations
     scores = db.relationship("Score", backref="user")
+    stats = db.relationship("UserStats", backref="user", uselist=False, cascade="all, delete-orphan")
     badges = db.relationship("UserBadge", backref="user")
     inventory = db.relationship("UserInventory", backref="user")
 
@@ -132,6 +140,10 @@ class Score(db.Model):
         user (User): L'utilisateur qui a joué cette partie
     """
     __tablename__ = "scores"
+    __table_args__ = (
+        # Historique paginé par curseur (ScoreService.get_user_score_history)
+        db.Index("ix_scores_user_played", "user_id", "played_at", "id"),
+    )
 
     def __init__(self, **kwargs) -> None:
         """
@@ -148,7 +160,14 @@ class Score(db.Model):
     correct_items = db.Column(db.Integer, nullable=False)
     total_items = db.Column(db.Integer, nullable=False)
     duration_ms = db.Column(db.Integer, nullable=False)
-    played_at = db.Column(db.DateTime, server_default=func.now(), nullable=False)
+    # SQLite : même format que CURRENT_TIMESTAMP (à la seconde, comme le
+    # TIMESTAMP MySQL), sinon une date liée en paramètre ('... HH:MM:SS.000000')
+    # ne se compare pas correctement aux dates stockées ('... HH:MM:SS')
+    played_at = db.Column(
+        db.DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
+        server_default=func.now(),
+        nullable=False
+    )
 
     def efficiency(self):
         """
@@ -194,6 +213,151 @@ class Score(db.Model):
             "efficiency": self.efficiency()
         }
 
+# ---------- USERSTATS ----------
+class UserStats(db.Model):
+    """
+    Modèle regroupant les statistiques de jeu agrégées d'un utilisateur.
+
+    Une ligne par utilisateur, mise à jour dans la même transaction que
+    l'insertion de chaque Score. Le profil lit ainsi ses statistiques par
+    clé primaire au lieu d'agréger toute la table scores à chaque affichage.
+    La table peut être reconstruite depuis scores (commande rebuild-user-stats).
+
+    Attributes:
+        user_id (int): Identifiant de l'utilisateur (clé primaire et étrangère)
+        games_played (int): Nombre de parties jouées
+        best_points (int): Meilleur score obtenu dans une partie
+        total_points (int): Somme des points gagnés en jeu (hors achats boutique)
+        total_correct_items (int): Nombre total d'items correctement triés
+        total_items (int): Nombre total d'items présentés
+        total_duration_ms (int): Temps de jeu cumulé en millisecondes
+        best_efficiency (float): Meilleur taux de réussite sur une partie (0.0 à 1.0)
+        last_played_at (datetime): Date et heure de la dernière partie (optionnel)
+
+    Relationships:
+        user (User): L'utilisateur concerné par ces statistiques
+    """
+    __tablename__ = "user_stats"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Initialise une nouvelle ligne de statistiques.
+
+        Args:
+            **kwargs: Arguments nommés correspondant aux attributs du modèle
+        """
+        super().__init__(**kwargs)
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    games_played = db.Column(db.Integer, default=0, nullable=False)
+    best_points = db.Column(db.Integer, default=0, nullable=False)
+    total_points = db.Column(db.Integer, default=0, nullable=False)
+    total_correct_items = db.Column(db.Integer, default=0, nullable=False)
+    total_items = db.Column(db.Integer, default=0, nullable=False)
+    total_duration_ms = db.Column(db.BigInteger, default=0, nullable=False)
+    best_efficiency = db.Column(db.Float, default=0, nullable=False)
+    last_played_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        """
+        Convertit les statistiques en dictionnaire.
+
+        Returns:
+            dict: Dictionnaire contenant toutes les statistiques agrégées
+                - games_played (int): Nombre de parties jouées
+                - best_points (int): Meilleur score d'une partie
+                - total_points (int): Points gagnés en jeu
+                - total_correct_items (int): Items correctement triés
+                - total_items (int): Items présentés
+                - total_duration_ms (int): Temps de jeu cumulé
+                - best_efficiency (float): Meilleur taux de réussite
+                - last_played_at (datetime): Date de la dernière partie
+        """
+        return {
+            "games_played": self.games_played,
+            "best_points": self.best_points,
+            "total_points": self.total_points,
+            "total_correct_items": self.total_correct_items,
+            "total_items": self.total_items,
+            "total_duration_ms": self.total_duration_ms,
+            "best_efficiency": self.best_efficiency,
+            "last_played_at": self.last_played_at
+        }
+
+# ---------- SCOREROLLUP ----------
+class ScoreRollup(db.Model):
+    """
+    Modèle regroupant les points gagnés par un utilisateur sur une période.
+
+    Une ligne par (période, début de période, utilisateur), incrémentée dans
+    la même transaction que chaque Score. Les classements du jour, de la
+    semaine ou du mois lisent les meilleures lignes d'une période par index,
+    sans agréger la table scores. Seuls les points gagnés en jeu comptent :
+    les achats de la boutique ne les diminuent pas. La table peut être
+    reconstruite depuis scores (commande rebuild-score-rollups).
+
+    Attributes:
+        period (str): Type de période : day, week ou month (clé primaire)
+        bucket (date): Premier jour de la période (le lundi pour une
+            semaine, le 1er pour un mois) (clé primaire)
+        user_id (int): Identifiant de l'utilisateur (clé primaire et étrangère)
+        points (int): Points gagnés en jeu sur la période
+        games_played (int): Nombre de parties jouées sur la période
+    """
+    __tablename__ = "score_rollups"
+    __table_args__ = (
+        # Meilleurs joueurs d'une période (ScoreService.get_leaderboard)
+        db.Index("ix_score_rollups_top", "period", "bucket", "points"),
+    )
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Initialise une nouvelle ligne d'agrégat de période.
+
+        Args:
+            **kwargs: Arguments nommés correspondant aux attributs du modèle
+        """
+        super().__init__(**kwargs)
+
+    period = db.Column(db.String(10), primary_key=True, nullable=False)
+    bucket = db.Column(db.Date, primary_key=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    points = db.Column(db.Integer, default=0, nullable=False)
+    games_played = db.Column(db.Integer, default=0, nullable=False)
+
+# ---------- REVOKED TOKEN ----------
+class RevokedToken(db.Model):
+    """
+    Modèle représentant un refresh token révoqué.
+
+    Une ligne est ajoutée à chaque rotation (le refresh token utilisé ne
+    sert qu'une fois) et à chaque déconnexion. La clé primaire jti rend la
+    rotation atomique : deux utilisations du même token ne peuvent pas
+    réussir toutes les deux, même sur deux workers différents. Les lignes
+    sont supprimées une fois le token expiré (utils.revocation).
+
+    Attributes:
+        jti (str): Identifiant unique du token (claim jti) (clé primaire)
+        user_id (int): Identifiant de l'utilisateur (clé étrangère)
+        expires_at (datetime): Expiration du token (UTC), au-delà la ligne est inutile
+        revoked_at (datetime): Date et heure de la révocation
+    """
+    __tablename__ = "revoked_tokens"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Initialise une nouvelle révocation.
+
+        Args:
+            **kwargs: Arguments nommés correspondant aux attributs du modèle
+        """
+        super().__init__(**kwargs)
+
+    jti = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, server_default=func.now(), nullable=False)
+
 # ---------- BADGE ----------
 class Badge(db.Model):
     """
@@ -208,6 +372,7 @@ class Badge(db.Model):
         label (str): Nom du badge affiché à l'utilisateur (max 100 caractères)
         description (str): Description du badge et condition de déblocage
         threshold (int): Seuil requis pour débloquer le badge (optionnel)
+        rule (str): Type de règle de déblocage (optionnel, voir utils.badge_rules)
         icon (str): Chemin vers l'icône du badge (optionnel, max 255 caractères)
 
     Relationships:
@@ -229,6 +394,7 @@ class Badge(db.Model):
     label = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     threshold = db.Column(db.Integer, nullable=True)
+    rule = db.Column(db.String(50), nullable=True)
     icon = db.Column(db.String(255), nullable=True)
 
     # Relations
@@ -245,6 +411,7 @@ class Badge(db.Model):
                 - label (str): Nom du badge
                 - description (str): Description détaillée
                 - threshold (int): Seuil de déblocage
+                - rule (str): Type de règle de déblocage
                 - icon (str): Chemin de l'icône
         """
         return {
@@ -253,6 +420,7 @@ class Badge(db.Model):
             "label": self.label,
             "description": self.description,
             "threshold": self.threshold,
+            "rule": self.rule,
             "icon": self.icon
         }
 
@@ -306,6 +474,46 @@ class UserBadge(db.Model):
             "awarded_at": self.awarded_at
         }
 
+# ---------- BADGEEVENT ----------
+class BadgeEvent(db.Model):
+    """
+    Modèle représentant un événement de score en attente d'évaluation des badges.
+
+    Utilisé uniquement quand BADGE_WORKER_MODE vaut "db" : la façade dépose
+    un événement après chaque partie et le worker de badges les traite par
+    lots, puis les supprime. Les événements non traités survivent ainsi à
+    un redémarrage du serveur ; un événement dont l'évaluation échoue est
+    repris plus tard, jusqu'à MAX_ATTEMPTS tentatives (services/badge_worker.py),
+    puis laissé dans la table pour examen.
+
+    Attributes:
+        id (int): Identifiant unique de l'événement (clé primaire)
+        user_id (int): Identifiant de l'utilisateur (clé étrangère)
+        payload (str): Parties jouées et score total de départ (JSON)
+        created_at (datetime): Date et heure de dépôt de l'événement
+        claimed_at (datetime): Date de réservation par un worker (optionnel)
+        claimed_by (str): Identifiant du worker qui traite l'événement (optionnel)
+        attempts (int): Nombre de réservations par un worker (tentatives de traitement)
+    """
+    __tablename__ = "badge_events"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Initialise un nouvel événement de score.
+
+        Args:
+            **kwargs: Arguments nommés correspondant aux attributs du modèle
+        """
+        super().__init__(**kwargs)
+
+    id = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, server_default=func.now(), nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    claimed_by = db.Column(db.String(32), nullable=True)
+    attempts = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
 # ---------- SHOPITEM ----------
 class ShopItem(db.Model):
     """
@@ -417,3 +625,40 @@ class UserInventory(db.Model):
             "item_id": self.item_id,
             "acquired_at": self.acquired_at
         }
+
+# ---------- CATALOGVERSION ----------
+class CatalogVersion(db.Model):
+    """
+    Modèle représentant le numéro de version d'un catalogue.
+
+    Le compteur est incrémenté dans la même transaction que toute
+    modification des lignes du catalogue (voir utils.catalog_cache). Chaque
+    worker compare périodiquement ce numéro à celui de son cache pour savoir
+    s'il doit recharger le catalogue.
+
+    Attributes:
+        name (str): Nom du catalogue ("shop", "badges") (clé primaire)
+        version (int): Numéro de version, incrémenté à chaque modification
+        updated_at (datetime): Date et heure de la dernière modification
+    """
+    __tablename__ = "catalog_versions"
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Initialise un nouveau compteur de version.
+
+        Args:
+            **kwargs: Arguments nommés correspondant aux attributs du modèle
+        """
+        super().__init__(**kwargs)
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now(), nullable=True)
+
+# Les compteurs existent dès la création de la table (db.create_all, tests)
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_versions (name, version) VALUES ('shop', 0), ('badges', 0)")
+)
@@ -22,6 +22,40 @@ CREATE TABLE IF NOT EXISTS scores(
 	total_items INT NOT NULL,
 	duration_ms INT NOT NULL,
 	played_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	INDEX ix_scores_user_played (user_id, played_at, id),
+	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS user_stats(
+	user_id INT PRIMARY KEY,
+	games_played INT NOT NULL DEFAULT 0,
+	best_points INT NOT NULL DEFAULT 0,
+	total_points INT NOT NULL DEFAULT 0,
+	total_correct_items INT NOT NULL DEFAULT 0,
+	total_items INT NOT NULL DEFAULT 0,
+	total_duration_ms BIGINT NOT NULL DEFAULT 0,
+	best_efficiency FLOAT NOT NULL DEFAULT 0,
+	last_played_at TIMESTAMP NULL,
+	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS score_rollups(
+	period VARCHAR(10) NOT NULL,
+	bucket DATE NOT NULL,
+	user_id INT NOT NULL,
+	points INT NOT NULL DEFAULT 0,
+	games_played INT NOT NULL DEFAULT 0,
+	PRIMARY KEY (period, bucket, user_id),
+	INDEX ix_score_rollups_top (period, bucket, points),
+	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS revoked_tokens(
+	jti VARCHAR(32) PRIMARY KEY,
+	user_id INT NOT NULL,
+	expires_at DATETIME NOT NULL,
+	revoked_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	INDEX ix_revoked_tokens_expires_at (expires_at),
 	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
@@ -31,6 +65,7 @@ CREATE TABLE IF NOT EXISTS badges(
 	label VARCHAR(100) NOT NULL,
 	description TEXT NOT NULL,
 	threshold INT NULL,
+	rule VARCHAR(50) NULL,
 	icon VARCHAR(255) NULL
 );
 
@@ -43,6 +78,17 @@ CREATE TABLE IF NOT EXISTS user_badges(
 	FOREIGN KEY (badge_id) REFERENCES badges(id) ON DELETE CASCADE
 );
 
+CREATE TABLE IF NOT EXISTS badge_events(
+	id INT AUTO_INCREMENT PRIMARY KEY,
+	user_id INT NOT NULL,
+	payload TEXT NOT NULL,
+	created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	claimed_at TIMESTAMP NULL,
+	claimed_by VARCHAR(32) NULL,
+	attempts INT NOT NULL DEFAULT 0,
+	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
 CREATE TABLE IF NOT EXISTS shop_items(
 	id INT AUTO_INCREMENT PRIMARY KEY,
 	sku VARCHAR(100) NOT NULL UNIQUE,
@@ -59,3 +105,11 @@ CREATE TABLE IF NOT EXISTS user_inventory(
 	FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
 	FOREIGN KEY (item_id) REFERENCES shop_items(id) ON DELETE CASCADE
 );
+
+CREATE TABLE IF NOT EXISTS catalog_versions(
+	name VARCHAR(50) PRIMARY KEY,
+	version INT NOT NULL DEFAULT 0,
+	updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO catalog_versions (name, version) VALUES ('shop', 0), ('badges', 0);
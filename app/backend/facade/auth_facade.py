@@ -11,6 +11,9 @@ def register():
         email=data.get("email"),
         password=data.get("password")
     )
+    if response["status_code"] == 503:
+        # Pool bcrypt saturé : le client peut réessayer un peu plus tard
+        return jsonify(response), 503, {"Retry-After": "1"}
     return jsonify(response), response["status_code"]
 
 
@@ -35,6 +38,9 @@ def login():
 
         return flask_response
 
+    if response["status_code"] == 503:
+        # Pool bcrypt saturé : le client peut réessayer un peu plus tard
+        return jsonify(response), 503, {"Retry-After": "1"}
     return jsonify(response), response["status_code"]
 
 
@@ -60,12 +66,14 @@ def me():
 @auth_bp.route("/api/logout", methods=["POST"])
 def logout():
     """
-    Déconnecte l'utilisateur en supprimant les cookies de tokens
+    Déconnecte l'utilisateur : révoque le refresh token et supprime les cookies de tokens
     """
+    service = current_app.config["services"]["auth"]
+    result = service.logout(request.cookies.get("refresh_token"))
 
     response = make_response(jsonify({
         "success": True,
-        "message": "Déconnexion réussie"
+        "message": result["message"]
     }), 200)
 
     # Utilisation utilitaire pour supprimer les cookies
@@ -91,10 +99,11 @@ def refresh_token():
         "message": "Token rafraîchi"
     }), 200)
 
-    # Extrait nouveau access_token
+    # Extrait les nouveaux tokens (l'ancien refresh token est révoqué)
     new_access_token = result.get("data", {}).get("access_token")
+    new_refresh_token = result.get("data", {}).get("refresh_token")
 
-    # Met le nouveau access_token dans un cookie
+    # Met les nouveaux tokens dans les cookies
     if new_access_token:
-        set_auth_cookies(response, new_access_token)
+        set_auth_cookies(response, new_access_token, new_refresh_token)
     return response
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request, current_app
 from utils.auth_utils import verify_token_and_get_user_id
+from utils.http_cache import make_cached_response
 badge_bp = Blueprint("badge", __name__)
 
 @badge_bp.route("/api/badges/me", methods=["GET"])
@@ -16,5 +17,6 @@ def user_badges():
 @badge_bp.route("/api/badges", methods=["GET"])
 def all_badges():
     badge_service = current_app.config["services"]["badge"]
-    response = badge_service.get_all_badges()
-    return jsonify(response), response["status_code"]
+    # Réponse pré-sérialisée, ETag propre à chaque version du catalogue
+    catalogue = badge_service.catalog.get()
+    return make_cached_response(catalogue.payload)
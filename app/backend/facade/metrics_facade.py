@@ -0,0 +1,36 @@
+import hmac
+import logging
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.before_request
+def verifier_acces():
+    """
+    Réserve /metrics au collecteur : jeton METRICS_TOKEN s'il est défini,
+    sinon adresses de METRICS_ALLOWED_IPS (machine locale par défaut).
+    """
+    jeton = current_app.config.get("METRICS_TOKEN")
+    if jeton:
+        fourni = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(fourni.encode(), f"Bearer {jeton}".encode()):
+            logger.warning("Jeton /metrics invalide", extra={"remote_addr": request.remote_addr})
+            return jsonify({"success": False, "message": "Accès aux mesures refusé"}), 401
+        return None
+    if request.remote_addr not in current_app.config.get("METRICS_ALLOWED_IPS", ()):
+        logger.warning("Adresse non autorisée sur /metrics", extra={"remote_addr": request.remote_addr})
+        return jsonify({"success": False, "message": "Accès aux mesures refusé"}), 403
+    return None
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Export des mesures de performance au format texte Prometheus.
+    Ne pas exposer via le reverse proxy : l'accès est de toute façon filtré
+    par verifier_acces().
+    """
+    registry = current_app.config["services"]["metrics"]
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -1,13 +1,24 @@
-from flask import Blueprint, jsonify
-import json
+import os
+from flask import Blueprint, current_app
+from utils.http_cache import JSONFileCache, make_cached_response
 
 rules_bp = Blueprint("rules", __name__)
 
+# Fichier des consignes, chargé au premier appel puis gardé sérialisé en mémoire
+_rules_file = None
+
+def _get_rules_file():
+    global _rules_file
+    if _rules_file is None:
+        _rules_file = JSONFileCache(os.path.join(current_app.static_folder, "data", "consignes.json"))
+    return _rules_file
+
+def warm_rules_cache():
+    """Charge consignes.json au démarrage (préchauffage, dans un contexte d'application)."""
+    _get_rules_file().get()
+
 @rules_bp.route("/api/rules", methods=["GET"])
 def get_rules():
-    # Ouvrir le fichier json
-    with open("../frontend/static/data/consignes.json", "r", encoding="utf-8") as f:
-        #json.load()
-        data = json.load(f)
-    #return jsonify
-    return jsonify(data)
+    # Document relu uniquement si consignes.json a été modifié (mtime)
+    payload = _get_rules_file().get()
+    return make_cached_response(payload, max_age=current_app.config["RULES_CACHE_MAX_AGE"])
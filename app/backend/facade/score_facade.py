@@ -1,5 +1,4 @@
 from flask import Blueprint, jsonify, request, current_app
-from db.models import Score
 from utils.auth_utils import verify_token_and_get_user_id
 
 
@@ -13,9 +12,8 @@ def add_scores():
     if error:
         return jsonify(error), error["status_code"]
 
-    # Logique métier : enregistrement du score
+    # Logique métier : enregistrement du score (badges attribués en arrière-plan)
     score_service = current_app.config["services"]["score"]
-    badge_service = current_app.config["services"]["badge"]
     data = request.get_json()
 
     response = score_service.add_score(
@@ -26,19 +24,27 @@ def add_scores():
         duration_ms=data.get("duration_ms")
         )
 
-    # Debug
-    print(f"🔍 Response success: {response.get('success')}")
+    return jsonify(response), response["status_code"]
+
+@score_bp.route("/api/scores/batch", methods=["POST"])
+def add_scores_batch():
+    """
+    Route pour enregistrer en une fois plusieurs parties jouées hors ligne.
+    Corps attendu : {"games": [{"points": .., "correct_items": .., ...}, ...]}
+    """
+    # Vérification token et récupération user_id
+    user_id, error = verify_token_and_get_user_id()
+    if error:
+        return jsonify(error), error["status_code"]
 
-    if response.get("success"):
-        print(f"🔍 Avant check_and_award_badges pour user {user_id}")
-        score_id = response["data"]["score_id"]
-        score_obj = Score.query.get(score_id)
-        print(f"🔍 Score object: {score_obj}, points: {score_obj.points if score_obj else 'None'}")
+    data = request.get_json(silent=True)
+    if not data or "games" not in data:
+        return jsonify({"success": False, "message": "Champ games manquant dans la requête"}), 400
 
-        # Appel du badge service
-        badge_result = badge_service.check_and_award_badges(user_id, score_obj)
-        print(f"🔍 Badge result: {badge_result}")
+    score_service = current_app.config["services"]["score"]
 
+    # Badges évalués une seule fois, en arrière-plan, sur l'état final après le lot
+    response = score_service.add_scores_bulk(user_id, data.get("games"))
     return jsonify(response), response["status_code"]
 
 @score_bp.route("/api/scores/me", methods=["GET"])
@@ -52,12 +58,52 @@ def user_score():
     response = score_service.get_user_scores(user_id)
     return jsonify(response), response["status_code"]
 
+@score_bp.route("/api/scores/me/history", methods=["GET"])
+def user_score_history():
+    """
+    Route pour récupérer l'historique des parties de l'utilisateur connecté,
+    page par page (paramètres cursor = next_cursor de la page précédente, limit).
+    """
+    user_id, error = verify_token_and_get_user_id()
+    if error:
+        return jsonify(error), error["status_code"]
+
+    score_service = current_app.config["services"]["score"]
+    response = score_service.get_user_score_history(
+        user_id,
+        cursor=request.args.get("cursor") or None,
+        limit=request.args.get("limit", default=20, type=int)
+    )
+    return jsonify(response), response["status_code"]
+
 @score_bp.route("/api/leaderboard", methods=["GET"])
 def leaderboard():
+    """
+    Route du classement : score total (window=all, par défaut) ou points
+    gagnés pendant le jour, la semaine ou le mois en cours (window=day|week|month).
+    """
     score_service = current_app.config["services"]["score"]
     limit = request.args.get("limit", default=15, type=int)
+    window = request.args.get("window", default="all")
+
+    response = score_service.get_leaderboard(limit, window)
+    return jsonify(response), response["status_code"]
+
+@score_bp.route("/api/leaderboard/around/me", methods=["GET"])
+def leaderboard_around_me():
+    """
+    Route pour récupérer le rang de l'utilisateur connecté et ses voisins
+    dans le classement (paramètre radius = nombre de joueurs de chaque côté).
+    """
+    # Vérification token et récupération user_id
+    user_id, error = verify_token_and_get_user_id()
+    if error:
+        return jsonify(error), error["status_code"]
+
+    score_service = current_app.config["services"]["score"]
+    radius = request.args.get("radius", default=5, type=int)
 
-    response = score_service.get_leaderboard(limit)
+    response = score_service.get_leaderboard_around(user_id, radius)
     return jsonify(response), response["status_code"]
 
 @score_bp.route("/api/stats/me", methods=["GET"])
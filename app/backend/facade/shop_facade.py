@@ -1,12 +1,14 @@
 from flask import Blueprint, jsonify, request, current_app
 from utils.auth_utils import verify_token_and_get_user_id
+from utils.http_cache import make_cached_response
 shop_bp = Blueprint("shop", __name__)
 
 @shop_bp.route("/api/shop/items", methods=["GET"])
 def get_shop_items():
     shop_service = current_app.config["services"]["shop"]
-    response = shop_service.get_active_items()
-    return jsonify(response), response["status_code"]
+    # Réponse pré-sérialisée, ETag propre à chaque version du catalogue
+    catalogue = shop_service.catalog.get()
+    return make_cached_response(catalogue.payload)
 
 @shop_bp.route("/api/shop/can_purchase", methods=["POST"])
 def can_purchase_item():
@@ -0,0 +1,37 @@
+"""Ajout table user_stats (statistiques agrégées par utilisateur)
+
+Revision ID: 4c1d9e7a2b30
+Revises: 2bed7eddf1ff
+Create Date: 2026-10-17 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1d9e7a2b30'
+down_revision = '2bed7eddf1ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('best_points', sa.Integer(), nullable=False),
+    sa.Column('total_points', sa.Integer(), nullable=False),
+    sa.Column('total_correct_items', sa.Integer(), nullable=False),
+    sa.Column('total_items', sa.Integer(), nullable=False),
+    sa.Column('total_duration_ms', sa.BigInteger(), nullable=False),
+    sa.Column('best_efficiency', sa.Float(), nullable=False),
+    sa.Column('last_played_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Remplir ensuite la table : flask --app run rebuild-user-stats
+
+
+def downgrade():
+    op.drop_table('user_stats')
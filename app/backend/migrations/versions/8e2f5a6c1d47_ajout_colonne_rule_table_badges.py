@@ -0,0 +1,28 @@
+"""Ajout colonne rule à la table badges (règles de déblocage en base)
+
+Revision ID: 8e2f5a6c1d47
+Revises: 4c1d9e7a2b30
+Create Date: 2026-10-17 11:02:17.304518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f5a6c1d47'
+down_revision = '4c1d9e7a2b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('badges', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rule', sa.String(length=50), nullable=True))
+    # Les badges existants sans règle utilisent utils.badge_rules.DEFAULT_RULES
+    # tant que seed_badges.py n'a pas été relancé.
+
+
+def downgrade():
+    with op.batch_alter_table('badges', schema=None) as batch_op:
+        batch_op.drop_column('rule')
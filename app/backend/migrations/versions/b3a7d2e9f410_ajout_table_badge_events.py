@@ -0,0 +1,33 @@
+"""Ajout table badge_events (file durable du worker de badges)
+
+Revision ID: b3a7d2e9f410
+Revises: 8e2f5a6c1d47
+Create Date: 2026-10-17 14:26:41.118052
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3a7d2e9f410'
+down_revision = '8e2f5a6c1d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('badge_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_by', sa.String(length=32), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('badge_events')
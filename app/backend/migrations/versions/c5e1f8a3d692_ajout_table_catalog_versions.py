@@ -0,0 +1,33 @@
+"""Ajout table catalog_versions (invalidation des caches boutique / badges)
+
+Revision ID: c5e1f8a3d692
+Revises: b3a7d2e9f410
+Create Date: 2026-10-17 16:08:53.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e1f8a3d692'
+down_revision = 'b3a7d2e9f410'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_versions = op.create_table('catalog_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(catalog_versions, [
+        {'name': 'shop', 'version': 0},
+        {'name': 'badges', 'version': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
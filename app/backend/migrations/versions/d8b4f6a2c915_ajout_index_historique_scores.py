@@ -0,0 +1,28 @@
+"""Ajout index (user_id, played_at, id) sur scores (historique paginé)
+
+Revision ID: d8b4f6a2c915
+Revises: c5e1f8a3d692
+Create Date: 2026-10-17 18:21:07.334190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b4f6a2c915'
+down_revision = 'c5e1f8a3d692'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_scores_user_played', 'scores', ['user_id', 'played_at', 'id'], unique=False)
+
+
+def downgrade():
+    # MySQL : l'index composite sert aussi à la clé étrangère user_id, qui
+    # doit garder un index après sa suppression
+    if op.get_bind().dialect.name == 'mysql':
+        op.create_index('ix_scores_user_id', 'scores', ['user_id'], unique=False)
+    op.drop_index('ix_scores_user_played', table_name='scores')
@@ -0,0 +1,35 @@
+"""Ajout table score_rollups (points par jour, semaine et mois)
+
+Revision ID: e4a9c2f7b158
+Revises: d8b4f6a2c915
+Create Date: 2026-10-17 20:04:52.716348
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c2f7b158'
+down_revision = 'd8b4f6a2c915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('score_rollups',
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('bucket', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('period', 'bucket', 'user_id')
+    )
+    op.create_index('ix_score_rollups_top', 'score_rollups', ['period', 'bucket', 'points'], unique=False)
+    # Remplir ensuite la table : flask --app run rebuild-score-rollups
+
+
+def downgrade():
+    op.drop_index('ix_score_rollups_top', table_name='score_rollups')
+    op.drop_table('score_rollups')
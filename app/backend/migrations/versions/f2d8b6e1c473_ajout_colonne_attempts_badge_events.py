@@ -0,0 +1,26 @@
+"""Ajout colonne attempts à la table badge_events
+
+Revision ID: f2d8b6e1c473
+Revises: a7c3e9d2f614
+Create Date: 2026-10-17 23:05:37.260194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d8b6e1c473'
+down_revision = 'a7c3e9d2f614'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('badge_events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('badge_events', schema=None) as batch_op:
+        batch_op.drop_column('attempts')
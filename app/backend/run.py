@@ -1,93 +1,286 @@
-from dotenv import load_dotenv
-load_dotenv() # Charge le fichier .env
+"""
+Point d'entrée de l'application Flask Récy&Co.
 
+create_app(config_name) construit une application complète (configuration,
+base de données, services, blueprints, commandes CLI). L'import de ce
+module ne construit rien : les dépendances lourdes (Flask-SQLAlchemy,
+bcrypt, services...) sont importées par create_app().
+
+Pour les scripts, les tests et `flask --app run`, l'application par défaut
+(configuration APP_ENV) est construite au premier accès à `run.app`, ainsi
+qu'aux raccourcis `run.db`, `run.score_service`, etc.
+
+Functions:
+    create_app: Construit une application pour une configuration donnée
+"""
+
+import logging
 import os
-from flask import Flask, render_template
-from flask_migrate import Migrate
-from db import db
-from config import config
-from utils import security
-from services.auth_service import AuthService
-from services.badge_service import BadgeService
-from services.score_service import ScoreService
-from services.shop_service import ShopService
-from facade.auth_facade import auth_bp
-from facade.badge_facade import badge_bp
-from facade.score_facade import score_bp
-from facade.shop_facade import shop_bp
-from facade.rules_facade import rules_bp
-
-# Initialisation de l’app Flask
-app = Flask(
-    __name__,
-    template_folder="../frontend/templates",
-    static_folder="../frontend/static"
-    )
+import threading
+
+logger = logging.getLogger(__name__)
 
-# Récupération de la config (par défaut : development)
-env = os.getenv("APP_ENV", "default")
-app_config = config[env]()
-app.config.from_object(app_config)
-
-# Initialisation de la DB avec Flask
-db.init_app(app)
-# Gestion des migrations
-migrate = Migrate(app, db)
-
-# Instanciation des services
-auth_service = AuthService(db, security, app_config)
-badge_service = BadgeService(db)
-score_service = ScoreService(db)
-shop_service = ShopService(db)
-
-# Stockage des services dans app.config
-app.config["services"] = {
-    "auth": auth_service,
-    "badge": badge_service,
-    "score": score_service,
-    "shop": shop_service
+# Raccourcis `from run import score_service` -> clé de app.config["services"]
+_SERVICE_ALIASES = {
+    "auth_service": "auth",
+    "badge_service": "badge",
+    "score_service": "score",
+    "shop_service": "shop",
+    "badge_worker": "badge_worker",
+    "metrics_registry": "metrics",
 }
 
-# Blueprints (API)
-app.register_blueprint(auth_bp)
-app.register_blueprint(badge_bp)
-app.register_blueprint(score_bp)
-app.register_blueprint(shop_bp)
-app.register_blueprint(rules_bp)
+_default_app_lock = threading.Lock()
+
+
+def create_app(config_name=None, warm_caches=None):
+    """
+    Construit l'application Flask et ses services.
+
+    Args:
+        config_name (str, optional): Clé de config.config (development,
+            production, testing) ; par défaut la variable APP_ENV
+        warm_caches (bool, optional): Charge dès le démarrage les caches
+            (catalogue des badges, articles de la boutique, consignes de tri,
+            classement) ; par défaut le réglage WARM_CACHES
+
+    Returns:
+        Flask: Application prête à servir
+    """
+    from dotenv import load_dotenv
+    load_dotenv()  # Charge le fichier .env (avant la lecture de la configuration)
+
+    import atexit
+    from flask import Flask
+    from flask_migrate import Migrate
+    from db import db
+    from config import config
+    from utils import security
+    from utils.json_provider import RecycoJSONProvider
+    from utils.leaderboard_index import LeaderboardIndex
+    from utils.metrics import MetricsRegistry, init_metrics, init_pool_metrics
+    from utils.password_executor import PasswordExecutor
+    from utils.read_routing import REPLICA_BIND, init_read_routing
+    from utils.revocation import RevocationStore
+    from utils.sqlite_tuning import init_sqlite_pragmas
+    from utils.structured_logging import init_logging
+    from utils.user_events import on_user_deleted
+    from services.auth_service import AuthService
+    from services.badge_service import BadgeService
+    from services.badge_worker import BadgeWorker
+    from services.score_service import ScoreService
+    from services.shop_service import ShopService
+    from facade.auth_facade import auth_bp
+    from facade.badge_facade import badge_bp
+    from facade.score_facade import score_bp
+    from facade.shop_facade import shop_bp
+    from facade.rules_facade import rules_bp
+    from facade.metrics_facade import metrics_bp
+
+    # Initialisation de l’app Flask
+    app = Flask(
+        __name__,
+        template_folder="../frontend/templates",
+        static_folder="../frontend/static"
+        )
+    # Réponses JSON sérialisées par orjson (repli sur json), dates au format ISO 8601
+    app.json = RecycoJSONProvider(app)
+
+    # Récupération de la config (par défaut : APP_ENV, sinon production)
+    env = config_name or os.getenv("APP_ENV", "default")
+    app_config = config[env]()
+    app.config.from_object(app_config)
+
+    # Initialisation de la DB avec Flask
+    db.init_app(app)
+    # Gestion des migrations
+    Migrate(app, db)
+
+    with app.app_context():
+        # PRAGMA SQLite (profil local), branchés avant la première connexion
+        for engine in db.engines.values():
+            init_sqlite_pragmas(engine, app_config.SQLITE_PRAGMAS)
+        if app_config.AUTO_CREATE_SCHEMA:
+            db.create_all()
+            # Réplica local (deux fichiers SQLite) : mêmes tables que la base principale
+            if REPLICA_BIND in db.engines:
+                db.metadata.create_all(db.engines[REPLICA_BIND])
+
+    # Lectures des services marqués @replica_read sur le réplica (REPLICA_DATABASE_URL)
+    init_read_routing(app)
+
+    # Mesures de performance (durée par route, requêtes SQL) exportées sur /metrics
+    metrics_registry = MetricsRegistry()
+    if app_config.METRICS_ENABLED:
+        init_metrics(app, metrics_registry)
+        with app.app_context():
+            init_pool_metrics(db.engine, metrics_registry)
+
+    # Journalisation JSON via une file bornée (écriture dans un thread de fond)
+    init_logging(app, metrics_registry if app_config.METRICS_ENABLED else None)
+
+    # Classement en mémoire partagé entre les services qui modifient total_score
+    leaderboard_index = LeaderboardIndex(resync_seconds=app_config.LEADERBOARD_RESYNC_SECONDS)
+    # Un compte supprimé sort du classement dès la validation de la suppression
+    on_user_deleted(app, leaderboard_index.remove)
+
+    # Pool borné pour les calculs bcrypt (inscription, connexion)
+    password_executor = PasswordExecutor(
+        mode=app_config.PASSWORD_EXECUTOR_MODE,
+        max_workers=app_config.PASSWORD_EXECUTOR_WORKERS,
+        max_pending=app_config.PASSWORD_EXECUTOR_MAX_PENDING,
+        queue_timeout=app_config.PASSWORD_EXECUTOR_QUEUE_TIMEOUT
+    )
+    password_executor.start()
+    atexit.register(password_executor.shutdown)
+
+    # Refresh tokens révoqués : filtre construit au premier usage (aucun accès
+    # à la base au démarrage), purgé toutes les REVOKED_TOKENS_PRUNE_SECONDS secondes
+    revocation_store = RevocationStore(
+        db,
+        capacity=app_config.REVOKED_TOKENS_FILTER_CAPACITY,
+        prune_seconds=app_config.REVOKED_TOKENS_PRUNE_SECONDS
+    )
+
+    # Instanciation des services
+    auth_service = AuthService(db, security, app_config, password_executor, revocation_store)
+    # Un compte supprimé n'est plus accepté, sans attendre l'expiration du cache d'existence
+    on_user_deleted(app, auth_service.forget_user)
+    if app_config.METRICS_ENABLED:
+        metrics_registry.track_token_cache(auth_service.token_cache)
+    badge_service = BadgeService(db, app_config.CATALOG_VERSION_POLL_SECONDS)
+    badge_worker = BadgeWorker(
+        app,
+        db,
+        badge_service,
+        mode=app_config.BADGE_WORKER_MODE,
+        batch_size=app_config.BADGE_WORKER_BATCH_SIZE,
+        flush_seconds=app_config.BADGE_WORKER_FLUSH_SECONDS,
+        max_queue=app_config.BADGE_WORKER_MAX_QUEUE
+    )
+    if badge_worker.mode == "db":
+        # Reprend les événements laissés par le processus précédent dès la première
+        # requête, dans le processus qui la sert (après un éventuel fork)
+        app.before_request(badge_worker.start)
+    # Les événements encore en file sont traités avant l'arrêt du processus
+    atexit.register(badge_worker.stop)
+    score_service = ScoreService(
+        db, leaderboard_index, badge_worker, window_cache_seconds=app_config.LEADERBOARD_WINDOW_CACHE_SECONDS
+    )
+    shop_service = ShopService(db, leaderboard_index, app_config.CATALOG_VERSION_POLL_SECONDS)
+
+    # Stockage des services dans app.config
+    app.config["services"] = {
+        "auth": auth_service,
+        "badge": badge_service,
+        "score": score_service,
+        "shop": shop_service,
+        "badge_worker": badge_worker,
+        "metrics": metrics_registry
+    }
+
+    # Blueprints (API)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(badge_bp)
+    app.register_blueprint(score_bp)
+    app.register_blueprint(shop_bp)
+    app.register_blueprint(rules_bp)
+    if app_config.METRICS_ENABLED:
+        app.register_blueprint(metrics_bp)
+
+    _register_commands(app)
+    _register_pages(app)
+
+    if app_config.WARM_CACHES if warm_caches is None else warm_caches:
+        _warm_caches(app)
+
+    return app
+
+
+def _register_commands(app):
+    """Commandes CLI (flask --app run <commande>)."""
+    services = app.config["services"]
+
+    @app.cli.command("rebuild-user-stats")
+    def rebuild_user_stats():
+        """Reconstruit la table user_stats depuis l'historique des scores."""
+        total = services["score"].rebuild_user_stats()
+        print(f"✅ Statistiques recalculées pour {total} utilisateur(s)")
+
+    @app.cli.command("rebuild-score-rollups")
+    def rebuild_score_rollups():
+        """Reconstruit la table score_rollups (classements par période) depuis les scores."""
+        total = services["score"].rebuild_score_rollups()
+        print(f"✅ Points par période recalculés ({total} ligne(s))")
+
+    @app.cli.command("prune-revoked-tokens")
+    def prune_revoked_tokens():
+        """Supprime les révocations de refresh tokens expirés et reconstruit le filtre."""
+        total = services["auth"].revocation.rebuild()
+        print(f"✅ Révocations expirées supprimées ({total} encore active(s))")
+
+
+def _register_pages(app):
+    """Routes Front (HTML) : URL -> (endpoint utilisé par url_for, template)."""
+    from flask import render_template
+
+    pages = {
+        "/": ("index", "index.html"),
+        "/auth": ("auth", "auth.html"),
+        "/jeu": ("jeu", "jeu.html"),
+        "/infos": ("infos", "infos.html"),
+        "/about": ("about", "about.html"),
+        "/shop": ("shop", "shop.html"),
+        "/guide": ("guide", "guide-tri.html"),
+        "/profil": ("profil", "profil.html"),
+    }
+    for url, (endpoint, template) in pages.items():
+        app.add_url_rule(url, endpoint, lambda template=template: render_template(template))
 
-# Routes Front (HTML)
-@app.route("/")
-def index():
-    return render_template("index.html")
 
-@app.route("/auth")
-def auth():
-    return render_template("auth.html")
+def _warm_caches(app):
+    """
+    Charge les caches au démarrage plutôt qu'à la première requête.
 
-@app.route("/jeu")
-def jeu():
-    return render_template("jeu.html")
+    Une base pas encore migrée ne bloque pas le démarrage : les caches
+    sont alors chargés à la première requête, comme sans préchauffage.
+    """
+    from db import db
+    from facade.rules_facade import warm_rules_cache
 
-@app.route("/infos")
-def infos():
-    return render_template("infos.html")
+    services = app.config["services"]
+    with app.app_context():
+        try:
+            services["badge"].get_all_badges()
+            services["shop"].get_active_items()
+            services["score"].get_leaderboard()
+            warm_rules_cache()
+        except Exception as e:
+            logger.warning("Préchauffage des caches impossible : %s", e)
+        finally:
+            db.session.remove()
 
-@app.route("/about")
-def about():
-    return render_template("about.html")
 
-@app.route("/shop")
-def shop():
-    return render_template("shop.html")
+def _default_app():
+    """Application par défaut (APP_ENV), construite une seule fois."""
+    with _default_app_lock:
+        if "app" not in globals():
+            globals()["app"] = create_app()
+    return globals()["app"]
 
-@app.route("/guide")
-def guide():
-    return render_template("guide-tri.html")
 
-@app.route("/profil")
-def profil():
-    return render_template("profil.html")
+def __getattr__(name):
+    # `from run import app` (tests, scripts, flask --app run) : construction à la demande
+    if name == "app":
+        return _default_app()
+    if name == "db":
+        _default_app()
+        from db import db
+        return db
+    if name in _SERVICE_ALIASES:
+        return _default_app().config["services"][_SERVICE_ALIASES[name]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -1,113 +1,165 @@
 from db import db
 from db.models import Badge
-from app import app
+from utils.badge_rules import (
+    BADGE_COUNT_AT_LEAST,
+    GAME_CORRECT_ITEMS_AT_LEAST,
+    GAME_DURATION_UNDER,
+    GAME_PERFECT,
+    GAME_TOTAL_ITEMS_AT_LEAST,
+    TOTAL_SCORE_AT_LEAST,
+)
 
 # script : python3 seed_badges.py
-# Attention à mettre à jour badge_rule dans badge_service
+# Les règles de déblocage sont lues depuis les colonnes rule/threshold
+# (compilées par utils/badge_rules.py) : pas de code à modifier pour un nouveau badge.
 
 badges_data = [
     # --- Badges ludiques (enfants) ---
     {
         "code": "TRIEUR_MALIN",
         "label": "Trieur malin 🦝",
-        "description": "Trie au moins 10 objets correctement"
+        "description": "Trie au moins 10 objets correctement",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 10
     },
     {
         "code": "TRIEUR_FUTE",
         "label": "Trieur futé 🧩",
-        "description": "Trie au moins 40 objets correctement"
+        "description": "Trie au moins 40 objets correctement",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 40
     },
     {
         "code": "TRIEUR_PROPRET",
         "label": "Trieur propret 🧽",
-        "description": "Trie au moins 60 objets correctement"
+        "description": "Trie au moins 60 objets correctement",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 60
     },
     {
         "code": "TRIEUR_CHAMPION",
         "label": "Trieur champion 🏆",
-        "description": "Atteins 80 points cumulés"
+        "description": "Atteins 80 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 80
     },
     {
         "code": "TRIEUR_RAPIDE",
         "label": "Trieur rapide ⏱️",
-        "description": "Trie un objet en moins de 2 secondes"
+        "description": "Trie un objet en moins de 2 secondes",
+        "rule": GAME_DURATION_UNDER,
+        "threshold": 2000
     },
     {
         "code": "TRIEUR_JOUEUR",
         "label": "Trieur joueur 🎲",
-        "description": "Joue avec au moins 20 objets"
+        "description": "Joue avec au moins 20 objets",
+        "rule": GAME_TOTAL_ITEMS_AT_LEAST,
+        "threshold": 20
     },
     {
         "code": "AMI_DE_RECY",
         "label": "Ami de Recy 🦝",
-        "description": "Atteins 25 points cumulés"
+        "description": "Atteins 25 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 25
     },
 
     # --- Badges progression sérieuse ---
     {
         "code": "FIRST_GAME",
         "label": "Première partie",
-        "description": "Joue et réussis ton premier geste"
+        "description": "Joue et réussis ton premier geste",
+        "rule": GAME_CORRECT_ITEMS_AT_LEAST,
+        "threshold": 1
     },
     {
         "code": "PERFECT_RUN",
         "label": "Sans faute",
-        "description": "Réussis une série parfaite sans erreurs"
+        "description": "Réussis une série parfaite sans erreurs",
+        "rule": GAME_PERFECT,
+        "threshold": None
     },
     {
         "code": "TRIEUR_NOVICE",
         "label": "Trieur novice",
-        "description": "Atteins 30 points cumulés"
+        "description": "Atteins 30 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 30
     },
     {
         "code": "TRIEUR_DEBUTANT",
         "label": "Trieur débutant",
-        "description": "Atteins 50 points cumulés"
+        "description": "Atteins 50 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 50
     },
     {
         "code": "TRIEUR",
         "label": "Trieur",
-        "description": "Atteins 70 points cumulés"
+        "description": "Atteins 70 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 70
     },
     {
         "code": "TRIEUR_APPLIQUE",
         "label": "Trieur appliqué",
-        "description": "Atteins 100 points cumulés"
+        "description": "Atteins 100 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 100
     },
     {
         "code": "200_POINTS",
         "label": "Score 200 points",
-        "description": "Atteins 200 points cumulés"
+        "description": "Atteins 200 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 200
     },
     {
         "code": "TRIEUR_ASSIDU",
         "label": "Trieur assidu",
-        "description": "Atteins 300 points cumulés"
+        "description": "Atteins 300 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 300
     },
     {
         "code": "400_POINTS",
         "label": "Score 400 points",
-        "description": "Atteins 400 points cumulés"
+        "description": "Atteins 400 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 400
     },
     {
         "code": "TRIEUR_CONFIRME",
         "label": "Trieur confirmé",
-        "description": "Atteins 500 points cumulés"
+        "description": "Atteins 500 points cumulés",
+        "rule": TOTAL_SCORE_AT_LEAST,
+        "threshold": 500
     },
 
     # --- Badge spécial collectionneur ---
     {
         "code": "PETIT_COLLECTIONNEUR",
         "label": "Petit collectionneur",
-        "description": "Obtiens au moins 5 badges"
+        "description": "Obtiens au moins 5 badges",
+        "rule": BADGE_COUNT_AT_LEAST,
+        "threshold": 5
     }
 ]
 
 if __name__ == "__main__":
+    from run import create_app
+
+    app = create_app()
     with app.app_context():
         for data in badges_data:
-            if not db.session.query(Badge).filter_by(code=data["code"]).first():
+            badge = db.session.query(Badge).filter_by(code=data["code"]).first()
+            if not badge:
                 badge = Badge(**data)
                 db.session.add(badge)
+            else:
+                # Badge déjà présent : on complète sa règle de déblocage
+                badge.rule = data["rule"]
+                badge.threshold = data["threshold"]
         db.session.commit()
         print("✅ Tous les badges ont été insérés dans la base de données !")
@@ -12,10 +12,30 @@ Author: Roche Samira
 Project: Récy&Co - Sorting is fun!
 """
 
+import logging
+import threading
+import time
+import uuid
 from datetime import datetime, timezone
+from sqlalchemy import update
 from db.models import User
+from utils.password_executor import PasswordExecutorBusy
+from utils.query_budget import query_budget
+from utils.token_cache import TokenCache
 from utils.validators import is_valid_email, is_valid_password
 
+logger = logging.getLogger(__name__)
+
+# Nombre maximal d'utilisateurs gardés dans le cache d'existence
+USER_CACHE_MAX_SIZE = 10000
+
+# Réponse renvoyée quand le pool bcrypt est saturé
+SERVER_BUSY = {
+    "success": False,
+    "message": "Serveur très sollicité, réessayez dans quelques secondes",
+    "status_code": 503
+}
+
 class AuthService:
     """
     Service gérant l'authentification et la gestion des utilisateurs.
@@ -30,9 +50,11 @@ class AuthService:
         db: Instance de SQLAlchemy pour les opérations de base de données
         security: Service de sécurité pour le hashage et les tokens JWT
         config: Configuration de l'application (clés secrètes, durées d'expiration)
+        password_executor: Pool borné pour bcrypt (None = calcul dans la requête)
+        revocation: Refresh tokens révoqués (None = pas de révocation côté serveur)
     """
 
-    def __init__(self, db, security, config):
+    def __init__(self, db, security, config, password_executor=None, revocation=None):
         """
         Initialise le service d'authentification.
 
@@ -40,11 +62,26 @@ class AuthService:
             db: Instance SQLAlchemy pour les accès à la base de données
             security: Service de sécurité (hashage mot de passe, JWT)
             config: Objet de configuration (SECRET_KEY, JWT_EXP_MINUTES, etc.)
+            password_executor (PasswordExecutor, optional): Pool pour hash_password
+                et verify_password ; sans pool, security est appelé directement
+            revocation (RevocationStore, optional): Révocations des refresh tokens
+                (rotation à chaque /api/refresh, déconnexion)
         """
         self.db = db # db = SQLAlchemy()
         self.security = security
         self.config = config
+        self.password_executor = password_executor
+        self.revocation = revocation
+
+        # Cache d'existence des comptes : user_id -> expiration (time.monotonic)
+        self._known_users = {}
+        self._known_users_lock = threading.Lock()
+        self._user_cache_ttl = getattr(config, "AUTH_USER_CACHE_TTL_SECONDS", 30)
+
+        # Payloads des tokens d'accès déjà vérifiés (jusqu'à leur claim exp)
+        self.token_cache = TokenCache(getattr(config, "JWT_CACHE_SIZE", 10000))
 
+    @query_budget(3)
     def register_user(self, username, email, password):
         """
         Inscrit un nouvel utilisateur dans l'application.
@@ -70,6 +107,7 @@ class AuthService:
                     - 201 : Utilisateur créé avec succès
                     - 400 : Données invalides
                     - 409 : Conflit (username ou email déjà utilisé)
+                    - 503 : Trop d'inscriptions / connexions simultanées
         """
 
         if username == "" or len(username) < 3 or len(username) > 50:
@@ -88,8 +126,15 @@ class AuthService:
         if User.query.filter_by(email=email).first():
             return {"success": False, "message": "Email déjà utilisé", "status_code": 409}
 
+        # Connexion DB rendue au pool pendant bcrypt (plusieurs centaines de ms)
+        self.db.session.rollback()
+
         # Préparation données
-        password_hash = self.security.hash_password(password)
+        try:
+            password_hash = self._hash_password(password)
+        except PasswordExecutorBusy:
+            logger.warning("Pool bcrypt saturé, inscription refusée")
+            return dict(SERVER_BUSY)
         nouvel_utilisateur = User(
             username=username,
             email=email,
@@ -97,21 +142,24 @@ class AuthService:
             created_at=datetime.now(timezone.utc)
         )
 
-        # Sauvegarde DB
+        # Sauvegarde DB (réponse construite avant le commit, qui expire l'objet)
         self.db.session.add(nouvel_utilisateur)
+        self.db.session.flush()
+        data = {
+            "id": nouvel_utilisateur.id,
+            "username": nouvel_utilisateur.username,
+            "email": nouvel_utilisateur.email,
+            "created_at": nouvel_utilisateur.created_at
+        }
         self.db.session.commit()
 
         return {
             "success": True,
-            "data": {
-                "id": nouvel_utilisateur.id,
-                "username": nouvel_utilisateur.username,
-                "email": nouvel_utilisateur.email,
-                "created_at": nouvel_utilisateur.created_at.isoformat()
-            },
+            "data": data,
             "status_code": 201
         }
 
+    @query_budget(2)
     def login_user(self, email, password):
         """
         Authentifie un utilisateur et génère des tokens JWT.
@@ -139,6 +187,7 @@ class AuthService:
                     - 400 : Données manquantes
                     - 401 : Mot de passe incorrect
                     - 404 : Email introuvable
+                    - 503 : Trop d'inscriptions / connexions simultanées
         """
 
         if email == "" or password == "":
@@ -148,23 +197,33 @@ class AuthService:
         if not utilisateur:
             return {"success": False, "message": "Email introuvable", "status_code": 404}
 
-        if not self.security.verify_password(password, utilisateur.password_hash):
+        # Lu avant de rendre la connexion DB au pool pendant bcrypt (le rollback expire l'objet)
+        profil = {"id": utilisateur.id, "username": utilisateur.username}
+        password_hash = utilisateur.password_hash
+        self.db.session.rollback()
+
+        try:
+            mot_de_passe_ok = self._verify_password(password, password_hash)
+        except PasswordExecutorBusy:
+            logger.warning("Pool bcrypt saturé, connexion refusée")
+            return dict(SERVER_BUSY)
+
+        if not mot_de_passe_ok:
+            logger.info("Mot de passe incorrect", extra={"user_id": profil["id"]})
             return {"success": False, "message": "Mot de passe incorrect", "status_code": 401}
 
         # === Génération des deux tokens ===
         access_token = self.security.create_token(
-            {"id": utilisateur.id, "username": utilisateur.username},
+            profil,
             self.config.SECRET_KEY,
             self.config.JWT_EXP_MINUTES
         )
 
-        refresh_token = self.security.create_token(
-            {"id": utilisateur.id},
-            self.config.SECRET_KEY,
-            expiration_minutes=self.config.JWT_REFRESH_EXP_MINUTES
-        )
+        refresh_token = self._create_refresh_token(profil["id"])
 
-        utilisateur.last_login_at = datetime.now(timezone.utc)
+        self.db.session.execute(
+            update(User).where(User.id == profil["id"]).values(last_login_at=datetime.now(timezone.utc))
+        )
         self.db.session.commit()
 
         return {
@@ -172,14 +231,24 @@ class AuthService:
             "data": {
                 "access_token": access_token,
                 "refresh_token": refresh_token,
-                "user": {
-                    "id": utilisateur.id,
-                    "username": utilisateur.username
-                }
+                "user": profil
             },
             "status_code": 200
         }
 
+    def _hash_password(self, password):
+        """Hache un mot de passe via le pool bcrypt s'il est configuré."""
+        if self.password_executor is None:
+            return self.security.hash_password(password)
+        return self.password_executor.hash_password(password)
+
+    def _verify_password(self, password, password_hash):
+        """Vérifie un mot de passe via le pool bcrypt s'il est configuré."""
+        if self.password_executor is None:
+            return self.security.verify_password(password, password_hash)
+        return self.password_executor.verify_password(password, password_hash)
+
+    @query_budget(1)
     def get_user_by_id(self, token):
         """
         Récupère les informations d'un utilisateur à partir de son token JWT.
@@ -197,7 +266,7 @@ class AuthService:
                     - id (int): Identifiant de l'utilisateur
                     - username (str): Nom d'utilisateur
                     - email (str): Adresse email
-                    - created_at (str): Date de création (format ISO)
+                    - created_at (datetime): Date de création (ISO 8601 en JSON)
                     - total_score (int): Score total accumulé
                   OU
                 - message (str): Message d'erreur si échec
@@ -214,7 +283,7 @@ class AuthService:
         if not token:
             return {"success": False, "message": "Token manquant", "status_code": 401}
 
-        payload = self.security.decode_token(token, self.config.SECRET_KEY)
+        payload = self._decode_access_token(token)
         if payload is None:
             return {"success": False, "message": "Token invalide ou expiré", "status_code": 401}
 
@@ -228,19 +297,116 @@ class AuthService:
                 "id": utilisateur.id,
                 "username": utilisateur.username,
                 "email": utilisateur.email,
-                "created_at": utilisateur.created_at.isoformat(),
+                "created_at": utilisateur.created_at,
                 "total_score": utilisateur.total_score
             },
             "status_code": 200
         }
 
+    @query_budget(1)
+    def verify_access_token(self, token):
+        """
+        Vérifie un token d'accès et retourne l'ID utilisateur sans charger le profil.
+
+        Chemin rapide utilisé par toutes les routes protégées : l'ID est lu
+        dans les claims signés du JWT. L'existence du compte n'est vérifiée
+        en base qu'une fois par utilisateur toutes les
+        AUTH_USER_CACHE_TTL_SECONDS secondes (cache d'existence), ce qui
+        borne le délai pendant lequel un compte supprimé reste accepté.
+
+        Args:
+            token (str): Token JWT d'accès de l'utilisateur
+
+        Returns:
+            tuple: (user_id, erreur)
+                - Si succès : (user_id: int, None)
+                - Si échec : (None, dict d'erreur avec status_code 401)
+
+        Note:
+            Pour obtenir le profil complet (email, score...), utiliser
+            get_user_by_id() comme le fait la route /api/me.
+        """
+        if not token:
+            return None, {"success": False, "message": "Token manquant", "status_code": 401}
+
+        payload = self._decode_access_token(token)
+        # Un refresh token n'est pas accepté comme token d'accès
+        if payload is None or not isinstance(payload.get("id"), int) or payload.get("typ") == "refresh":
+            return None, {"success": False, "message": "Token invalide ou expiré", "status_code": 401}
+
+        user_id = payload["id"]
+        if not self._user_exists(user_id):
+            return None, {"success": False, "message": "Utilisateur introuvable", "status_code": 401}
+
+        return user_id, None
+
+    def _decode_access_token(self, token):
+        """
+        Vérifie un token d'accès, via le cache des tokens déjà vérifiés.
+
+        Args:
+            token (str): Token JWT d'accès
+
+        Returns:
+            dict | None: Payload du token (à ne pas modifier), None si invalide ou expiré
+        """
+        return self.token_cache.get_or_verify(
+            token, lambda t: self.security.decode_token(t, self.config.SECRET_KEY)
+        )
+
+    def _user_exists(self, user_id):
+        """
+        Vérifie qu'un compte existe, en s'appuyant sur le cache d'existence.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+
+        Returns:
+            bool: True si le compte existe (ou a été vu il y a moins de TTL secondes)
+        """
+        maintenant = time.monotonic()
+        expiration = self._known_users.get(user_id)
+        if expiration is not None and expiration > maintenant:
+            return True
+
+        existe = self.db.session.query(User.id).filter_by(id=user_id).first() is not None
+
+        with self._known_users_lock:
+            if existe:
+                if len(self._known_users) >= USER_CACHE_MAX_SIZE:
+                    # Purge des entrées expirées, puis remise à zéro si toujours plein
+                    self._known_users = {
+                        uid: exp for uid, exp in self._known_users.items() if exp > maintenant
+                    }
+                    if len(self._known_users) >= USER_CACHE_MAX_SIZE:
+                        self._known_users = {}
+                self._known_users[user_id] = maintenant + self._user_cache_ttl
+            else:
+                self._known_users.pop(user_id, None)
+
+        return existe
+
+    @query_budget(0)
+    def forget_user(self, user_id):
+        """
+        Retire un utilisateur du cache d'existence (ex : suppression de compte).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+        """
+        with self._known_users_lock:
+            self._known_users.pop(user_id, None)
+
+    @query_budget(4)
     def refresh_access_token(self, refresh_token):
         """
-        Génère un nouveau token d'accès à partir d'un refresh token valide.
+        Génère de nouveaux tokens à partir d'un refresh token valide (rotation).
 
         Lorsque l'access token expire (après 1h par défaut), cette méthode
         permet d'en obtenir un nouveau sans redemander à l'utilisateur de
         se reconnecter, en utilisant le refresh token (valide 7 jours).
+        Le refresh token utilisé est révoqué et remplacé : il ne sert
+        qu'une fois.
 
         Args:
             refresh_token (str): Token JWT de rafraîchissement
@@ -249,20 +415,32 @@ class AuthService:
             dict: Dictionnaire contenant :
                 - success (bool): True si le renouvellement a réussi
                 - message (str): Message de confirmation
-                - data (dict): Contient le nouveau token :
+                - data (dict): Contient les nouveaux tokens :
                     - access_token (str): Nouveau token JWT d'accès (1h)
+                    - refresh_token (str): Nouveau refresh token (7j)
                   OU
                 - message (str): Message d'erreur si échec
                 - status_code (int): Code HTTP approprié
-                    - 200 : Nouveau token généré avec succès
-                    - 401 : Refresh token invalide ou expiré
+                    - 200 : Nouveaux tokens générés avec succès
+                    - 401 : Refresh token invalide, expiré ou déjà utilisé
+
+        Note:
+            Requêtes SQL : une insertion (révocation de l'ancien token), plus
+            une lecture si le filtre des révocations signale le token, plus
+            la purge périodique des révocations expirées.
         """
 
         payload = self.security.decode_token(refresh_token, self.config.SECRET_KEY)
-        if payload is None:
+        if payload is None or payload.get("typ") != "refresh" or not payload.get("jti"):
             return {"success": False, "message": "Token invalide ou expiré", "status_code": 401}
 
-        # On génère un nouveau access token (1h)
+        if self.revocation is not None:
+            # Révocation de l'ancien token ; False si déjà utilisé (ici ou sur un autre worker)
+            if self.revocation.is_revoked(payload["jti"]) \
+                    or not self.revocation.revoke(payload["jti"], payload["id"], payload["exp"]):
+                logger.warning("Refresh token déjà utilisé ou révoqué", extra={"user_id": payload["id"]})
+                return {"success": False, "message": "Token révoqué", "status_code": 401}
+
         new_access_token = self.security.create_token(
             {"id": payload["id"]},
             self.config.SECRET_KEY,
@@ -272,6 +450,40 @@ class AuthService:
         return {
             "success": True,
             "message": "Nouveau access token généré",
-            "data": {"access_token": new_access_token},
+            "data": {
+                "access_token": new_access_token,
+                "refresh_token": self._create_refresh_token(payload["id"])
+            },
             "status_code": 200
         }
+
+    @query_budget(3)
+    def logout(self, refresh_token):
+        """
+        Révoque le refresh token de la session (déconnexion).
+
+        Args:
+            refresh_token (str | None): Refresh token du cookie (absent ou
+                invalide : rien à révoquer)
+
+        Returns:
+            dict: success, message et status_code (toujours 200)
+
+        Note:
+            Le token d'accès reste valable jusqu'à son expiration
+            (JWT_EXP_MINUTES) ; le cookie est supprimé par la route.
+        """
+        if refresh_token and self.revocation is not None:
+            payload = self.security.decode_token(refresh_token, self.config.SECRET_KEY)
+            if payload is not None and payload.get("typ") == "refresh" and payload.get("jti"):
+                self.revocation.revoke(payload["jti"], payload["id"], payload["exp"])
+
+        return {"success": True, "message": "Déconnexion réussie", "status_code": 200}
+
+    def _create_refresh_token(self, user_id):
+        """Refresh token à usage unique : type "refresh" et identifiant jti aléatoire."""
+        return self.security.create_token(
+            {"id": user_id, "typ": "refresh", "jti": uuid.uuid4().hex},
+            self.config.SECRET_KEY,
+            expiration_minutes=self.config.JWT_REFRESH_EXP_MINUTES
+        )
@@ -12,10 +12,17 @@ Author: Roche Samira
 Project: Récy&Co - Sorting is fun!
 """
 
+import logging
 from datetime import datetime
-from db.models import Badge, User, UserBadge
+from db.models import Badge, UserBadge
+from utils.badge_rules import BadgeRuleEngine, GameResult
+from utils.catalog_cache import CatalogCache
+from utils.query_budget import query_budget
+from utils.read_routing import replica_read
 from utils.services_utils import validate_and_get_user
 
+logger = logging.getLogger(__name__)
+
 class BadgeService:
     """
     Service gérant l'attribution et la récupération des badges.
@@ -34,18 +41,29 @@ class BadgeService:
     Attributes:
         db: Instance de SQLAlchemy pour les opérations de base de données
         badges (list): Liste des badges disponibles (chargée depuis la DB)
+        badges_by_id (dict): Mêmes badges indexés par identifiant
+        engine (BadgeRuleEngine): Règles de déblocage compilées depuis le catalogue
+        catalog (CatalogCache): Catalogue des badges, rechargé (avec les règles)
+            quand la version du catalogue "badges" change
     """
 
-    def __init__(self, db):
+    def __init__(self, db, catalog_poll_seconds=5):
         """
         Initialise le service de gestion des badges.
 
         Args:
             db: Instance SQLAlchemy pour les accès à la base de données
+            catalog_poll_seconds (float, optional): Délai max avant de voir une
+                modification du catalogue faite par un autre worker
         """
         self.db = db
         self.badges = []
+        self.badges_by_id = {}
+        self.engine = BadgeRuleEngine([])
+        self.catalog = CatalogCache(db, "badges", self._load_catalog, catalog_poll_seconds, read_replica=True)
 
+    @query_budget(2)
+    @replica_read
     def get_user_badges(self, user_id):
         """
         Récupère tous les badges débloqués par un utilisateur.
@@ -63,7 +81,7 @@ class BadgeService:
                     - code (str): Code unique du badge
                     - label (str): Nom du badge
                     - description (str): Description du badge
-                    - awarded_at (str): Date et heure de déblocage
+                    - awarded_at (datetime): Date et heure de déblocage (ISO 8601 en JSON)
                   OU
                 - message (str): Message d'erreur si échec
                 - status_code (int): Code HTTP approprié
@@ -92,7 +110,7 @@ class BadgeService:
                 "code": code,
                 "label": label,
                 "description": description,
-                "awarded_at": str(awarded_at)
+                "awarded_at": awarded_at
                 })
 
         return {
@@ -101,14 +119,16 @@ class BadgeService:
             "status_code": 200
         }
 
-    def check_and_award_badges(self, user_id, score):
+    @query_budget(5)
+    def check_and_award_badges(self, user_id, score, previous_total=None):
         """
         Vérifie et attribue automatiquement les nouveaux badges gagnés.
 
         Cette méthode est appelée après chaque partie pour vérifier si
-        l'utilisateur a débloqué de nouveaux badges. Elle évalue tous les
-        critères de déblocage et attribue uniquement les badges pas encore
-        possédés.
+        l'utilisateur a débloqué de nouveaux badges. Les règles sont compilées
+        une seule fois depuis le catalogue (BadgeRuleEngine) : les badges de
+        score cumulé sont trouvés par recherche dichotomique entre l'ancien et
+        le nouveau total, sans évaluer chaque badge un par un.
 
         Les critères de déblocage incluent :
         - Score total accumulé (TRIEUR_MALIN, TRIEUR_NOVICE, etc.)
@@ -118,7 +138,12 @@ class BadgeService:
 
         Args:
             user_id (int): Identifiant de l'utilisateur
-            score (Score): Objet Score de la partie qui vient d'être jouée
+            score (Score | list[Score]): Partie qui vient d'être jouée, ou liste
+                des parties d'un lot (les badges de partie sont alors gagnés si
+                au moins une partie remplit la condition, les badges de score
+                cumulé sont évalués une seule fois sur le total final)
+            previous_total (int, optional): Score total avant ces parties, pour
+                ne regarder que les seuils franchis (tous les seuils atteints sinon)
 
         Returns:
             dict: Dictionnaire contenant :
@@ -127,14 +152,14 @@ class BadgeService:
                     - code (str): Code unique du badge
                     - label (str): Nom du badge
                     - description (str): Description du badge
-                    - awarded_at (str): Date et heure de déblocage
+                    - awarded_at (datetime): Date et heure de déblocage (ISO 8601 en JSON)
                 - status_code (int): 200 (succès)
 
         Returns:
             list: Liste vide si l'utilisateur n'existe pas ou aucun nouveau badge
         """
-        if not self.badges:
-            self.load_badges()
+        # Règles à jour (rechargées seulement si le catalogue a changé)
+        self.catalog.get()
 
         # Validation et récupération utilisateur
         utilisateur, error = validate_and_get_user(self.db, user_id)
@@ -143,69 +168,66 @@ class BadgeService:
 
         assert utilisateur is not None
 
-        user_badges_response = self.get_user_badges(user_id)
-        user_badges = user_badges = user_badges_response["data"]
-        owned_badges = {badge["code"] for badge in user_badges}
-
-        # Points totaux = compteur global stocké directement
-        user_total_points = utilisateur.total_score
-        # Définition des règles des badges
-        badge_rules = {
-            # Badges enfants
-            "TRIEUR_MALIN": lambda: user_total_points >= 10,
-            "TRIEUR_FUTE": lambda: user_total_points >= 40,
-            "TRIEUR_PROPRET": lambda: user_total_points >= 60,
-            "TRIEUR_CHAMPION": lambda: user_total_points >=80,
-            "TRIEUR_RAPIDE": lambda: score.duration_ms and score.duration_ms < 2000, # 2 secondes
-            "TRIEUR_JOUEUR": lambda: score.total_items >= 20,
-            "AMI_DE_RECY": lambda: user_total_points >= 25,
-            # Badge progression "sérieux"
-            "FIRST_GAME": lambda: score.correct_items >= 1,
-            "PERFECT_RUN": lambda: score.correct_items == score.total_items,
-            "TRIEUR_NOVICE": lambda: user_total_points >= 30,
-            "TRIEUR_DEBUTANT": lambda: user_total_points >= 50,
-            "TRIEUR": lambda: user_total_points >= 70,
-            "TRIEUR_APPLIQUE": lambda: user_total_points >= 100,
-            "200_POINTS": lambda: user_total_points >= 200,
-            "TRIEUR_ASSIDU": lambda: user_total_points >= 300,
-            "400_POINTS": lambda: user_total_points >= 400,
-            "TRIEUR_CONFIRME": lambda: user_total_points >= 500,
-            # Badge collectionneur
-            "PETIT_COLLECTIONNEUR": lambda: len(owned_badges) >= 5
+        # Badges déjà possédés (identifiants uniquement, sans jointure)
+        owned_badges = {
+            badge_id for (badge_id,) in
+            self.db.session.query(UserBadge.badge_id).filter(UserBadge.user_id == user_id)
         }
 
-        # Comparaison avec self.badges pour voir lesquels attribuer
+        # Une partie seule ou un lot de parties (envoi groupé)
+        scores = score if isinstance(score, (list, tuple)) else [score]
+        games = [
+            GameResult(s.correct_items or 0, s.total_items or 0, s.duration_ms or 0)
+            for s in scores
+        ]
+
+        gagnes = self.engine.evaluate(
+            owned_badges,
+            utilisateur.total_score,
+            games,
+            previous_total=previous_total
+        )
+
         new_badges = []
         maintenant = datetime.now()
 
-        for badge in self.badges:
-            if badge.code in badge_rules and badge.code not in owned_badges:
-                if badge_rules[badge.code]():
-
-                    # création dans db
-                    new_entry = UserBadge(user_id=user_id, badge_id=badge.id, awarded_at=maintenant)
-                    self.db.session.add(new_entry)
-
-                    #Ajout de la liste des nouveaux badges
-                    new_badges.append({
-                        "code": badge.code,
-                        "label": badge.label,
-                        "description": badge.description,
-                        "awarded_at": str(maintenant)
-                    })
-        self.db.session.commit()
+        for badge_id in gagnes:
+            badge = self.badges_by_id.get(badge_id)
+            if badge is None:
+                # Catalogue rechargé entre-temps par un autre thread
+                continue
+
+            # création dans db
+            new_entry = UserBadge(user_id=user_id, badge_id=badge.id, awarded_at=maintenant)
+            self.db.session.add(new_entry)
+
+            #Ajout de la liste des nouveaux badges
+            new_badges.append({
+                "code": badge.code,
+                "label": badge.label,
+                "description": badge.description,
+                "awarded_at": maintenant
+            })
+
+        if new_badges:
+            self.db.session.commit()
+            logger.info("Badges attribués", extra={"user_id": user_id, "badges": [b["code"] for b in new_badges]})
+
         return {
             "success": True,
             "data": new_badges,
             "status_code": 200
         }
 
+    @query_budget(2)
+    @replica_read
     def get_all_badges(self):
         """
         Récupère la liste de tous les badges disponibles dans l'application.
 
-        Cette méthode charge tous les badges depuis la base de données
-        si ce n'est pas déjà fait, puis retourne leur liste.
+        La liste est servie depuis le cache du catalogue : les badges ne
+        sont rechargés depuis la base de données que lorsque la version du
+        catalogue "badges" change.
 
         Returns:
             list: Liste de dictionnaires, chacun contenant :
@@ -217,8 +239,11 @@ class BadgeService:
             Cette méthode ne retourne pas les dates de déblocage car elle
             liste les badges disponibles, pas les badges d'un utilisateur.
         """
-        if not self.badges: # si la liste est vide
-            self.load_badges()
+        return self.catalog.get().data
+
+    def _load_catalog(self):
+        """Recharge les badges et les règles (appelée par le cache du catalogue)."""
+        self.load_badges()
 
         badge_list = []
         for badge in self.badges:
@@ -234,16 +259,27 @@ class BadgeService:
             "status_code": 200
         }
 
+    @query_budget(1)
     def load_badges(self):
         """
         Charge tous les badges depuis la base de données.
 
-        Cette méthode est appelée automatiquement par get_all_badges()
-        la première fois, pour éviter de recharger les badges à chaque
-        appel. Les badges sont stockés dans self.badges pour réutilisation.
+        Cette méthode est appelée par le cache du catalogue (self.catalog)
+        au premier accès puis à chaque changement de version du catalogue,
+        pour éviter de recharger les badges à chaque appel. Les badges sont
+        stockés dans self.badges pour réutilisation.
+
+        Les règles de déblocage sont compilées au même moment
+        (BadgeRuleEngine).
 
         Note:
             Cette méthode est utilisée en interne par la classe.
             Les utilisateurs externes devraient utiliser get_all_badges().
         """
         self.badges = self.db.session.query(Badge).all()
+        # Détachés de la session : sinon le prochain commit les expire et
+        # leur lecture dans une autre requête lève DetachedInstanceError
+        for badge in self.badges:
+            self.db.session.expunge(badge)
+        self.badges_by_id = {badge.id: badge for badge in self.badges}
+        self.engine = BadgeRuleEngine(self.badges)
@@ -0,0 +1,390 @@
+"""
+Worker d'attribution des badges en arrière-plan pour Récy&Co.
+
+Après chaque partie, la vérification des badges (lecture des badges
+possédés, évaluation des règles, insertion, commit) ne bloque plus la
+réponse de /api/scores : ScoreService dépose un événement de score, et un
+thread dédié les traite par lots. Les événements d'un même utilisateur
+présents dans un lot sont fusionnés en une seule évaluation.
+
+Un événement est déposé en deux temps par ScoreService :
+- enqueue_in_transaction(), avant le commit de la partie : en mode db,
+  l'événement est inséré dans la même transaction que le score (pas de
+  second commit, pas d'événement perdu ni de score sans événement) ;
+- submit(), après le commit : file en mémoire, réveil du thread, ou
+  évaluation immédiate selon le mode.
+
+Modes (BADGE_WORKER_MODE) :
+    inline: évaluation immédiate dans la requête (tests, scripts)
+    thread: file en mémoire bornée vidée par un thread (par défaut) ; file
+        pleine : l'événement est évalué dans la requête (rien n'est perdu)
+    db: file durable dans la table badge_events, vidée par le même thread ;
+        les événements non traités survivent à un redémarrage et sont
+        repris dès la première requête du processus suivant
+
+Fiabilité : seul le mode db garantit qu'un événement est traité. En modes
+inline et thread, une évaluation qui échoue (autre chose qu'un conflit
+d'attribution) est journalisée puis abandonnée : les badges de
+l'utilisateur ne sont revérifiés qu'à sa partie suivante. En mode db,
+les événements d'un utilisateur en échec restent réservés et sont repris
+après CLAIM_TIMEOUT, jusqu'à MAX_ATTEMPTS tentatives ; ils restent ensuite
+dans badge_events (attempts = MAX_ATTEMPTS) pour examen, sans plus être
+distribués.
+
+Classes:
+    BadgeWorker: File d'événements de score et thread de traitement
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from db.models import BadgeEvent
+from utils.badge_rules import GameResult
+
+logger = logging.getLogger(__name__)
+
+MODES = ("inline", "thread", "db")
+
+# Un événement réservé depuis plus longtemps est considéré comme abandonné
+# (worker arrêté en cours de traitement) et peut être repris.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Réservations d'un événement au-delà desquelles il n'est plus distribué
+MAX_ATTEMPTS = 5
+
+# Pause du thread après une erreur inattendue (évite de boucler sur une DB indisponible)
+ERROR_BACKOFF_SECONDS = 5
+
+
+class BadgeWorker:
+    """
+    File d'événements de score traités en arrière-plan par un thread.
+
+    Un événement = (user_id, parties jouées, score total avant ces parties).
+    Le thread est démarré au premier événement reçu, pas à la création de
+    l'application, pour ne rien coûter aux commandes CLI et scripts. En mode
+    db, l'application appelle aussi start() avant chaque requête, pour
+    reprendre les événements laissés par le processus précédent. Un
+    processus issu d'un fork (gunicorn --preload) démarre son propre thread :
+    celui du processus parent n'existe pas dans l'enfant.
+
+    Attributes:
+        app: Application Flask (contexte nécessaire pour accéder à la DB)
+        db: Instance SQLAlchemy
+        badge_service (BadgeService): Service qui évalue et attribue les badges
+        mode (str): inline, thread ou db
+        batch_size (int): Nombre maximal d'événements traités par lot
+        flush_seconds (float): Attente maximale pour compléter un lot
+        max_queue (int): Taille maximale de la file en mémoire (mode thread)
+    """
+
+    def __init__(self, app, db, badge_service, mode="thread", batch_size=100, flush_seconds=0.2,
+                 max_queue=10000):
+        """
+        Initialise le worker (sans démarrer le thread).
+
+        Args:
+            app: Application Flask
+            db: Instance SQLAlchemy
+            badge_service (BadgeService): Service d'attribution des badges
+            mode (str, optional): inline, thread ou db (par défaut thread)
+            batch_size (int, optional): Taille maximale d'un lot (par défaut 100)
+            flush_seconds (float, optional): Attente max pour remplir un lot (par défaut 0.2)
+            max_queue (int, optional): Événements en attente au-delà desquels
+                submit() évalue dans la requête (par défaut 10000)
+        """
+        if mode not in MODES:
+            raise ValueError(f"BADGE_WORKER_MODE invalide : {mode} (attendu : {', '.join(MODES)})")
+
+        self.app = app
+        self.db = db
+        self.badge_service = badge_service
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._token = uuid.uuid4().hex
+
+        # Après un fork, l'enfant repart sans thread ni file (et avec son propre jeton de réservation)
+        worker = weakref.ref(self)
+        os.register_at_fork(after_in_child=lambda: worker() and worker()._reset_after_fork())
+
+    # ---------- Côté requête ----------
+
+    def enqueue_in_transaction(self, user_id, games, previous_total=None):
+        """
+        Enregistre un événement dans la transaction en cours (avant son commit).
+
+        En mode db, l'événement est ajouté à la session : il est validé (ou
+        annulé) avec la partie. Sans effet dans les autres modes.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            games (list[GameResult]): Parties en cours d'enregistrement
+            previous_total (int, optional): Score total avant ces parties
+        """
+        if self.mode != "db":
+            return
+        self.db.session.add(BadgeEvent(
+            user_id=user_id,
+            payload=json.dumps({"games": [tuple(game) for game in games], "previous_total": previous_total})
+        ))
+
+    def submit(self, user_id, games, previous_total=None):
+        """
+        Fait traiter un événement de score (après le commit de la partie).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            games (list[GameResult]): Parties qui viennent d'être enregistrées
+            previous_total (int, optional): Score total avant ces parties
+        """
+        if self.mode == "db":
+            # Événement déjà validé par enqueue_in_transaction()
+            self._wake.set()
+            self.start()
+            return
+
+        events = [(user_id, [GameResult(*game) for game in games], previous_total)]
+        if self.mode == "thread":
+            try:
+                self._queue.put_nowait(events[0])
+                self.start()
+                return
+            except queue.Full:
+                logger.warning("File des badges pleine (%s événements) : évaluation dans la requête", self.max_queue)
+        self.process(events)
+
+    def flush(self, timeout=5.0):
+        """
+        Attend que tous les événements déposés aient été traités.
+
+        Args:
+            timeout (float, optional): Attente maximale en secondes
+
+        Returns:
+            bool: True si la file est vide à la fin de l'attente
+        """
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            if self._is_idle():
+                return True
+            self._wake.set()
+            time.sleep(0.01)
+        return self._is_idle()
+
+    def stop(self, timeout=5.0):
+        """Traite les événements restants puis arrête le thread."""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- Traitement ----------
+
+    def process(self, events):
+        """
+        Évalue les badges pour un lot d'événements, fusionnés par utilisateur.
+
+        Toutes les parties d'un même utilisateur sont évaluées ensemble, sur
+        son score total final, avec le plus petit score total de départ du lot.
+
+        Args:
+            events (list): Tuples (user_id, games, previous_total)
+
+        Returns:
+            set[int]: Utilisateurs dont l'évaluation a échoué
+        """
+        par_utilisateur = {}
+        for user_id, games, previous_total in events:
+            if user_id not in par_utilisateur:
+                par_utilisateur[user_id] = (list(games), previous_total)
+                continue
+            parties, depart = par_utilisateur[user_id]
+            parties.extend(games)
+            if depart is None or previous_total is None:
+                depart = None
+            else:
+                depart = min(depart, previous_total)
+            par_utilisateur[user_id] = (parties, depart)
+
+        return {
+            user_id for user_id, (games, previous_total) in par_utilisateur.items()
+            if not self._award(user_id, games, previous_total)
+        }
+
+    def _award(self, user_id, games, previous_total):
+        """
+        Attribue les badges d'un utilisateur (une nouvelle tentative si conflit).
+
+        Returns:
+            bool: True si l'évaluation a abouti
+        """
+        for tentative in range(2):
+            try:
+                self.badge_service.check_and_award_badges(user_id, games, previous_total)
+                return True
+            except IntegrityError:
+                # Badge attribué entre-temps par un autre worker : on relit et on recommence
+                self.db.session.rollback()
+            except Exception:
+                self.db.session.rollback()
+                logger.exception("Échec de l'attribution des badges pour l'utilisateur %s", user_id)
+                return False
+        logger.warning("Conflit persistant lors de l'attribution des badges (utilisateur %s)", user_id)
+        return False
+
+    def _reset_after_fork(self):
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._token = uuid.uuid4().hex
+
+    def start(self):
+        """Démarre le thread de traitement s'il ne tourne pas déjà."""
+        if self.mode == "inline" or self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="badge-worker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.mode == "db":
+                    self._run_db_batch()
+                else:
+                    self._run_memory_batch()
+            except Exception:
+                # Ex : table badge_events pas encore créée (migration en cours)
+                logger.exception("Erreur inattendue dans le worker de badges")
+                self._stop.wait(ERROR_BACKOFF_SECONDS)
+
+    def _run_memory_batch(self):
+        try:
+            premier = self._queue.get(timeout=self.flush_seconds)
+        except queue.Empty:
+            return
+
+        events = [premier]
+        limite = time.monotonic() + self.flush_seconds
+        while len(events) < self.batch_size:
+            reste = limite - time.monotonic()
+            if reste <= 0:
+                break
+            try:
+                events.append(self._queue.get(timeout=reste))
+            except queue.Empty:
+                break
+
+        try:
+            with self.app.app_context():
+                self.process(events)
+        finally:
+            for _ in events:
+                self._queue.task_done()
+
+    def _run_db_batch(self):
+        with self.app.app_context():
+            lignes = self._claim_db_events()
+            if lignes:
+                events = []
+                for ligne in lignes:
+                    payload = json.loads(ligne.payload)
+                    games = [GameResult(*game) for game in payload["games"]]
+                    events.append((ligne.user_id, games, payload.get("previous_total")))
+                echecs = self.process(events)
+
+                # Les événements en échec restent réservés : repris après CLAIM_TIMEOUT
+                traites = [ligne.id for ligne in lignes if ligne.user_id not in echecs]
+                abandonnes = [
+                    ligne.id for ligne in lignes if ligne.user_id in echecs and ligne.attempts >= MAX_ATTEMPTS
+                ]
+                if abandonnes:
+                    logger.error(
+                        "Événements de badges abandonnés après %s tentatives : %s", MAX_ATTEMPTS, abandonnes
+                    )
+                if traites:
+                    self.db.session.query(BadgeEvent).filter(
+                        BadgeEvent.id.in_(traites)
+                    ).delete(synchronize_session=False)
+                self.db.session.commit()
+                return
+
+        self._wake.wait(self.flush_seconds)
+        self._wake.clear()
+
+    def _claim_db_events(self):
+        """
+        Réserve un lot d'événements de la table badge_events pour ce worker.
+
+        La réservation (UPDATE ... WHERE claimed_by IS NULL) empêche deux
+        processus de traiter le même événement ; elle compte une tentative.
+
+        Returns:
+            list[BadgeEvent]: Événements réservés, du plus ancien au plus récent
+        """
+        maintenant = datetime.now()
+        disponibles = and_(
+            or_(BadgeEvent.claimed_at.is_(None), BadgeEvent.claimed_at < maintenant - CLAIM_TIMEOUT),
+            BadgeEvent.attempts < MAX_ATTEMPTS
+        )
+
+        ids = [
+            event_id for (event_id,) in
+            self.db.session.query(BadgeEvent.id)
+            .filter(disponibles)
+            .order_by(BadgeEvent.id)
+            .limit(self.batch_size)
+        ]
+        if not ids:
+            self.db.session.rollback()
+            return []
+
+        self.db.session.execute(
+            update(BadgeEvent)
+            .where(BadgeEvent.id.in_(ids), disponibles)
+            .values(claimed_at=maintenant, claimed_by=self._token, attempts=BadgeEvent.attempts + 1)
+        )
+        self.db.session.commit()
+
+        return (
+            self.db.session.query(BadgeEvent)
+            .filter(BadgeEvent.claimed_by == self._token, BadgeEvent.id.in_(ids))
+            .order_by(BadgeEvent.id)
+            .all()
+        )
+
+    def _is_idle(self):
+        if self.mode == "db":
+            if self._thread is None:
+                return True
+            # Lecture d'une seule clé primaire (les événements abandonnés ne comptent pas)
+            with self.app.app_context():
+                return self.db.session.execute(
+                    select(BadgeEvent.id).where(BadgeEvent.attempts < MAX_ATTEMPTS).order_by(BadgeEvent.id).limit(1)
+                ).first() is None
+        return self._queue.unfinished_tasks == 0
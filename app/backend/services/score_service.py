@@ -9,9 +9,45 @@ Classes:
     ScoreService: Service principal pour la gestion des scores et statistiques
 """
 
-from sqlalchemy import desc
-from db.models import Score, User
-from utils.services_utils import validate_and_get_user, validate_limit
+import base64
+import binascii
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from db.models import Score, ScoreRollup, User, UserStats
+from utils.badge_rules import GameResult
+from utils.leaderboard_index import LeaderboardIndex
+from utils.query_budget import query_budget
+from utils.read_routing import reads_from_replica, replica_read
+from utils.services_utils import (
+    adjust_total_score,
+    get_user_or_404,
+    validate_and_get_user,
+    validate_limit,
+    validate_user_id,
+)
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de voisins renvoyés de chaque côté par get_leaderboard_around()
+MAX_LEADERBOARD_RADIUS = 50
+
+# Nombre maximal de parties acceptées par add_scores_bulk()
+MAX_SCORES_BATCH = 50
+
+# Taille des pages de l'historique des parties (get_user_score_history)
+DEFAULT_HISTORY_LIMIT = 20
+MAX_HISTORY_LIMIT = 100
+
+# Fenêtres du classement : "all" = score total, sinon période de score_rollups
+LEADERBOARD_WINDOWS = ("all", "day", "week", "month")
+
+# Nombre de joueurs gardés en cache pour le classement d'une période
+WINDOW_LEADERBOARD_SIZE = 100
 
 
 class ScoreService:
@@ -22,7 +58,8 @@ class ScoreService:
     - Ajout d'un score après une partie
     - Mise à jour du score total de l'utilisateur
     - Récupération de l'historique des scores d'un utilisateur
-    - Génération du classement global (leaderboard)
+    - Génération du classement global (leaderboard) et des classements du
+      jour, de la semaine et du mois (table score_rollups)
     - Calcul des statistiques de jeu d'un utilisateur
 
     Le système de points est simple : 1 item correctement trié = 1 point.
@@ -31,17 +68,71 @@ class ScoreService:
 
     Attributes:
         db: Instance de SQLAlchemy pour les opérations de base de données
+        leaderboard (LeaderboardIndex): Classement maintenu en mémoire
+        badge_worker (BadgeWorker | None): File d'attribution des badges
+            alimentée après chaque partie
+        window_cache_seconds (float): Durée de vie du top d'une période en cache
     """
 
-    def __init__(self, db):
+    def __init__(self, db, leaderboard=None, badge_worker=None, window_cache_seconds=30):
         """
         Initialise le service de gestion des scores.
 
         Args:
             db: Instance SQLAlchemy pour les accès à la base de données
+            leaderboard (LeaderboardIndex, optional): Index de classement partagé
+                avec les autres services (créé si absent)
+            badge_worker (BadgeWorker, optional): Worker qui évalue les badges
+                des parties enregistrées (aucune évaluation si absent)
+            window_cache_seconds (float, optional): Délai maximal avant qu'une
+                partie apparaisse dans le classement d'une période (par défaut 30)
         """
         self.db = db
+        self.leaderboard = leaderboard if leaderboard is not None else LeaderboardIndex()
+        self.badge_worker = badge_worker
+        self.window_cache_seconds = window_cache_seconds
+        self._reload_lock = threading.Lock()
+        # (période, début de période) -> (date d'expiration, meilleurs joueurs)
+        self._window_cache = {}
+        self._window_lock = threading.Lock()
+
+    def _get_leaderboard_index(self):
+        """
+        Retourne l'index de classement, chargé depuis la table users si besoin.
 
+        L'index est chargé au premier accès puis rechargé lorsqu'il est périmé
+        (voir LEADERBOARD_RESYNC_SECONDS), ce qui rattrape les écritures faites
+        par les autres workers.
+
+        Un seul thread à la fois relit la table users : pendant un
+        rechargement, les autres requêtes continuent avec l'index périmé (ou
+        attendent le premier chargement s'il n'y en a jamais eu).
+
+        Returns:
+            LeaderboardIndex: Index à jour
+        """
+        if not self.leaderboard.is_stale():
+            return self.leaderboard
+
+        premier_chargement = not self.leaderboard.is_loaded
+        if not self._reload_lock.acquire(blocking=premier_chargement):
+            return self.leaderboard
+        try:
+            if self.leaderboard.is_stale():
+                # Toujours la base principale : l'index est partagé par tout le
+                # worker, un réplica en retard y effacerait des scores déjà comptés
+                with reads_from_replica(False):
+                    rows = (
+                        self.db.session.query(User)
+                        .with_entities(User.id, User.username, User.total_score)
+                        .all()
+                    )
+                self.leaderboard.load(rows)
+        finally:
+            self._reload_lock.release()
+        return self.leaderboard
+
+    @query_budget(12)
     def add_score(self, user_id, points, correct_items=None, total_items=None, duration_ms=None):
         """
         Ajoute un nouveau score après une partie et met à jour le score total.
@@ -49,9 +140,15 @@ class ScoreService:
         Cette méthode est appelée à la fin de chaque partie pour enregistrer
         les performances du joueur. Elle effectue plusieurs actions :
         1. Valide les données d'entrée
-        2. Crée un nouvel enregistrement Score dans la base de données
-        3. Met à jour le score total de l'utilisateur (total_score += points)
-        4. Commit les changements en base de données
+        2. Crédite le score total par un UPDATE atomique côté serveur
+           (total_score = total_score + points), sans charger l'utilisateur
+        3. Crée un nouvel enregistrement Score dans la base de données
+        4. Met à jour les statistiques agrégées (user_stats) et les points du
+           jour, de la semaine et du mois (score_rollups), elles aussi par
+           incréments côté serveur
+        5. Commit les changements en base de données (une seule transaction,
+           qui contient aussi l'événement de badges en mode db)
+        6. Transmet la partie au worker de badges (BadgeWorker)
 
         Args:
             user_id (int): Identifiant de l'utilisateur
@@ -72,50 +169,371 @@ class ScoreService:
                 - status_code (int): Code HTTP approprié
                     - 200 : Score ajouté avec succès
                     - 400 : Données invalides (user_id pas entier ou points négatifs)
-                    - 404 : Utilisateur introuvable
+                            ou utilisateur introuvable
 
         Note:
             Le champ `points` devrait normalement être égal à `correct_items`
             dans votre logique métier (1 point = 1 item correct).
+            Plusieurs envois simultanés pour le même utilisateur (plusieurs
+            onglets, rejeu d'un lot) s'additionnent sans se perdre.
         """
-
         # Vérifications
-        utilisateur, error = validate_and_get_user(self.db, user_id)
+        error = validate_user_id(user_id)
         if error:
             return error
 
-        assert utilisateur is not None
-
         if points < 0:
             return {"success": False, "message": "Les données de la partie sont invalides", "status_code": 400}
 
+        # MAJ du total (vérifie aussi l'existence de l'utilisateur)
+        total_score = adjust_total_score(self.db, user_id, points)
+        if total_score is None:
+            self.db.session.rollback()
+            return {"success": False, "message": "Utilisateur introuvable", "status_code": 400}
+
+        played_at = _now()
         new_score = Score(
             user_id=user_id,
             points=points,
             correct_items=correct_items or 0,
             total_items=total_items or 0,
-            duration_ms=duration_ms or 0
+            duration_ms=duration_ms or 0,
+            played_at=played_at
         )
 
         # Ajout à la session
         self.db.session.add(new_score)
 
-        # MAJ du total
-        utilisateur.total_score += points
+        # MAJ des statistiques agrégées (même transaction que le score)
+        self._update_user_stats(user_id, [new_score], played_at)
+        self._update_rollups(user_id, played_at, points, 1)
+
+        # Badges : seuls les seuils franchis par cette partie sont examinés
+        games = [GameResult(new_score.correct_items, new_score.total_items, new_score.duration_ms)]
+        self._enqueue_badges(user_id, games, total_score - points)
+
+        # Commit + retourner la réponse (id lu avant le commit, qui expire l'objet)
+        self.db.session.flush()
+        score_id = new_score.id
+        self.db.session.commit()
+
+        # MAJ du classement en mémoire
+        self._update_leaderboard(user_id, total_score)
+        self._submit_badges(user_id, games, total_score - points)
+        logger.debug("Partie enregistrée", extra={"user_id": user_id, "points": points, "total_score": total_score})
+
+        return {
+            "success": True,
+            "data": {
+                "user_id": user_id,
+                "total_score": total_score,
+                "score_id": score_id
+            },
+            "status_code": 200
+        }
+
+    @query_budget(12)
+    def add_scores_bulk(self, user_id, games):
+        """
+        Ajoute en une seule transaction plusieurs parties jouées hors ligne.
+
+        Utilisé par les tablettes de classe qui envoient d'un coup les parties
+        terminées sans connexion. Contrairement à des appels répétés à
+        add_score(), cette méthode :
+        1. Valide chaque partie séparément (les parties invalides sont ignorées)
+        2. Insère toutes les parties valides en un seul INSERT groupé
+        3. Applique la somme des points en un seul UPDATE de total_score
+        4. Met à jour les statistiques agrégées et les points de période une
+           seule fois
+        5. Commit une seule fois
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            games (list[dict]): Parties à enregistrer, chacune contenant :
+                - points (int): Points gagnés (obligatoire, >= 0)
+                - correct_items (int, optional): Items correctement triés
+                - total_items (int, optional): Items présentés
+                - duration_ms (int, optional): Durée de la partie en millisecondes
+
+        Returns:
+            dict: Dictionnaire contenant :
+                - success (bool): True si au moins une partie a été enregistrée
+                - data (dict): Résultat du lot :
+                    - user_id (int): Identifiant de l'utilisateur
+                    - total_score (int): Score total après le lot
+                    - accepted (int): Nombre de parties enregistrées
+                    - rejected (int): Nombre de parties refusées
+                    - results (list): Résultat par partie (index, success, message)
+                  OU
+                - message (str): Message d'erreur si échec
+                - status_code (int): Code HTTP approprié
+                    - 200 : Lot traité (au moins une partie enregistrée)
+                    - 400 : Lot invalide, aucune partie valide ou utilisateur introuvable
+        """
+        error = validate_user_id(user_id)
+        if error:
+            return error
+
+        if not isinstance(games, list) or not games:
+            return {"success": False, "message": "Le lot de parties doit être une liste non vide", "status_code": 400}
+
+        if len(games) > MAX_SCORES_BATCH:
+            return {
+                "success": False,
+                "message": f"Un lot ne peut pas dépasser {MAX_SCORES_BATCH} parties",
+                "status_code": 400
+            }
 
-        # Commit + retourner la réponse
+        # 1. Validation partie par partie
+        results = []
+        new_scores = []
+        for index, game in enumerate(games):
+            score, message = self._build_score(user_id, game)
+            if message:
+                results.append({"index": index, "success": False, "message": message})
+            else:
+                results.append({"index": index, "success": True})
+                new_scores.append(score)
+
+        if not new_scores:
+            return {
+                "success": False,
+                "message": "Aucune partie valide dans le lot",
+                "data": {"results": results},
+                "status_code": 400
+            }
+
+        # 2. MAJ du total en un seul UPDATE (vérifie aussi l'existence de l'utilisateur)
+        points_total = sum(score.points for score in new_scores)
+        total_score = adjust_total_score(self.db, user_id, points_total)
+        if total_score is None:
+            self.db.session.rollback()
+            return {"success": False, "message": "Utilisateur introuvable", "status_code": 400}
+
+        # 3. Insertion groupée des parties
+        played_at = _now()
+        self.db.session.execute(insert(Score), [
+            {
+                "user_id": user_id,
+                "points": score.points,
+                "correct_items": score.correct_items,
+                "total_items": score.total_items,
+                "duration_ms": score.duration_ms,
+                "played_at": played_at
+            }
+            for score in new_scores
+        ])
+
+        # 4. Statistiques agrégées et points de période
+        self._update_user_stats(user_id, new_scores, played_at)
+        self._update_rollups(user_id, played_at, points_total, len(new_scores))
+
+        # 5. Badges évalués une seule fois, sur l'état final après le lot
+        parties = [GameResult(s.correct_items, s.total_items, s.duration_ms or 0) for s in new_scores]
+        self._enqueue_badges(user_id, parties, total_score - points_total)
+
+        # 6. Un seul commit pour tout le lot
         self.db.session.commit()
 
+        self._update_leaderboard(user_id, total_score)
+        self._submit_badges(user_id, parties, total_score - points_total)
+        logger.debug("Lot de parties enregistré", extra={
+            "user_id": user_id, "accepted": len(new_scores), "rejected": len(games) - len(new_scores)
+        })
+
         return {
             "success": True,
             "data": {
                 "user_id": user_id,
-                "total_score": utilisateur.total_score,
-                "score_id": new_score.id
+                "total_score": total_score,
+                "accepted": len(new_scores),
+                "rejected": len(games) - len(new_scores),
+                "results": results
             },
             "status_code": 200
         }
 
+    def _build_score(self, user_id, game):
+        """
+        Valide une partie reçue dans un lot et construit le Score correspondant.
+
+        Le Score n'est pas ajouté à la session : add_scores_bulk() insère
+        toutes les parties valides en une seule requête.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            game (dict): Données brutes de la partie
+
+        Returns:
+            tuple: (score, message)
+                - Si succès : (Score non persisté, None)
+                - Si échec : (None, message d'erreur)
+        """
+        if not isinstance(game, dict):
+            return None, "Partie invalide : objet JSON attendu"
+
+        valeurs = {}
+        for champ in ("points", "correct_items", "total_items", "duration_ms"):
+            valeur = game.get(champ, 0 if champ != "points" else None)
+            # bool est un sous-type de int : on l'exclut explicitement
+            if isinstance(valeur, bool) or not isinstance(valeur, int) or valeur < 0:
+                return None, f"Champ {champ} invalide, doit être un entier positif"
+            valeurs[champ] = valeur
+
+        if valeurs["correct_items"] > valeurs["total_items"]:
+            return None, "correct_items ne peut pas dépasser total_items"
+
+        return Score(user_id=user_id, **valeurs), None
+
+    def _update_user_stats(self, user_id, scores, played_at):
+        """
+        Répercute de nouvelles parties sur la ligne user_stats de l'utilisateur.
+
+        Les compteurs sont incrémentés côté serveur (UPDATE ... SET
+        games_played = games_played + n, best_points = max(...)...) : deux
+        parties enregistrées en même temps ne s'écrasent pas. La ligne est
+        créée à la première partie. Le commit est laissé à l'appelant pour
+        que scores et statistiques soient écrits ensemble.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            scores (list[Score]): Parties qui viennent d'être ajoutées
+            played_at (datetime): Date de ces parties (Score.played_at)
+        """
+        best_points = max(score.points for score in scores)
+        best_efficiency = max(score.efficiency() for score in scores)
+        increments = {
+            "games_played": len(scores),
+            "total_points": sum(score.points for score in scores),
+            "total_correct_items": sum(score.correct_items for score in scores),
+            "total_items": sum(score.total_items for score in scores),
+            "total_duration_ms": sum(score.duration_ms for score in scores),
+        }
+
+        valeurs = {champ: getattr(UserStats, champ) + valeur for champ, valeur in increments.items()}
+        # max() portable (GREATEST n'existe pas sous SQLite)
+        valeurs["best_points"] = case(
+            (UserStats.best_points < best_points, best_points), else_=UserStats.best_points
+        )
+        valeurs["best_efficiency"] = case(
+            (UserStats.best_efficiency < best_efficiency, best_efficiency), else_=UserStats.best_efficiency
+        )
+        valeurs["last_played_at"] = played_at
+
+        requete = (
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(**valeurs)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.session.execute(requete).rowcount:
+            return
+
+        # Première partie : création de la ligne
+        try:
+            with self.db.session.begin_nested():
+                self.db.session.execute(insert(UserStats).values(
+                    user_id=user_id,
+                    best_points=best_points,
+                    best_efficiency=best_efficiency,
+                    last_played_at=played_at,
+                    **increments
+                ))
+        except IntegrityError:
+            # Ligne créée entre-temps par une partie concurrente
+            self.db.session.execute(requete)
+
+    def _update_rollups(self, user_id, played_at, points, games_played):
+        """
+        Ajoute des parties aux points du jour, de la semaine et du mois.
+
+        Un seul UPDATE incrémente les trois lignes de score_rollups dans le
+        cas courant. Les lignes manquantes (première partie de la période)
+        sont créées ; une ligne créée entre-temps par une partie concurrente
+        est incrémentée à la place. Le commit est laissé à l'appelant.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            played_at (datetime): Date des parties
+            points (int): Points gagnés
+            games_played (int): Nombre de parties
+        """
+        buckets = _period_buckets(played_at.date())
+
+        def incrementer(periodes):
+            return self.db.session.execute(
+                update(ScoreRollup)
+                .where(
+                    ScoreRollup.user_id == user_id,
+                    or_(*(and_(ScoreRollup.period == periode, ScoreRollup.bucket == buckets[periode])
+                          for periode in periodes))
+                )
+                .values(points=ScoreRollup.points + points, games_played=ScoreRollup.games_played + games_played)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+        modifiees = incrementer(buckets)
+        if modifiees == len(buckets):
+            return
+
+        manquantes = list(buckets)
+        if modifiees:
+            # Nouveau jour ou nouvelle semaine : seules certaines lignes existent
+            existantes = set(self.db.session.execute(
+                select(ScoreRollup.period).where(
+                    ScoreRollup.user_id == user_id,
+                    or_(*(and_(ScoreRollup.period == periode, ScoreRollup.bucket == bucket)
+                          for periode, bucket in buckets.items()))
+                )
+            ).scalars())
+            manquantes = [periode for periode in buckets if periode not in existantes]
+
+        lignes = [
+            {"period": periode, "bucket": buckets[periode], "user_id": user_id,
+             "points": points, "games_played": games_played}
+            for periode in manquantes
+        ]
+        try:
+            with self.db.session.begin_nested():
+                self.db.session.execute(insert(ScoreRollup), lignes)
+        except IntegrityError:
+            # Ligne(s) créée(s) entre-temps par une partie concurrente
+            for ligne in lignes:
+                try:
+                    with self.db.session.begin_nested():
+                        self.db.session.execute(insert(ScoreRollup), [ligne])
+                except IntegrityError:
+                    incrementer([ligne["period"]])
+
+    def _enqueue_badges(self, user_id, games, previous_total):
+        """Dépose l'événement de badges dans la transaction de la partie (mode db)."""
+        if self.badge_worker is not None:
+            self.badge_worker.enqueue_in_transaction(user_id, games, previous_total)
+
+    def _submit_badges(self, user_id, games, previous_total):
+        """Fait traiter l'événement de badges une fois la partie validée."""
+        if self.badge_worker is not None:
+            self.badge_worker.submit(user_id, games, previous_total)
+
+    def _update_leaderboard(self, user_id, total_score):
+        """
+        Répercute un nouveau score total dans le classement en mémoire.
+
+        Le pseudo n'est lu en base que si l'utilisateur n'est pas encore
+        dans l'index (nouvel inscrit).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            total_score (int): Nouveau score total
+        """
+        username = None
+        if self.leaderboard.is_loaded and user_id not in self.leaderboard:
+            username = self.db.session.execute(
+                select(User.username).where(User.id == user_id)
+            ).scalar()
+        self.leaderboard.upsert(user_id, total_score, username)
+
+    @query_budget(1)
     def get_user_scores(self, user_id):
         """
         Récupère les informations de score d'un utilisateur.
@@ -141,8 +559,7 @@ class ScoreService:
                     - 404 : Utilisateur introuvable
 
         Note:
-            Cette méthode pourrait être améliorée pour retourner la liste
-            complète des parties jouées (historique des scores).
+            L'historique des parties est paginé par get_user_score_history().
         """
         utilisateur, error = validate_and_get_user(self.db, user_id)
         if error:
@@ -159,7 +576,93 @@ class ScoreService:
             "status_code": 200
         }
 
-    def get_leaderboard(self, limit=15):
+    @query_budget(2)
+    def get_user_score_history(self, user_id, cursor=None, limit=DEFAULT_HISTORY_LIMIT):
+        """
+        Récupère une page de l'historique des parties d'un utilisateur.
+
+        Pagination par curseur (keyset) sur (played_at, id), du plus récent au
+        plus ancien : chaque page reprend juste après la dernière partie de la
+        page précédente grâce à l'index (user_id, played_at, id). Le coût d'une
+        page ne dépend pas de sa profondeur, contrairement à un OFFSET qui lit
+        puis jette toutes les lignes qui précèdent.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            cursor (str, optional): Curseur next_cursor de la page précédente
+                (None pour la première page)
+            limit (int, optional): Nombre de parties par page (par défaut
+                DEFAULT_HISTORY_LIMIT, maximum MAX_HISTORY_LIMIT)
+
+        Returns:
+            dict: Dictionnaire contenant :
+                - success (bool): True si l'opération a réussi
+                - data (dict): Page de l'historique :
+                    - scores (list): Parties de la page (Score.to_dict())
+                    - next_cursor (str | None): Curseur de la page suivante,
+                      None s'il n'y a plus de parties
+                  OU
+                - message (str): Message d'erreur si échec
+                - status_code (int): Code HTTP approprié
+                    - 200 : Page récupérée avec succès
+                    - 400 : user_id, limit ou curseur invalide
+                    - 404 : Utilisateur introuvable
+
+        Note:
+            L'existence de l'utilisateur n'est vérifiée que si la première
+            page est vide (comme get_user_stats()).
+        """
+        error = validate_user_id(user_id) or validate_limit(limit)
+        if error:
+            return error
+        if not 1 <= limit <= MAX_HISTORY_LIMIT:
+            return {
+                "success": False,
+                "message": f"limit doit être compris entre 1 et {MAX_HISTORY_LIMIT}",
+                "status_code": 400
+            }
+
+        requete = select(Score).where(Score.user_id == user_id)
+        if cursor is not None:
+            position = _decode_history_cursor(cursor)
+            if position is None:
+                return {"success": False, "message": "Curseur invalide", "status_code": 400}
+            played_at, score_id = position
+            # (played_at, id) < (curseur), écrit sous une forme que MySQL et
+            # SQLite savent lire comme un intervalle de l'index : la borne
+            # played_at <= ... positionne la lecture, le OR départage la seconde
+            requete = requete.where(
+                Score.played_at <= played_at,
+                or_(Score.played_at < played_at, Score.id < score_id)
+            )
+
+        # Une ligne de plus que demandé : indique s'il existe une page suivante
+        scores = self.db.session.execute(
+            requete.order_by(Score.played_at.desc(), Score.id.desc()).limit(limit + 1)
+        ).scalars().all()
+
+        if not scores and cursor is None:
+            _, error = get_user_or_404(self.db, user_id)
+            if error:
+                return error
+
+        page = scores[:limit]
+        next_cursor = None
+        if len(scores) > limit:
+            next_cursor = _encode_history_cursor(page[-1].played_at, page[-1].id)
+
+        return {
+            "success": True,
+            "data": {
+                "scores": [score.to_dict() for score in page],
+                "next_cursor": next_cursor
+            },
+            "status_code": 200
+        }
+
+    @query_budget(1)
+    @replica_read
+    def get_leaderboard(self, limit=15, window="all"):
         """
         Récupère le classement global des utilisateurs par score total.
 
@@ -167,40 +670,58 @@ class ScoreService:
         joueurs, triés par score total décroissant. C'est utile pour
         créer une dynamique compétitive et encourager les utilisateurs.
 
+        Avec window = day, week ou month, le classement porte sur les points
+        gagnés en jeu pendant la période en cours (ex : "les meilleurs trieurs
+        de la semaine"), lus dans score_rollups.
+
         Args:
             limit (int, optional): Nombre d'utilisateurs à retourner (par défaut 15)
+            window (str, optional): all (score total, par défaut), day, week ou month
 
         Returns:
             dict: Dictionnaire contenant :
                 - success (bool): True si l'opération a réussi
                 - data (list): Liste de dictionnaires triés par score, chacun contenant :
                     - username (str): Nom d'utilisateur
-                    - total_score (int): Score total accumulé
+                    - total_score (int): Score total accumulé (window = all)
+                    - points (int): Points gagnés sur la période (autres fenêtres)
+                    - games_played (int): Parties jouées sur la période (autres fenêtres)
                   OU
                 - message (str): Message d'erreur si échec
                 - status_code (int): Code HTTP approprié
                     - 200 : Classement récupéré avec succès
-                    - 400 : limit invalide (pas un entier)
+                    - 400 : limit invalide (pas un entier) ou window inconnue
 
         Note:
             Le classement est basé sur le score total (total_score),
-            pas sur le score d'une seule partie.
+            pas sur le score d'une seule partie. Il est servi depuis l'index
+            en mémoire (LeaderboardIndex) : aucun tri de la table users.
+            Le top d'une période est gardé en cache window_cache_seconds
+            secondes (WINDOW_LEADERBOARD_SIZE joueurs).
         """
         # Validation du paramètre limit
         error = validate_limit(limit)
         if error:
             return error
 
-        resultat = (
-            self.db.session.query(User)
-            .with_entities(User.username, User.total_score)
-            .order_by(desc(User.total_score))
-            .limit(limit)
-            .all()
-        )
+        if window not in LEADERBOARD_WINDOWS:
+            return {
+                "success": False,
+                "message": f"window doit valoir {', '.join(LEADERBOARD_WINDOWS)}",
+                "status_code": 400
+            }
+
+        if window != "all":
+            return {
+                "success": True,
+                "data": self._get_window_top(window, limit),
+                "status_code": 200
+            }
+
+        resultat = self._get_leaderboard_index().top(limit)
 
         leaderboard = []
-        for username, total_score in resultat:
+        for _, username, total_score in resultat:
             leaderboard.append({
                 "username": username,
                 "total_score": total_score
@@ -212,15 +733,222 @@ class ScoreService:
             "status_code": 200
         }
 
+    def _get_window_top(self, period, limit):
+        """
+        Retourne les meilleurs joueurs de la période en cours.
+
+        Les WINDOW_LEADERBOARD_SIZE premiers sont lus en une requête (index
+        period, bucket, points) puis gardés en cache ; une limite plus grande
+        est lue directement.
+
+        Args:
+            period (str): day, week ou month
+            limit (int): Nombre de joueurs à retourner
+
+        Returns:
+            list: Dictionnaires username, points, games_played
+        """
+        # Période en cours selon la même horloge (UTC) que played_at
+        cle = (period, _period_buckets(_now().date())[period])
+        if limit > WINDOW_LEADERBOARD_SIZE:
+            return self._read_window_top(cle, limit)
+
+        maintenant = time.monotonic()
+        with self._window_lock:
+            entree = self._window_cache.get(cle)
+        if entree is not None and entree[0] > maintenant:
+            return entree[1][:max(limit, 0)]
+
+        top = self._read_window_top(cle, WINDOW_LEADERBOARD_SIZE)
+        with self._window_lock:
+            # Une période terminée n'est plus demandée : seule la période en cours reste en cache
+            self._window_cache = {c: e for c, e in self._window_cache.items() if c[0] != period}
+            self._window_cache[cle] = (maintenant + self.window_cache_seconds, top)
+        return top[:max(limit, 0)]
+
+    def _read_window_top(self, cle, limit):
+        period, bucket = cle
+        lignes = self.db.session.execute(
+            select(User.username, ScoreRollup.points, ScoreRollup.games_played)
+            .join(User, User.id == ScoreRollup.user_id)
+            .where(ScoreRollup.period == period, ScoreRollup.bucket == bucket)
+            .order_by(ScoreRollup.points.desc(), ScoreRollup.user_id)
+            .limit(limit)
+        ).all()
+        return [
+            {"username": username, "points": points, "games_played": games_played}
+            for username, points, games_played in lignes
+        ]
+
+    def _get_neighbourhood(self, user_id, radius):
+        """
+        Lit la position d'un utilisateur et ses voisins dans l'index de classement.
+
+        Un compte créé après le dernier chargement de l'index n'y figure pas
+        encore : il est alors lu par clé primaire puis ajouté à l'index.
+        Position, rang et fenêtre sont lus d'un seul tenant
+        (LeaderboardIndex.around) : un rechargement ou une suppression en
+        parallèle ne peut pas les rendre incohérents.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            radius (int): Nombre de joueurs de chaque côté
+
+        Returns:
+            tuple: (voisinage, erreur)
+                - Si succès : (Neighbourhood, None)
+                - Si échec : (None, dict d'erreur)
+        """
+        error = validate_user_id(user_id)
+        if error:
+            return None, error
+
+        index = self._get_leaderboard_index()
+        voisinage = index.around(user_id, radius)
+        if voisinage is None:
+            utilisateur, error = get_user_or_404(self.db, user_id)
+            if error:
+                return None, error
+
+            assert utilisateur is not None
+            index.upsert(user_id, utilisateur.total_score, utilisateur.username)
+            voisinage = index.around(user_id, radius)
+            if voisinage is None:
+                # Index vidé entre-temps (rechargement en cours)
+                return None, {"success": False, "message": "Utilisateur introuvable", "status_code": 400}
+
+        return voisinage, None
+
+    @query_budget(2)
+    def get_user_rank(self, user_id):
+        """
+        Récupère le rang d'un utilisateur dans le classement global.
+
+        Le rang est calculé depuis l'index en mémoire (O(log n)), sans
+        requête COUNT(*) sur la table users. Les ex-aequo partagent le même
+        rang (1, 2, 2, 4...).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+
+        Returns:
+            dict: Dictionnaire contenant :
+                - success (bool): True si l'opération a réussi
+                - data (dict): Position de l'utilisateur :
+                    - user_id (int): Identifiant de l'utilisateur
+                    - username (str): Nom d'utilisateur
+                    - total_score (int): Score total accumulé
+                    - rank (int): Rang dans le classement (1 = premier)
+                    - total_players (int): Nombre de joueurs classés
+                  OU
+                - message (str): Message d'erreur si échec
+                - status_code (int): Code HTTP approprié
+                    - 200 : Rang récupéré avec succès
+                    - 400 : user_id invalide ou utilisateur introuvable
+        """
+        voisinage, error = self._get_neighbourhood(user_id, 0)
+        if error:
+            return error
+
+        assert voisinage is not None
+
+        _, username, total_score = voisinage.entries[0]
+
+        return {
+            "success": True,
+            "data": {
+                "user_id": user_id,
+                "username": username,
+                "total_score": total_score,
+                "rank": voisinage.rank,
+                "total_players": voisinage.total_players
+            },
+            "status_code": 200
+        }
+
+    @query_budget(2)
+    def get_leaderboard_around(self, user_id, radius=5):
+        """
+        Récupère la portion du classement centrée sur un utilisateur.
+
+        Retourne le rang de l'utilisateur ainsi que les `radius` joueurs
+        classés juste au-dessus et juste en dessous de lui. La fenêtre est
+        lue directement dans l'index en mémoire (O(log n + radius)).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            radius (int, optional): Nombre de joueurs de chaque côté (par défaut 5,
+                maximum MAX_LEADERBOARD_RADIUS)
+
+        Returns:
+            dict: Dictionnaire contenant :
+                - success (bool): True si l'opération a réussi
+                - data (dict): Fenêtre de classement :
+                    - rank (int): Rang de l'utilisateur
+                    - total_score (int): Score total de l'utilisateur
+                    - total_players (int): Nombre de joueurs classés
+                    - entries (list): Joueurs de la fenêtre, chacun contenant :
+                        - rank (int): Rang du joueur
+                        - username (str): Nom d'utilisateur
+                        - total_score (int): Score total accumulé
+                        - is_me (bool): True pour l'utilisateur connecté
+                  OU
+                - message (str): Message d'erreur si échec
+                - status_code (int): Code HTTP approprié
+                    - 200 : Fenêtre récupérée avec succès
+                    - 400 : radius invalide, user_id invalide ou utilisateur introuvable
+        """
+        if not isinstance(radius, int) or radius < 0 or radius > MAX_LEADERBOARD_RADIUS:
+            return {
+                "success": False,
+                "message": f"radius doit être un entier entre 0 et {MAX_LEADERBOARD_RADIUS}",
+                "status_code": 400
+            }
+
+        voisinage, error = self._get_neighbourhood(user_id, radius)
+        if error:
+            return error
+
+        assert voisinage is not None
+
+        # Rang du premier joueur de la fenêtre, puis rangs déduits de proche en proche
+        rank = voisinage.first_rank
+        previous_score = voisinage.entries[0][2]
+        entries = []
+        for offset, (entry_id, username, total_score) in enumerate(voisinage.entries):
+            if total_score != previous_score:
+                rank = voisinage.start + offset + 1
+                previous_score = total_score
+            entries.append({
+                "rank": rank,
+                "username": username,
+                "total_score": total_score,
+                "is_me": entry_id == user_id
+            })
+
+        return {
+            "success": True,
+            "data": {
+                "rank": voisinage.rank,
+                "total_score": voisinage.entries[voisinage.position - voisinage.start][2],
+                "total_players": voisinage.total_players,
+                "entries": entries
+            },
+            "status_code": 200
+        }
+
+    @query_budget(2)
+    @replica_read
     def get_user_stats(self, user_id: int):
         """
         Récupère les statistiques détaillées de jeu d'un utilisateur.
 
-        Cette méthode calcule plusieurs statistiques utiles pour afficher
-        un profil utilisateur ou un tableau de bord personnel :
+        Les statistiques sont lues en une seule requête par clé primaire dans
+        la table user_stats, tenue à jour par add_score() :
         - Nombre total de parties jouées
         - Meilleur score obtenu dans une seule partie
         - Nombre total d'items correctement triés (tous temps)
+        - Temps de jeu cumulé, meilleur taux de réussite, dernière partie
 
         Args:
             user_id (int): Identifiant de l'utilisateur
@@ -230,43 +958,206 @@ class ScoreService:
                 - parties_jouees (int): Nombre de parties jouées
                 - points (int): Meilleur score d'une partie (0 si aucune partie)
                 - correct_items (int): Total d'items correctement triés (0 si aucune partie)
+                - total_duration_ms (int): Temps de jeu cumulé en millisecondes
+                - best_efficiency (float): Meilleur taux de réussite (0.0 à 1.0)
+                - last_played_at (datetime | None): Date de la dernière partie
 
         Note:
-            Cette méthode ne valide pas l'existence de l'utilisateur.
-            Si l'utilisateur n'existe pas ou n'a jamais joué, elle retourne
-            des valeurs à 0.
+            L'existence de l'utilisateur n'est vérifiée que s'il n'a pas
+            encore de statistiques (jamais joué) : il reçoit alors des
+            valeurs à 0.
         """
-
-        # Validation et récupération utilisateur
-        _, error = validate_and_get_user(self.db, user_id)
+        error = validate_user_id(user_id)
         if error:
             return error
 
-        # 1. Compter le nombre de parties
-        parties_jouees = Score.query.filter_by(user_id=user_id).count()
-
-        # 2. Trouver le meilleur score (le plus grand 'points')
-        meilleur_score = self.db.session.query(self.db.func.max(Score.points))\
-            .filter_by(user_id=user_id)\
-            .scalar()
+        stats = self.db.session.get(UserStats, user_id)
 
-        # 3. Additionner tous les 'correct_items'
-        total_correct_items = self.db.session.query(self.db.func.sum(Score.correct_items))\
-            .filter_by(user_id=user_id)\
-            .scalar()
-
-        # Si l'utilisateur n'a jamais joué, on met des valeurs par défaut à 0
-        if meilleur_score is None:
-            meilleur_score = 0
-        if total_correct_items is None:
-            total_correct_items = 0
+        if stats is None:
+            # Jamais joué (ou utilisateur inexistant)
+            _, error = get_user_or_404(self.db, user_id)
+            if error:
+                return error
+            stats = UserStats(
+                games_played=0,
+                best_points=0,
+                total_correct_items=0,
+                total_duration_ms=0,
+                best_efficiency=0,
+                last_played_at=None
+            )
 
         return {
             "success": True,
             "data": {
-                "parties_jouees": parties_jouees,
-                "points": meilleur_score,
-                "correct_items": total_correct_items
+                "parties_jouees": stats.games_played,
+                "points": stats.best_points,
+                "correct_items": stats.total_correct_items,
+                "total_duration_ms": stats.total_duration_ms,
+                "best_efficiency": stats.best_efficiency,
+                "last_played_at": stats.last_played_at
             },
             "status_code": 200
         }
+
+    @query_budget(2)
+    def rebuild_user_stats(self):
+        """
+        Reconstruit entièrement la table user_stats depuis la table scores.
+
+        Utilisé pour initialiser la table après la migration, ou pour la
+        corriger si elle a divergé. Le calcul est fait par la base de données
+        en une seule requête INSERT ... SELECT ... GROUP BY.
+
+        Returns:
+            int: Nombre d'utilisateurs dont les statistiques ont été recalculées
+        """
+        efficiency = case(
+            (Score.total_items > 0, Score.correct_items * 1.0 / Score.total_items),
+            else_=0.0
+        )
+        aggregats = (
+            select(
+                Score.user_id,
+                func.count(Score.id),
+                func.max(Score.points),
+                func.sum(Score.points),
+                func.sum(Score.correct_items),
+                func.sum(Score.total_items),
+                func.sum(Score.duration_ms),
+                func.max(efficiency),
+                func.max(Score.played_at)
+            )
+            .group_by(Score.user_id)
+        )
+
+        self.db.session.execute(delete(UserStats))
+        resultat = self.db.session.execute(
+            insert(UserStats).from_select(
+                [
+                    UserStats.user_id,
+                    UserStats.games_played,
+                    UserStats.best_points,
+                    UserStats.total_points,
+                    UserStats.total_correct_items,
+                    UserStats.total_items,
+                    UserStats.total_duration_ms,
+                    UserStats.best_efficiency,
+                    UserStats.last_played_at
+                ],
+                aggregats
+            )
+        )
+        # Lignes insérées = utilisateurs recalculés (pas de COUNT après coup)
+        total = resultat.rowcount
+        self.db.session.commit()
+
+        return total
+
+    @query_budget(3)
+    def rebuild_score_rollups(self):
+        """
+        Reconstruit entièrement la table score_rollups depuis la table scores.
+
+        La base agrège les parties par utilisateur et par jour (GROUP BY sur
+        DATE(played_at), disponible sous MySQL comme sous SQLite) ; les jours
+        sont ensuite regroupés en semaines et en mois, puis toutes les lignes
+        sont insérées en une requête groupée.
+
+        Returns:
+            int: Nombre de lignes de score_rollups écrites
+        """
+        jour = func.date(Score.played_at)
+        par_jour = self.db.session.execute(
+            select(Score.user_id, jour, func.sum(Score.points), func.count(Score.id))
+            .group_by(Score.user_id, jour)
+        ).all()
+
+        cumuls = {}
+        for user_id, jour_joue, points, parties in par_jour:
+            # SQLite renvoie la date sous forme de texte
+            if isinstance(jour_joue, str):
+                jour_joue = date.fromisoformat(jour_joue)
+            for periode, bucket in _period_buckets(jour_joue).items():
+                cumul = cumuls.setdefault((periode, bucket, user_id), [0, 0])
+                cumul[0] += points
+                cumul[1] += parties
+
+        self.db.session.execute(delete(ScoreRollup))
+        if cumuls:
+            self.db.session.execute(insert(ScoreRollup), [
+                {"period": periode, "bucket": bucket, "user_id": user_id,
+                 "points": points, "games_played": parties}
+                for (periode, bucket, user_id), (points, parties) in cumuls.items()
+            ])
+        self.db.session.commit()
+
+        with self._window_lock:
+            self._window_cache = {}
+        return len(cumuls)
+
+
+def _now():
+    """
+    Date UTC (sans fuseau) d'une partie enregistrée maintenant.
+
+    Fixée par l'application (et non par la base) pour que la partie, ses
+    statistiques et ses points de période tombent le même jour ; tronquée
+    à la seconde comme la colonne played_at, pour que rebuild_score_rollups()
+    retrouve les mêmes périodes. UTC comme le défaut CURRENT_TIMESTAMP des
+    parties plus anciennes (SQLite ; sous MySQL, session en time_zone
+    '+00:00') et utils.revocation._utcnow : jours, semaines et mois ont la
+    même limite pour toutes les parties, quelle que soit l'heure locale du
+    serveur (minuit, changement d'heure).
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _period_buckets(jour):
+    """
+    Premier jour des périodes contenant une date.
+
+    Args:
+        jour (date): Date d'une partie
+
+    Returns:
+        dict: {"day": jour, "week": lundi de la semaine, "month": 1er du mois}
+    """
+    return {
+        "day": jour,
+        "week": jour - timedelta(days=jour.weekday()),
+        "month": jour.replace(day=1)
+    }
+
+
+def _encode_history_cursor(played_at, score_id):
+    """
+    Encode la position d'une partie en curseur opaque pour l'URL.
+
+    Args:
+        played_at (datetime): Date de la dernière partie de la page
+        score_id (int): Identifiant de cette partie
+
+    Returns:
+        str: Curseur base64 (sans caractère à échapper dans une URL)
+    """
+    brut = f"{played_at.isoformat()}|{score_id}".encode("ascii")
+    return base64.urlsafe_b64encode(brut).decode("ascii").rstrip("=")
+
+
+def _decode_history_cursor(cursor):
+    """
+    Décode un curseur produit par _encode_history_cursor().
+
+    Args:
+        cursor (str): Curseur reçu du client
+
+    Returns:
+        tuple | None: (played_at, score_id), ou None si le curseur est invalide
+    """
+    try:
+        brut = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        played_at, score_id = brut.split("|")
+        return datetime.fromisoformat(played_at), int(score_id)
+    except (ValueError, TypeError, binascii.Error):
+        return None
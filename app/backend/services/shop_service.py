@@ -9,8 +9,17 @@ Classes:
     ShopService: Service principal pour la gestion de la boutique
 """
 
+import logging
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 from db.models import ShopItem, User, UserInventory
-from utils.services_utils import validate_and_get_user
+from utils.catalog_cache import CatalogCache
+from utils.query_budget import query_budget
+from utils.read_routing import replica_read
+from utils.services_utils import adjust_total_score, validate_and_get_user, validate_user_id
+
+logger = logging.getLogger(__name__)
 
 class ShopService:
     """
@@ -26,15 +35,24 @@ class ShopService:
 
     Attributes:
         db: Instance de SQLAlchemy pour les opérations de base de données
+        leaderboard (LeaderboardIndex | None): Classement en mémoire à tenir à jour
+        catalog (CatalogCache): Articles actifs gardés en cache tant que la
+            version du catalogue "shop" ne change pas
     """
-    def __init__(self, db):
+    def __init__(self, db, leaderboard=None, catalog_poll_seconds=5):
         """
         Initialise le service de gestion de la boutique.
 
         Args:
             db: Instance SQLAlchemy pour les accès à la base de données
+            leaderboard (LeaderboardIndex, optional): Index de classement partagé
+                avec ScoreService (un achat fait baisser le total_score)
+            catalog_poll_seconds (float, optional): Délai max avant de voir une
+                modification du catalogue faite par un autre worker
         """
         self.db = db
+        self.catalog = CatalogCache(db, "shop", self._load_active_items, catalog_poll_seconds, read_replica=True)
+        self.leaderboard = leaderboard
 
     def _validate_purchase_conditions(self, user_id, item_id):
         """
@@ -98,6 +116,29 @@ class ShopService:
 
         return utilisateur, article, None
 
+    def _explain_purchase_failure(self, user_id, item_id):
+        """
+        Retrouve pourquoi un achat n'a modifié aucune ligne.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            item_id (int): Identifiant de l'article
+
+        Returns:
+            dict: Erreur de _validate_purchase_conditions(), ou 409 si les
+                conditions sont de nouveau remplies (achat concurrent)
+        """
+        _, _, error = self._validate_purchase_conditions(user_id, item_id)
+        if error:
+            return error
+        return {
+            "success": False,
+            "message": "Achat en conflit avec une autre opération, veuillez réessayer",
+            "status_code": 409
+        }
+
+    @query_budget(2)
+    @replica_read
     def get_active_items(self):
         """
         Récupère la liste des articles actifs disponibles à l'achat.
@@ -117,7 +158,13 @@ class ShopService:
         Note:
             Les articles désactivés (is_active=False) n'apparaissent pas
             dans cette liste mais restent en base de données.
+            La liste est servie depuis le cache du catalogue : la table
+            shop_items n'est relue que lorsque sa version change.
         """
+        return self.catalog.get().data
+
+    def _load_active_items(self):
+        """Charge les articles actifs depuis la DB (appelée par le cache du catalogue)."""
         # requête pour récupérer les items
         resultat = (
             self.db.session.query(ShopItem)
@@ -141,6 +188,7 @@ class ShopService:
             "status_code": 200
         }
 
+    @query_budget(3)
     def can_purchase(self, user_id, item_id):
         """
         Vérifie si un utilisateur peut acheter un article spécifique.
@@ -191,15 +239,21 @@ class ShopService:
             "status_code": 200
         }
 
+    @query_budget(5)
     def purchase_item(self, user_id, item_id):
         """
         Effectue l'achat d'un article pour un utilisateur.
 
-        Cette méthode traite l'achat complet d'un article :
-        1. Vérifie toutes les conditions d'achat (même vérifications que can_purchase)
-        2. Déduit le prix de l'article du score total de l'utilisateur
-        3. Ajoute l'article à l'inventaire de l'utilisateur
-        4. Commit les changements en base de données
+        L'achat tient en une transaction courte de deux requêtes, sans
+        lecture préalable :
+        1. Débit conditionnel : UPDATE users SET total_score = total_score - prix
+           WHERE id = :user_id AND total_score >= prix (prix lu par sous-requête
+           dans shop_items, article actif uniquement)
+        2. Ajout à l'inventaire : INSERT dans user_inventory, protégé par la clé
+           primaire (user_id, item_id) ; si l'article est déjà possédé, la
+           transaction est annulée et le débit avec elle
+        Deux achats simultanés ne peuvent donc ni dépenser deux fois les mêmes
+        points, ni acheter deux fois le même article.
 
         Args:
             user_id (int): Identifiant de l'utilisateur
@@ -223,30 +277,37 @@ class ShopService:
                     - 409 : Article déjà possédé
 
         Note:
-            Cette méthode effectue une transaction complète (déduction + ajout).
-            Si l'utilisateur ferme sa page entre la vérification et l'achat,
-            les conditions seront revérifiées.
-
-        Warning:
-            Les vérifications sont dupliquées entre can_purchase() et purchase_item()
-            pour éviter les conditions de course (race conditions). Un utilisateur
-            malveillant ne peut pas acheter un article en spammant des requêtes.
+            Les lectures de _validate_purchase_conditions() ne sont faites
+            qu'en cas d'échec, pour expliquer pourquoi aucune ligne n'a été
+            modifiée.
         """
-        # Validation des conditions d'achat
-        utilisateur, article, error = self._validate_purchase_conditions(user_id, item_id)
+        error = validate_user_id(user_id)
         if error:
             return error
 
-        assert utilisateur is not None
-        assert article is not None
-
-        # MaJ des données
-        utilisateur.total_score -= article.price
-
-        # Nouvelle donnée
-        nouvelle_ligne = UserInventory(user_id=user_id, item_id=item_id)
-        self.db.session.add(nouvelle_ligne)
-        self.db.session.commit()
+        # 1. Débit conditionnel (prix lu dans la même requête)
+        prix = (
+            select(ShopItem.price)
+            .where(ShopItem.id == item_id, ShopItem.is_active.is_(True))
+            .scalar_subquery()
+        )
+        nouveau_total = adjust_total_score(self.db, user_id, -prix, minimum=prix)
+        if nouveau_total is None:
+            self.db.session.rollback()
+            return self._explain_purchase_failure(user_id, item_id)
+
+        # 2. Ajout à l'inventaire (la clé primaire refuse un deuxième achat)
+        try:
+            self.db.session.execute(insert(UserInventory).values(user_id=user_id, item_id=item_id))
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+            return self._explain_purchase_failure(user_id, item_id)
+
+        # MAJ du classement en mémoire
+        if self.leaderboard is not None:
+            self.leaderboard.upsert(user_id, nouveau_total)
+        logger.info("Article acheté", extra={"user_id": user_id, "item_id": item_id, "total_score": nouveau_total})
 
         return {
             "success": True,
@@ -254,7 +315,7 @@ class ShopService:
             "data": {
                 "user_id": user_id,
                 "item_id": item_id,
-                "new_total_score": utilisateur.total_score
+                "new_total_score": nouveau_total
             },
             "status_code": 200
         }
@@ -10,7 +10,8 @@ def verify_token_and_get_user_id() -> Tuple[Optional[int], Optional[Dict[str, An
     Cette fonction centralise toute la logique de vérification du token :
     1. Récupère le token d'accès depuis les cookies de la requête
     2. Vérifie que le token est présent
-    3. Valide le token via le service d'authentification
+    3. Valide le token via le service d'authentification (chemin rapide :
+       signature + claims, sans recharger le profil utilisateur)
     4. Extrait et retourne l'user_id
 
     Returns:
@@ -22,7 +23,8 @@ def verify_token_and_get_user_id() -> Tuple[Optional[int], Optional[Dict[str, An
 
     Note:
         Cette fonction utilise le service d'authentification configuré dans
-        current_app.config["services"]["auth"]
+        current_app.config["services"]["auth"]. L'existence du compte est
+        vérifiée via un cache à durée courte (AUTH_USER_CACHE_TTL_SECONDS).
     """
 
     # Récupérer le service depuis config Flask
@@ -39,20 +41,17 @@ def verify_token_and_get_user_id() -> Tuple[Optional[int], Optional[Dict[str, An
             "status_code": 401
         }
 
-    # Validation token via service d'authentification
-    user_response = auth_service.get_user_by_id(token)
+    # Validation token via service d'authentification (sans requête profil)
+    user_id, error = auth_service.verify_access_token(token)
 
     # Vérif si token valide
-    if not user_response.get("success"):
+    if error:
         return None, {
             "success": False,
-            "message": user_response.get("message", "Token invalide"),
+            "message": error.get("message", "Token invalide"),
             "status_code": 401
         }
 
-    # Extraire user_id depuis la réponse du service
-    user_id = user_response["data"]["id"]
-
     # Retourner user_id
     return user_id, None
 
@@ -0,0 +1,234 @@
+"""
+Moteur de règles des badges pour Récy&Co.
+
+Les règles de déblocage sont compilées une seule fois à partir des lignes
+de la table badges (colonnes `rule` et `threshold`), au chargement du
+catalogue ou lorsqu'il change. Chaque famille de règles est rangée dans un
+tableau de seuils triés : trouver les badges gagnés revient à une recherche
+dichotomique (bisect) au lieu d'évaluer chaque badge un par un.
+
+Types de règles (colonne Badge.rule) :
+    total_score_at_least: score total cumulé >= seuil
+    game_correct_items_at_least: une partie avec au moins `seuil` items corrects
+    game_total_items_at_least: une partie avec au moins `seuil` items présentés
+    game_duration_under: une partie terminée en moins de `seuil` millisecondes
+    game_perfect: une partie sans erreur (correct_items == total_items)
+    badge_count_at_least: au moins `seuil` badges possédés (méta-badge)
+
+Classes:
+    GameResult: Résultat minimal d'une partie (items corrects, items, durée)
+    BadgeRuleEngine: Règles compilées et évaluation des badges gagnés
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+TOTAL_SCORE_AT_LEAST = "total_score_at_least"
+GAME_CORRECT_ITEMS_AT_LEAST = "game_correct_items_at_least"
+GAME_TOTAL_ITEMS_AT_LEAST = "game_total_items_at_least"
+GAME_DURATION_UNDER = "game_duration_under"
+GAME_PERFECT = "game_perfect"
+BADGE_COUNT_AT_LEAST = "badge_count_at_least"
+
+RULE_TYPES = (
+    TOTAL_SCORE_AT_LEAST,
+    GAME_CORRECT_ITEMS_AT_LEAST,
+    GAME_TOTAL_ITEMS_AT_LEAST,
+    GAME_DURATION_UNDER,
+    GAME_PERFECT,
+    BADGE_COUNT_AT_LEAST,
+)
+
+# Règles des badges historiques, utilisées quand la colonne `rule` est vide
+# (base créée avant l'ajout de la colonne). Un seuil renseigné en base reste prioritaire.
+DEFAULT_RULES: Dict[str, Tuple[str, Optional[int]]] = {
+    # Badges enfants
+    "TRIEUR_MALIN": (TOTAL_SCORE_AT_LEAST, 10),
+    "TRIEUR_FUTE": (TOTAL_SCORE_AT_LEAST, 40),
+    "TRIEUR_PROPRET": (TOTAL_SCORE_AT_LEAST, 60),
+    "TRIEUR_CHAMPION": (TOTAL_SCORE_AT_LEAST, 80),
+    "TRIEUR_RAPIDE": (GAME_DURATION_UNDER, 2000),
+    "TRIEUR_JOUEUR": (GAME_TOTAL_ITEMS_AT_LEAST, 20),
+    "AMI_DE_RECY": (TOTAL_SCORE_AT_LEAST, 25),
+    # Badges progression "sérieux"
+    "FIRST_GAME": (GAME_CORRECT_ITEMS_AT_LEAST, 1),
+    "PERFECT_RUN": (GAME_PERFECT, None),
+    "TRIEUR_NOVICE": (TOTAL_SCORE_AT_LEAST, 30),
+    "TRIEUR_DEBUTANT": (TOTAL_SCORE_AT_LEAST, 50),
+    "TRIEUR": (TOTAL_SCORE_AT_LEAST, 70),
+    "TRIEUR_APPLIQUE": (TOTAL_SCORE_AT_LEAST, 100),
+    "200_POINTS": (TOTAL_SCORE_AT_LEAST, 200),
+    "TRIEUR_ASSIDU": (TOTAL_SCORE_AT_LEAST, 300),
+    "400_POINTS": (TOTAL_SCORE_AT_LEAST, 400),
+    "TRIEUR_CONFIRME": (TOTAL_SCORE_AT_LEAST, 500),
+    # Badge collectionneur
+    "PETIT_COLLECTIONNEUR": (BADGE_COUNT_AT_LEAST, 5),
+}
+
+
+class GameResult(NamedTuple):
+    """Résultat d'une partie tel que vu par les règles de badges."""
+
+    correct_items: int
+    total_items: int
+    duration_ms: int
+
+
+class _ThresholdTable:
+    """Seuils triés et identifiants de badges associés (même ordre)."""
+
+    __slots__ = ("thresholds", "badge_ids")
+
+    def __init__(self, entries: Iterable[Tuple[int, int]]) -> None:
+        ordered = sorted(entries)
+        self.thresholds = [threshold for threshold, _ in ordered]
+        self.badge_ids = [badge_id for _, badge_id in ordered]
+
+    def at_most(self, value) -> List[int]:
+        """Badges dont le seuil est <= value."""
+        return self.badge_ids[:bisect_right(self.thresholds, value)]
+
+    def between(self, low, high) -> List[int]:
+        """Badges dont le seuil est dans l'intervalle ]low, high]."""
+        return self.badge_ids[bisect_right(self.thresholds, low):bisect_right(self.thresholds, high)]
+
+    def above(self, value) -> List[int]:
+        """Badges dont le seuil est strictement supérieur à value."""
+        return self.badge_ids[bisect_right(self.thresholds, value):]
+
+    def count_at_most(self, value) -> int:
+        return bisect_right(self.thresholds, value)
+
+    def __len__(self) -> int:
+        return len(self.badge_ids)
+
+
+class BadgeRuleEngine:
+    """
+    Règles de badges compilées à partir du catalogue.
+
+    Le moteur est immuable : quand le catalogue change, on en compile un
+    nouveau (BadgeRuleEngine(badges)) et on remplace l'ancien.
+
+    Attributes:
+        rules (dict): badge_id -> (type de règle, seuil) pour les badges compilés
+        ignored (list): Codes des badges sans règle connue (jamais attribués)
+    """
+
+    def __init__(self, badges: Iterable) -> None:
+        """
+        Compile les règles d'une liste de badges.
+
+        Args:
+            badges: Objets ayant les attributs id, code, rule et threshold
+                (lignes Badge ou équivalent)
+        """
+        self.rules: Dict[int, Tuple[str, Optional[int]]] = {}
+        self.ignored: List[str] = []
+
+        entries: Dict[str, List[Tuple[int, int]]] = {rule: [] for rule in RULE_TYPES}
+        for badge in badges:
+            rule, threshold = self._resolve_rule(badge)
+            if rule is None:
+                self.ignored.append(badge.code)
+                continue
+            self.rules[badge.id] = (rule, threshold)
+            entries[rule].append((threshold or 0, badge.id))
+
+        self._total_score = _ThresholdTable(entries[TOTAL_SCORE_AT_LEAST])
+        self._game_correct = _ThresholdTable(entries[GAME_CORRECT_ITEMS_AT_LEAST])
+        self._game_total = _ThresholdTable(entries[GAME_TOTAL_ITEMS_AT_LEAST])
+        self._game_duration = _ThresholdTable(entries[GAME_DURATION_UNDER])
+        self._perfect = [badge_id for _, badge_id in entries[GAME_PERFECT]]
+        self._badge_count = _ThresholdTable(entries[BADGE_COUNT_AT_LEAST])
+
+    @staticmethod
+    def _resolve_rule(badge) -> Tuple[Optional[str], Optional[int]]:
+        """Retourne (type de règle, seuil) d'un badge, avec repli sur DEFAULT_RULES."""
+        rule = getattr(badge, "rule", None)
+        threshold = badge.threshold
+        if not rule:
+            rule, default_threshold = DEFAULT_RULES.get(badge.code, (None, None))
+            if threshold is None:
+                threshold = default_threshold
+        if rule not in RULE_TYPES:
+            return None, None
+        if rule != GAME_PERFECT and threshold is None:
+            return None, None
+        return rule, threshold
+
+    def evaluate(
+        self,
+        owned: Set[int],
+        total_score: int,
+        games: Iterable[GameResult] = (),
+        previous_total: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Calcule les badges nouvellement gagnés.
+
+        Args:
+            owned (set[int]): Identifiants des badges déjà possédés
+            total_score (int): Score total de l'utilisateur après les parties
+            games (iterable[GameResult]): Parties qui viennent d'être jouées
+            previous_total (int, optional): Score total avant ces parties. Seuls
+                les seuils franchis entre previous_total et total_score sont alors
+                examinés (bisect) ; sans cette valeur, tous les seuils atteints le sont.
+
+        Returns:
+            list[int]: Identifiants des badges à attribuer (sans doublon ni badge déjà possédé)
+        """
+        gagnes: List[int] = []
+        deja_vus = set(owned)
+
+        def ajouter(candidats):
+            for badge_id in candidats:
+                if badge_id not in deja_vus:
+                    deja_vus.add(badge_id)
+                    gagnes.append(badge_id)
+
+        # 1. Score cumulé : seuils franchis entre l'ancien et le nouveau total
+        ajouter(self._total_score_candidates(owned, total_score, previous_total))
+
+        # 2. Règles de partie : meilleure valeur du lot puis bisect
+        games = list(games)
+        if games:
+            ajouter(self._game_correct.at_most(max(g.correct_items for g in games)))
+            ajouter(self._game_total.at_most(max(g.total_items for g in games)))
+
+            durations = [g.duration_ms for g in games if g.duration_ms]
+            if durations:
+                ajouter(self._game_duration.above(min(durations)))
+
+            if self._perfect and any(g.correct_items == g.total_items for g in games):
+                ajouter(self._perfect)
+
+        # 3. Méta-badges : chaque badge gagné peut en débloquer un autre
+        if len(self._badge_count):
+            while True:
+                avant = len(gagnes)
+                ajouter(self._badge_count.at_most(len(deja_vus)))
+                if len(gagnes) == avant:
+                    break
+
+        return gagnes
+
+    def _total_score_candidates(self, owned, total_score, previous_total) -> List[int]:
+        """Badges de score cumulé à examiner pour ce nouveau total."""
+        table = self._total_score
+        if previous_total is None or previous_total >= total_score:
+            return table.at_most(total_score)
+
+        # Chemin rapide : tous les seuils <= previous_total sont déjà possédés
+        # (cas normal), il suffit de regarder l'intervalle ]previous_total, total_score].
+        attendus = table.count_at_most(previous_total)
+        possedes = sum(
+            1 for badge_id in owned
+            if self.rules.get(badge_id, (None,))[0] == TOTAL_SCORE_AT_LEAST
+            and self.rules[badge_id][1] <= previous_total
+        )
+        if possedes >= attendus:
+            return table.between(previous_total, total_score)
+
+        # Rattrapage (badge ajouté au catalogue après coup, points dépensés puis regagnés...)
+        return table.at_most(total_score)
@@ -0,0 +1,203 @@
+"""
+Cache versionné des catalogues (boutique, badges) pour Récy&Co.
+
+Les catalogues changent rarement mais sont lus à chaque affichage de la
+boutique ou de la page des badges. Chaque catalogue a un numéro de version
+dans la table catalog_versions :
+- toute modification des lignes ShopItem ou Badge faite via la session
+  SQLAlchemy (ajout, modification, suppression, update/delete en masse)
+  incrémente la version dans la même transaction ;
+- chaque worker garde le catalogue chargé (et sa réponse JSON
+  pré-sérialisée) et ne relit que le numéro de version, au plus une fois
+  toutes les `poll_seconds` secondes. Un changement est donc visible partout
+  en moins de `poll_seconds` secondes, et immédiatement dans le processus
+  qui l'a fait.
+
+Une modification faite hors de l'ORM (SQL à la main) doit appeler
+bump_catalog_version() pour être vue par les caches.
+
+Classes:
+    CatalogEntry: Catalogue chargé pour une version donnée
+    CatalogCache: Cache en lecture d'un catalogue, rechargé quand sa version change
+
+Functions:
+    bump_catalog_version: Incrémente la version d'un catalogue
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from db.models import Badge, CatalogVersion, ShopItem
+from utils.http_cache import PreparedPayload
+from utils.read_routing import reads_from_replica
+
+# Modèles surveillés -> nom du catalogue dans catalog_versions
+WATCHED_MODELS = {
+    ShopItem: "shop",
+    Badge: "badges",
+}
+
+# Caches vivants du processus, par nom de catalogue (invalidation locale après commit)
+_caches = weakref.WeakSet()
+
+
+class CatalogEntry(NamedTuple):
+    """Catalogue chargé : version, réponse du service et sa version pré-sérialisée."""
+
+    version: int
+    data: Any
+    payload: PreparedPayload
+
+
+class CatalogCache:
+    """
+    Catalogue gardé en mémoire tant que sa version en base ne change pas.
+
+    Attributes:
+        db: Instance SQLAlchemy
+        name (str): Nom du catalogue dans catalog_versions
+        loader (callable): Fonction sans argument qui charge le catalogue depuis
+            la DB et retourne la réponse du service (dict sérialisable en JSON)
+        poll_seconds (float): Intervalle minimal entre deux lectures de la version
+        read_replica (bool): Version et catalogue lus sur le réplica (s'il existe)
+    """
+
+    def __init__(
+        self, db, name: str, loader: Callable[[], Any], poll_seconds: float = 5, read_replica: bool = False
+    ) -> None:
+        """
+        Initialise un cache vide (le catalogue est chargé au premier get()).
+
+        Args:
+            db: Instance SQLAlchemy
+            name (str): Nom du catalogue ("shop", "badges")
+            loader (callable): Chargement du catalogue depuis la DB
+            poll_seconds (float, optional): Délai max avant de voir une modification
+                faite par un autre worker (par défaut 5 secondes)
+            read_replica (bool, optional): Lit version et catalogue sur le réplica
+                (utils/read_routing.py) ; toujours sur la même base, pour ne pas
+                garder un catalogue du réplica sous une version de la base principale
+        """
+        self.db = db
+        self.name = name
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+        self.read_replica = read_replica
+
+        self._entry: Optional[CatalogEntry] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self) -> CatalogEntry:
+        """
+        Retourne le catalogue à jour (rechargé seulement si sa version a changé).
+
+        Returns:
+            CatalogEntry: Version, données et réponse pré-sérialisée
+        """
+        entry = self._entry
+        checked_at = self._checked_at
+        if entry is not None and checked_at is not None and time.monotonic() - checked_at < self.poll_seconds:
+            return entry
+
+        with self._lock:
+            if self._entry is not None and self._checked_at is not None \
+                    and time.monotonic() - self._checked_at < self.poll_seconds:
+                return self._entry
+
+            with reads_from_replica(self.read_replica):
+                version = self._read_version()
+                if self._entry is None or self._entry.version != version:
+                    data = self.loader()
+                    self._entry = CatalogEntry(version, data, PreparedPayload.from_data(data))
+            self._checked_at = time.monotonic()
+            return self._entry
+
+    def invalidate(self) -> None:
+        """Force la relecture de la version au prochain get()."""
+        self._checked_at = None
+
+    def _read_version(self) -> int:
+        version = self.db.session.execute(
+            select(CatalogVersion.version).where(CatalogVersion.name == self.name)
+        ).scalar()
+        return version or 0
+
+
+def bump_catalog_version(connection, *names: str) -> None:
+    """
+    Incrémente la version des catalogues donnés.
+
+    Args:
+        connection: Connexion SQLAlchemy (celle de la transaction en cours,
+            pour que la nouvelle version soit validée avec la modification)
+        *names (str): Noms des catalogues modifiés
+    """
+    for name in names:
+        resultat = connection.execute(
+            update(CatalogVersion.__table__)
+            .where(CatalogVersion.__table__.c.name == name)
+            .values(version=CatalogVersion.__table__.c.version + 1)
+        )
+        if resultat.rowcount == 0:
+            connection.execute(CatalogVersion.__table__.insert().values(name=name, version=1))
+
+
+def _catalog_of(instance) -> Optional[str]:
+    for model, name in WATCHED_MODELS.items():
+        if isinstance(instance, model):
+            return name
+    return None
+
+
+def _mark_modified(session, names) -> None:
+    names = set(names) - session.info.setdefault("catalogs_modified", set())
+    if names:
+        bump_catalog_version(session.connection(), *sorted(names))
+        session.info["catalogs_modified"].update(names)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    names = set()
+    for instance in session.new | session.deleted:
+        name = _catalog_of(instance)
+        if name:
+            names.add(name)
+    for instance in session.dirty:
+        name = _catalog_of(instance)
+        if name and session.is_modified(instance, include_collections=False):
+            names.add(name)
+    if names:
+        _mark_modified(session, names)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    # update(ShopItem)... / delete(Badge)... : pas de flush, on incrémente ici
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    name = WATCHED_MODELS.get(mapper.class_) if mapper is not None else None
+    if name:
+        _mark_modified(orm_execute_state.session, [name])
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    names = session.info.pop("catalogs_modified", None)
+    if names:
+        for cache in list(_caches):
+            if cache.name in names:
+                cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("catalogs_modified", None)
@@ -0,0 +1,161 @@
+"""
+Réponses JSON pré-sérialisées et cache HTTP pour Récy&Co.
+
+Pour les documents qui changent rarement (règles de tri, catalogues), le
+JSON est sérialisé et compressé une seule fois, puis servi tel quel :
+- corps en octets + variantes gzip (et brotli si le module est installé)
+- ETag fort calculé sur le contenu : un client qui renvoie If-None-Match
+  reçoit un 304 sans corps
+- en-têtes Cache-Control et Vary: Accept-Encoding
+
+Classes:
+    PreparedPayload: Document JSON sérialisé, compressé et son ETag
+    JSONFileCache: Fichier JSON chargé une fois, rechargé si son mtime change
+
+Functions:
+    make_cached_response: Construit la réponse Flask (200 ou 304) d'un PreparedPayload
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel : sans lui, seul gzip est proposé
+    brotli = None
+
+# En dessous de cette taille, la compression ne fait rien gagner
+MIN_COMPRESS_SIZE = 512
+
+
+class PreparedPayload:
+    """
+    Document JSON sérialisé une fois, avec ses variantes compressées.
+
+    Attributes:
+        body (bytes): JSON encodé en UTF-8
+        etag (str): Empreinte du contenu (sans guillemets)
+        variants (dict): Encodage ("gzip", "br") -> corps compressé
+    """
+
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, body: bytes) -> None:
+        """
+        Prépare un corps JSON déjà sérialisé.
+
+        Args:
+            body (bytes): JSON encodé en UTF-8
+        """
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+
+    @classmethod
+    def from_data(cls, data) -> "PreparedPayload":
+        """
+        Sérialise un objet Python (dict, list...) en JSON compact.
+
+        Args:
+            data: Objet sérialisable en JSON
+
+        Returns:
+            PreparedPayload: Document prêt à être servi
+        """
+        return cls(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def make_cached_response(payload: PreparedPayload, max_age: int = 0, status: int = 200) -> Response:
+    """
+    Construit la réponse HTTP d'un document pré-sérialisé.
+
+    Retourne un 304 si le client possède déjà cette version (If-None-Match),
+    sinon le corps dans le meilleur encodage accepté par le client.
+
+    Args:
+        payload (PreparedPayload): Document à servir
+        max_age (int, optional): Durée de fraîcheur côté client en secondes
+            (0 = le client revalide à chaque fois avec son ETag)
+        status (int, optional): Code HTTP de la réponse complète (par défaut 200)
+
+    Returns:
+        Response: Réponse Flask prête à être retournée par la route
+    """
+    encoding = None
+    for candidat in ("br", "gzip"):
+        if candidat in payload.variants and request.accept_encodings[candidat]:
+            encoding = candidat
+            break
+
+    # ETag fort : chaque encodage a le sien, tous désignent la même version
+    etag = payload.etag if encoding is None else f"{payload.etag}-{encoding}"
+    versions = (payload.etag, *(f"{payload.etag}-{e}" for e in payload.variants))
+
+    if any(request.if_none_match.contains_weak(version) for version in versions):
+        response = Response(status=304)
+    else:
+        body = payload.body if encoding is None else payload.variants[encoding]
+        response = Response(body, status=status, mimetype="application/json")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate" if max_age else "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+class JSONFileCache:
+    """
+    Fichier JSON lu une fois et gardé sous forme de PreparedPayload.
+
+    Chaque appel à get() compare la date de modification (et la taille) du
+    fichier à celles du dernier chargement : le fichier n'est relu et
+    re-sérialisé que s'il a changé sur le disque.
+
+    Attributes:
+        path (str): Chemin absolu du fichier JSON
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Chemin du fichier JSON à servir
+        """
+        self.path = os.path.abspath(path)
+        self._signature = None
+        self._payload = None
+        self._lock = threading.Lock()
+
+    def get(self) -> PreparedPayload:
+        """
+        Retourne le document, rechargé si le fichier a changé.
+
+        Returns:
+            PreparedPayload: Contenu actuel du fichier
+
+        Raises:
+            OSError: Si le fichier est introuvable ou illisible
+            ValueError: Si le fichier ne contient pas du JSON valide
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return self._payload
+
+        with self._lock:
+            if signature != self._signature:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._payload = PreparedPayload.from_data(data)
+                self._signature = signature
+        return self._payload
@@ -0,0 +1,76 @@
+"""
+Sérialisation JSON des réponses de l'API Récy&Co.
+
+Toutes les réponses jsonify() passent par RecycoJSONProvider :
+- avec orjson (si installé), la sérialisation est faite en C, plusieurs
+  fois plus vite que le module json standard sur les classements,
+  l'historique des parties et les réponses de lots
+- sans orjson, le module json standard est utilisé, avec le même rendu
+
+Dans les deux cas, les dates (datetime, date) sont écrites au format ISO
+8601 ("2026-10-17T14:03:00", "2026-10-17") : les services et les modèles
+renvoient les objets datetime tels quels, sans str() ni isoformat() champ
+par champ.
+
+Classes:
+    RecycoJSONProvider: JSONProvider Flask basé sur orjson, repli sur json
+"""
+
+import json
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : sans lui, le module json standard est utilisé
+    orjson = None
+
+
+def _default(o):
+    """Convertit les types non gérés nativement (dates en ISO 8601, puis règles de Flask)."""
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class RecycoJSONProvider(DefaultJSONProvider):
+    """
+    JSONProvider Flask : orjson si disponible, module json standard sinon.
+
+    Reprend les réglages de DefaultJSONProvider (sort_keys, compact en
+    mode debug) ; les deux moteurs produisent le même JSON, à l'échappement
+    des caractères non ASCII près (orjson écrit de l'UTF-8).
+    """
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault("default", self.default)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self._dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # En mode debug, Flask indente les réponses (compact = None) : orjson aussi
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        # Octets d'orjson envoyés tels quels (pas de décodage puis ré-encodage)
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
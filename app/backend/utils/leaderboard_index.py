@@ -0,0 +1,348 @@
+"""
+Index de classement en mémoire pour Récy&Co.
+
+Ce module contient une skip list indexable (chaque lien connaît le nombre
+de positions qu'il saute) qui garde les utilisateurs triés par score total
+décroissant. Elle permet de répondre au classement sans trier la table
+`users` à chaque requête :
+- insertion / mise à jour / suppression : O(log n)
+- rang d'un utilisateur : O(log n)
+- top N ou fenêtre autour d'une position : O(log n + N)
+
+Classes:
+    Neighbourhood: Position, rang et voisins d'un utilisateur (lecture cohérente)
+    LeaderboardIndex: Index ordonné (user_id, username, total_score)
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Nombre maximal de niveaux : suffisant pour plusieurs millions d'utilisateurs
+MAX_LEVEL = 24
+
+
+class _Node:
+    """Nœud de la skip list (clé de tri + pseudo, liens et largeurs par niveau)."""
+
+    __slots__ = ("key", "username", "next", "width")
+
+    def __init__(self, key, username, level: int) -> None:
+        self.key = key
+        self.username = username
+        self.next: List[Optional["_Node"]] = [None] * level
+        self.width: List[int] = [1] * level
+
+
+class Neighbourhood(NamedTuple):
+    """Position d'un utilisateur et fenêtre de classement lues en une fois."""
+
+    position: int
+    rank: int
+    total_players: int
+    start: int
+    first_rank: int
+    entries: List[Tuple[int, str, int]]
+
+
+class LeaderboardIndex:
+    """
+    Classement des utilisateurs maintenu en mémoire, trié par score décroissant.
+
+    La clé de tri est (-total_score, user_id) : les meilleurs scores sont en
+    tête et, à score égal, l'utilisateur le plus ancien passe devant. L'index
+    est protégé par un verrou pour être partagé entre les threads du serveur.
+
+    L'index est propre à chaque processus : pour rester cohérent avec les
+    écritures faites par les autres workers, il est considéré comme périmé
+    après `resync_seconds` secondes et doit alors être rechargé depuis la DB.
+
+    Attributes:
+        resync_seconds (int | None): Durée de validité d'un chargement complet
+            (None = jamais périmé)
+        loaded_at (float | None): Horodatage (monotonic) du dernier chargement
+    """
+
+    def __init__(self, resync_seconds: Optional[int] = None) -> None:
+        """
+        Initialise un index vide (non chargé).
+
+        Args:
+            resync_seconds (int, optional): Durée après laquelle l'index doit
+                être rechargé depuis la base de données
+        """
+        self.resync_seconds = resync_seconds
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Vide complètement la skip list."""
+        self._head = _Node(None, None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+        self._scores: Dict[int, int] = {}
+
+    # ---------- Chargement ----------
+
+    @property
+    def is_loaded(self) -> bool:
+        """Indique si l'index a été chargé au moins une fois."""
+        return self.loaded_at is not None
+
+    def is_stale(self) -> bool:
+        """
+        Indique si l'index doit être (re)chargé depuis la base de données.
+
+        Returns:
+            bool: True si l'index n'a jamais été chargé ou si son dernier
+                chargement date de plus de `resync_seconds` secondes
+        """
+        if self.loaded_at is None:
+            return True
+        if not self.resync_seconds:
+            return False
+        return time.monotonic() - self.loaded_at > self.resync_seconds
+
+    def load(self, rows: Iterable[Tuple[int, str, int]]) -> None:
+        """
+        Remplace le contenu de l'index par les lignes fournies.
+
+        Args:
+            rows: Itérable de tuples (user_id, username, total_score)
+        """
+        with self._lock:
+            self._reset()
+            for user_id, username, total_score in rows:
+                self._insert(user_id, username, total_score or 0)
+            self.loaded_at = time.monotonic()
+
+    # ---------- Mises à jour ----------
+
+    def upsert(self, user_id: int, total_score: int, username: Optional[str] = None) -> None:
+        """
+        Ajoute un utilisateur ou met à jour son score total.
+
+        Tant que l'index n'est pas chargé, l'appel est ignoré : le prochain
+        chargement complet lira de toute façon la valeur à jour en base.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            total_score (int): Nouveau score total
+            username (str, optional): Pseudo (conservé si déjà connu)
+        """
+        with self._lock:
+            if not self.is_loaded:
+                return
+            if user_id in self._scores:
+                node = self._delete((-self._scores[user_id], user_id))
+                if username is None and node is not None:
+                    username = node.username
+            self._insert(user_id, username, total_score)
+
+    def remove(self, user_id: int) -> None:
+        """
+        Retire un utilisateur de l'index (compte supprimé).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+        """
+        with self._lock:
+            if user_id in self._scores:
+                self._delete((-self._scores[user_id], user_id))
+
+    # ---------- Lectures ----------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._scores
+
+    def get_score(self, user_id: int) -> Optional[int]:
+        """Retourne le score total indexé d'un utilisateur (None si absent)."""
+        return self._scores.get(user_id)
+
+    def top(self, limit: int) -> List[Tuple[int, str, int]]:
+        """
+        Retourne les `limit` premiers du classement.
+
+        Args:
+            limit (int): Nombre d'entrées souhaitées
+
+        Returns:
+            list: Tuples (user_id, username, total_score) triés par score décroissant
+        """
+        return self.slice(0, limit)
+
+    def slice(self, start: int, count: int) -> List[Tuple[int, str, int]]:
+        """
+        Retourne `count` entrées à partir de la position `start` (0 = premier).
+
+        Args:
+            start (int): Position de départ (base 0)
+            count (int): Nombre d'entrées souhaitées
+
+        Returns:
+            list: Tuples (user_id, username, total_score)
+        """
+        with self._lock:
+            if count <= 0 or start >= self._size:
+                return []
+            node = self._node_at(max(start, 0))
+            result = []
+            while node is not None and len(result) < count:
+                result.append((node.key[1], node.username, -node.key[0]))
+                node = node.next[0]
+            return result
+
+    def position_of(self, user_id: int) -> Optional[int]:
+        """
+        Retourne la position (base 0) d'un utilisateur dans l'ordre de l'index.
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+
+        Returns:
+            int | None: Position de l'utilisateur, None s'il n'est pas indexé
+        """
+        with self._lock:
+            if user_id not in self._scores:
+                return None
+            return self._count_before((-self._scores[user_id], user_id))
+
+    def rank_of(self, user_id: int) -> Optional[int]:
+        """
+        Retourne le rang d'un utilisateur (base 1, ex-aequo au même rang).
+
+        Le rang vaut 1 + le nombre d'utilisateurs ayant un score strictement
+        supérieur (classement « sportif » : 1, 2, 2, 4...).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+
+        Returns:
+            int | None: Rang de l'utilisateur, None s'il n'est pas indexé
+        """
+        with self._lock:
+            if user_id not in self._scores:
+                return None
+            # (-score, -1) est inférieur à toutes les clés de même score
+            return self._count_before((-self._scores[user_id], -1)) + 1
+
+    def around(self, user_id: int, radius: int) -> Optional[Neighbourhood]:
+        """
+        Lit la position d'un utilisateur et ses voisins sous un seul verrou.
+
+        Position, rang et fenêtre sont cohérents entre eux même si l'index est
+        rechargé ou modifié en parallèle (ce que des appels séparés à
+        position_of(), rank_of() et slice() ne garantissent pas).
+
+        Args:
+            user_id (int): Identifiant de l'utilisateur
+            radius (int): Nombre de joueurs de chaque côté (0 = l'utilisateur seul)
+
+        Returns:
+            Neighbourhood | None: Position (base 0), rang, nombre de joueurs,
+                position et rang de la première entrée, entrées
+                (user_id, username, total_score) ; None s'il n'est pas indexé
+        """
+        with self._lock:
+            if user_id not in self._scores:
+                return None
+            score = self._scores[user_id]
+            position = self._count_before((-score, user_id))
+            start = max(position - radius, 0)
+            entries = self.slice(start, position - start + radius + 1)
+            return Neighbourhood(
+                position=position,
+                rank=self._count_before((-score, -1)) + 1,
+                total_players=self._size,
+                start=start,
+                first_rank=self._count_before((-entries[0][2], -1)) + 1,
+                entries=entries
+            )
+
+    # ---------- Skip list (appelées sous verrou) ----------
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find_predecessors(self, key):
+        """Retourne, pour chaque niveau, le dernier nœud de clé < key et sa position."""
+        update = [self._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node = self._head
+        position = 0
+        for level in reversed(range(self._level)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def _count_before(self, key) -> int:
+        """Nombre d'éléments dont la clé est strictement inférieure à key."""
+        _, positions = self._find_predecessors(key)
+        return positions[0]
+
+    def _node_at(self, index: int) -> Optional[_Node]:
+        """Retourne le nœud à la position `index` (base 0)."""
+        target = index + 1
+        node = self._head
+        position = 0
+        for level in reversed(range(self._level)):
+            while node.next[level] is not None and position + node.width[level] <= target:
+                position += node.width[level]
+                node = node.next[level]
+        return node if position == target else None
+
+    def _insert(self, user_id: int, username, total_score: int) -> None:
+        key = (-total_score, user_id)
+        update, positions = self._find_predecessors(key)
+        position = positions[0]
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                # Le lien de tête d'un nouveau niveau saute jusqu'à la fin de la liste
+                self._head.width[i] = self._size + 1
+            self._level = level
+
+        node = _Node(key, username, level)
+        for i in range(level):
+            previous = update[i]
+            node.next[i] = previous.next[i]
+            previous.next[i] = node
+            node.width[i] = previous.width[i] - (position - positions[i])
+            previous.width[i] = position - positions[i] + 1
+        for i in range(level, self._level):
+            update[i].width[i] += 1
+
+        self._size += 1
+        self._scores[user_id] = total_score
+
+    def _delete(self, key) -> Optional[_Node]:
+        update, _ = self._find_predecessors(key)
+        target = update[0].next[0]
+        if target is None or target.key != key:
+            return None
+
+        for i in range(self._level):
+            if update[i].next[i] is target:
+                update[i].width[i] += target.width[i] - 1
+                update[i].next[i] = target.next[i]
+            else:
+                update[i].width[i] -= 1
+
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+
+        self._size -= 1
+        del self._scores[key[1]]
+        return target
@@ -0,0 +1,363 @@
+"""
+Mesures de performance de l'API Récy&Co (format texte Prometheus).
+
+Pour chaque requête HTTP, le middleware enregistre, par blueprint et par
+route (règle Flask, ex : /api/scores, pas l'URL brute) :
+- la durée de la requête (histogramme)
+- le code HTTP renvoyé (compteur)
+- le nombre de requêtes SQL exécutées et leur durée totale, mesurés par
+  les événements SQLAlchemy before/after_cursor_execute
+
+Le pool de connexions est mesuré lui aussi (init_pool_metrics) :
+connexions empruntées, débordement au-delà de pool_size, emprunts,
+connexions ouvertes ou invalidées (événements du pool SQLAlchemy) et temps
+d'obtention d'une connexion (MeteredQueuePool).
+
+Les valeurs sont exposées par la route /metrics (facade/metrics_facade.py),
+désactivée par défaut en production et réservée à un jeton ou à une liste
+d'adresses autorisées. Le nombre d'enregistrements de journal abandonnés
+(file de utils/structured_logging.py pleine) y est exporté aussi.
+Le coût par requête reste faible (quelques appels à perf_counter et un
+verrou) : le middleware peut rester actif en production.
+
+Classes:
+    Histogram: Histogramme cumulatif à seuils fixes
+    MetricsRegistry: Ensemble des mesures du processus
+    MeteredQueuePool: QueuePool qui mesure l'attente d'une connexion
+
+Functions:
+    init_metrics: Branche le middleware et les événements SQL sur l'application
+    init_pool_metrics: Branche les événements du pool de connexions sur le registre
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from flask import Flask, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Seuils des histogrammes (secondes pour les durées, nombre pour les requêtes SQL)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Compteurs du pool de connexions : nom -> texte d'aide
+POOL_COUNTERS = {
+    "checkouts": "Emprunts d'une connexion au pool",
+    "connects": "Connexions ouvertes vers la base",
+    "invalidations": "Connexions invalidées (coupées par le serveur, pre-ping en échec)",
+    "timeouts": "Demandes de connexion abandonnées après pool_timeout",
+}
+
+# Compteurs SQL de la requête HTTP en cours : [nombre, durée totale]
+_sql_courant: ContextVar[Optional[list]] = ContextVar("recyco_sql_courant", default=None)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histogramme cumulatif (compte par seuil, somme et nombre d'observations)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, seuil in enumerate(self.buckets):
+            if value <= seuil:
+                self.counts[i] += 1
+                break
+
+
+class MetricsRegistry:
+    """
+    Mesures de performance accumulées depuis le démarrage du processus.
+
+    Attributes:
+        prefix (str): Préfixe des noms de métriques exportées
+    """
+
+    def __init__(self, prefix: str = "recyco") -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._durations: Dict[Labels, Histogram] = {}
+        self._sql_counts: Dict[Labels, Histogram] = {}
+        self._sql_seconds: Dict[Labels, float] = {}
+        self._statuses: Dict[Labels, int] = {}
+        self._pool_engine = None
+        self._pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self._pool_counters = dict.fromkeys(POOL_COUNTERS, 0)
+        self._log_handler = None
+        self._token_cache = None
+
+    def observe_request(self, blueprint, route, method, status, seconds, sql_count, sql_seconds) -> None:
+        """
+        Enregistre une requête HTTP terminée.
+
+        Args:
+            blueprint (str): Nom du blueprint ("app" pour les routes de run.py)
+            route (str): Règle Flask de la route
+            method (str): Méthode HTTP
+            status (int): Code HTTP renvoyé
+            seconds (float): Durée de traitement
+            sql_count (int): Nombre de requêtes SQL exécutées
+            sql_seconds (float): Durée cumulée de ces requêtes SQL
+        """
+        labels = (("blueprint", blueprint), ("route", route), ("method", method))
+        with self._lock:
+            histogramme = self._durations.get(labels)
+            if histogramme is None:
+                histogramme = self._durations[labels] = Histogram(LATENCY_BUCKETS)
+                self._sql_counts[labels] = Histogram(SQL_COUNT_BUCKETS)
+                self._sql_seconds[labels] = 0.0
+            histogramme.observe(seconds)
+            self._sql_counts[labels].observe(sql_count)
+            self._sql_seconds[labels] += sql_seconds
+
+            cle = labels + (("status", str(status)),)
+            self._statuses[cle] = self._statuses.get(cle, 0) + 1
+
+    def observe_pool_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """
+        Enregistre une demande de connexion au pool.
+
+        Args:
+            seconds (float): Temps passé à obtenir (ou à attendre) la connexion
+            timed_out (bool, optional): True si l'attente a dépassé pool_timeout
+        """
+        with self._lock:
+            self._pool_wait.observe(seconds)
+            if timed_out:
+                self._pool_counters["timeouts"] += 1
+
+    def count_pool_event(self, name: str) -> None:
+        """Incrémente un compteur du pool (clé de POOL_COUNTERS)."""
+        with self._lock:
+            self._pool_counters[name] += 1
+
+    def track_log_handler(self, handler) -> None:
+        """Exporte le nombre d'enregistrements de journal abandonnés (file pleine)."""
+        self._log_handler = handler
+
+    def track_token_cache(self, cache) -> None:
+        """Exporte les compteurs du cache des tokens vérifiés (utils/token_cache.py)."""
+        self._token_cache = cache
+
+    def render(self) -> str:
+        """
+        Exporte toutes les mesures au format texte Prometheus (version 0.0.4).
+
+        Returns:
+            str: Contenu de la réponse /metrics
+        """
+        p = self.prefix
+        lignes = []
+        with self._lock:
+            self._render_histograms(
+                lignes, f"{p}_http_request_duration_seconds",
+                "Durée de traitement des requêtes HTTP", self._durations
+            )
+            lignes.append(f"# HELP {p}_http_requests_total Requêtes HTTP traitées, par code de réponse")
+            lignes.append(f"# TYPE {p}_http_requests_total counter")
+            for labels, valeur in sorted(self._statuses.items()):
+                lignes.append(f"{p}_http_requests_total{_format_labels(labels)} {valeur}")
+
+            self._render_histograms(
+                lignes, f"{p}_sql_statements_per_request",
+                "Nombre de requêtes SQL exécutées par requête HTTP", self._sql_counts
+            )
+            lignes.append(f"# HELP {p}_sql_duration_seconds_total Durée cumulée des requêtes SQL")
+            lignes.append(f"# TYPE {p}_sql_duration_seconds_total counter")
+            for labels, valeur in sorted(self._sql_seconds.items()):
+                lignes.append(f"{p}_sql_duration_seconds_total{_format_labels(labels)} {valeur:.6f}")
+
+            if self._pool_engine is not None:
+                self._render_pool(lignes)
+
+            if self._token_cache is not None:
+                stats = self._token_cache.stats()
+                for nom, type_, description in (
+                    ("hits_total", "counter", "Tokens d'accès servis par le cache (vérification évitée)"),
+                    ("misses_total", "counter", "Tokens d'accès vérifiés (signature et claims)"),
+                    ("size", "gauge", "Tokens d'accès gardés dans le cache"),
+                ):
+                    lignes.append(f"# HELP {p}_token_cache_{nom} {description}")
+                    lignes.append(f"# TYPE {p}_token_cache_{nom} {type_}")
+                    lignes.append(f"{p}_token_cache_{nom} {stats[nom.replace('_total', '')]}")
+
+            if self._log_handler is not None:
+                lignes.append(f"# HELP {p}_log_records_dropped_total Enregistrements de journal abandonnés (file pleine)")
+                lignes.append(f"# TYPE {p}_log_records_dropped_total counter")
+                lignes.append(f"{p}_log_records_dropped_total {self._log_handler.dropped}")
+
+        return "\n".join(lignes) + "\n"
+
+    def _render_pool(self, lignes) -> None:
+        p = self.prefix
+        # Pool relu à chaque export : engine.dispose() peut l'avoir remplacé
+        pool = self._pool_engine.pool
+        if isinstance(pool, QueuePool):
+            for nom, description, valeur in (
+                ("db_pool_size", "Connexions gardées ouvertes par le pool", pool.size()),
+                ("db_pool_checked_out", "Connexions actuellement empruntées", pool.checkedout()),
+                ("db_pool_overflow", "Connexions ouvertes au-delà de pool_size", max(pool.overflow(), 0)),
+            ):
+                lignes.append(f"# HELP {p}_{nom} {description}")
+                lignes.append(f"# TYPE {p}_{nom} gauge")
+                lignes.append(f"{p}_{nom} {valeur}")
+
+        for nom, description in POOL_COUNTERS.items():
+            lignes.append(f"# HELP {p}_db_pool_{nom}_total {description}")
+            lignes.append(f"# TYPE {p}_db_pool_{nom}_total counter")
+            lignes.append(f"{p}_db_pool_{nom}_total {self._pool_counters[nom]}")
+
+        self._render_histograms(
+            lignes, f"{p}_db_pool_wait_seconds",
+            "Temps d'obtention d'une connexion du pool", {(): self._pool_wait}
+        )
+
+    @staticmethod
+    def _render_histograms(lignes, name, description, histogrammes) -> None:
+        lignes.append(f"# HELP {name} {description}")
+        lignes.append(f"# TYPE {name} histogram")
+        for labels, histogramme in sorted(histogrammes.items()):
+            cumul = 0
+            for seuil, compte in zip(histogramme.buckets, histogramme.counts):
+                cumul += compte
+                lignes.append(f"{name}_bucket{_format_labels(labels + (('le', _format_number(seuil)),))} {cumul}")
+            lignes.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogramme.count}")
+            lignes.append(f"{name}_sum{_format_labels(labels)} {histogramme.sum:.6f}")
+            lignes.append(f"{name}_count{_format_labels(labels)} {histogramme.count}")
+
+
+def _format_number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{cle}="{_escape(valeur)}"' for cle, valeur in labels) + "}"
+
+
+# ---------- Événements SQL ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_courant.get() is not None:
+        conn.info.setdefault("recyco_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    compteurs = _sql_courant.get()
+    if compteurs is None:
+        return
+    debuts = conn.info.get("recyco_query_start")
+    if debuts:
+        compteurs[0] += 1
+        compteurs[1] += time.perf_counter() - debuts.pop()
+
+
+# ---------- Pool de connexions ----------
+
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool qui mesure le temps d'obtention de chaque connexion.
+
+    SQLAlchemy n'émet aucun événement avant l'attente d'une connexion
+    libre : la durée est mesurée autour de connect(). Sans registre attaché
+    (mesures désactivées), le pool se comporte exactement comme QueuePool.
+    """
+
+    registry: Optional[MetricsRegistry] = None
+
+    def connect(self):
+        if self.registry is None:
+            return super().connect()
+        debut = time.perf_counter()
+        try:
+            connexion = super().connect()
+        except PoolTimeoutError:
+            self.registry.observe_pool_wait(time.perf_counter() - debut, timed_out=True)
+            raise
+        self.registry.observe_pool_wait(time.perf_counter() - debut)
+        return connexion
+
+    def recreate(self):
+        # engine.dispose() remplace le pool : les mesures continuent sur le nouveau
+        nouveau = super().recreate()
+        nouveau.registry = self.registry
+        return nouveau
+
+
+def init_pool_metrics(engine, registry: MetricsRegistry) -> None:
+    """
+    Exporte l'état du pool de connexions d'un moteur sur /metrics.
+
+    Args:
+        engine: Moteur SQLAlchemy (db.engine)
+        registry (MetricsRegistry): Registre qui accumule les mesures
+    """
+    registry._pool_engine = engine
+    event.listen(engine, "checkout", lambda *args: registry.count_pool_event("checkouts"))
+    event.listen(engine, "connect", lambda *args: registry.count_pool_event("connects"))
+    event.listen(engine, "invalidate", lambda *args: registry.count_pool_event("invalidations"))
+    if isinstance(engine.pool, MeteredQueuePool):
+        engine.pool.registry = registry
+
+
+# ---------- Middleware Flask ----------
+
+def init_metrics(app: Flask, registry: MetricsRegistry) -> None:
+    """
+    Active la mesure des requêtes HTTP et SQL pour une application.
+
+    Args:
+        app (Flask): Application à instrumenter
+        registry (MetricsRegistry): Registre qui accumule les mesures
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql = [0, 0.0]
+        g._metrics_token = _sql_courant.set(g._metrics_sql)
+
+    @app.after_request
+    def _metrics_record(response):
+        debut = g.pop("_metrics_start", None)
+        if debut is None:
+            return response
+        duree = time.perf_counter() - debut
+        sql_count, sql_seconds = g.pop("_metrics_sql")
+
+        # Règle de la route plutôt que l'URL : nombre de séries borné
+        route = request.url_rule.rule if request.url_rule is not None else "<non trouvée>"
+        registry.observe_request(
+            request.blueprint or "app", route, request.method,
+            response.status_code, duree, sql_count, sql_seconds
+        )
+        return response
+
+    @app.teardown_request
+    def _metrics_cleanup(exc):
+        token = g.pop("_metrics_token", None)
+        if token is not None:
+            _sql_courant.reset(token)
@@ -0,0 +1,173 @@
+"""
+Exécuteur des opérations bcrypt pour Récy&Co.
+
+Le hashage et la vérification d'un mot de passe bcrypt prennent environ
+250 ms de CPU. Exécutés directement dans le thread de la requête, une
+vague de connexions (toute une classe qui se connecte à 9h00) occupe les
+workers du serveur et retarde les autres routes (envoi des scores...).
+
+Ce module déporte ces calculs dans un pool de processus dimensionné sur
+le nombre de cœurs, avec une file d'attente bornée : au-delà, la demande
+est refusée (PasswordExecutorBusy → HTTP 503) au lieu de s'empiler.
+
+Les processus du pool sont créés par un serveur « forkserver » (ou
+« spawn » si la plateforme ne le propose pas), jamais par fork() du
+processus serveur : celui-ci a des threads (worker de badges, serveur
+threadé) et des connexions DB ouvertes qu'un fork recopierait dans un état
+incohérent (verrous pris, risque d'interblocage). Si le pool casse (processus
+tué), l'opération est refaite dans le thread de la requête.
+
+Modes (PASSWORD_EXECUTOR_MODE) :
+    process: pool de processus (par défaut, contourne le GIL)
+    thread: pool de threads (bcrypt libère le GIL pendant le calcul)
+    inline: exécution directe dans la requête, sans limite (tests, scripts)
+
+Classes:
+    PasswordExecutorBusy: Levée quand la file d'attente est pleine
+    PasswordExecutor: Pool borné pour hash_password / verify_password
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils import security
+
+logger = logging.getLogger(__name__)
+
+MODES = ("process", "thread", "inline")
+
+
+class PasswordExecutorBusy(Exception):
+    """Trop d'opérations de mot de passe en cours : réessayer plus tard."""
+
+
+class PasswordExecutor:
+    """
+    Pool borné pour les opérations bcrypt.
+
+    Au plus `max_workers` calculs tournent en parallèle et `max_pending`
+    attendent leur tour. Une demande supplémentaire attend une place au
+    plus `queue_timeout` secondes, puis PasswordExecutorBusy est levée.
+
+    Le pool est créé par start(), appelé au démarrage de l'application (ou
+    à défaut à la première utilisation), pas à l'import.
+
+    Attributes:
+        mode (str): process, thread ou inline
+        max_workers (int): Nombre de calculs simultanés
+        max_pending (int): Nombre de demandes en attente acceptées
+        queue_timeout (float): Attente maximale d'une place dans la file (secondes)
+    """
+
+    def __init__(self, mode="process", max_workers=None, max_pending=None, queue_timeout=0.5):
+        """
+        Initialise l'exécuteur (sans créer le pool).
+
+        Args:
+            mode (str, optional): process, thread ou inline (par défaut process)
+            max_workers (int, optional): Calculs simultanés (par défaut : nombre de cœurs)
+            max_pending (int, optional): Demandes en attente (par défaut : 4 × max_workers)
+            queue_timeout (float, optional): Attente max d'une place en secondes (par défaut 0.5)
+        """
+        if mode not in MODES:
+            raise ValueError(f"PASSWORD_EXECUTOR_MODE invalide : {mode} (attendu : {', '.join(MODES)})")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = self.max_workers * 4 if max_pending is None else max_pending
+        self.queue_timeout = queue_timeout
+
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def hash_password(self, password):
+        """
+        Hache un mot de passe (voir utils.security.hash_password).
+
+        Raises:
+            PasswordExecutorBusy: Si la file d'attente est pleine
+        """
+        return self.run(security.hash_password, password)
+
+    def verify_password(self, password, hashed_password):
+        """
+        Vérifie un mot de passe (voir utils.security.verify_password).
+
+        Raises:
+            PasswordExecutorBusy: Si la file d'attente est pleine
+        """
+        return self.run(security.verify_password, password, hashed_password)
+
+    def run(self, fn, *args):
+        """
+        Exécute fn(*args) dans le pool et attend son résultat.
+
+        Args:
+            fn: Fonction à exécuter (définie au niveau d'un module en mode process)
+            *args: Arguments de la fonction
+
+        Returns:
+            Le résultat de fn(*args)
+
+        Raises:
+            PasswordExecutorBusy: Si aucune place ne s'est libérée à temps
+        """
+        if self.mode == "inline":
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordExecutorBusy()
+        try:
+            pool = self._get_pool()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenExecutor:
+                # Processus du pool tué (OOM...) : le pool sera recréé au prochain
+                # appel, celui-ci est traité dans le thread de la requête
+                logger.warning("Pool bcrypt cassé : recréé, opération exécutée dans la requête")
+                self._discard_pool(pool)
+                return fn(*args)
+        finally:
+            self._slots.release()
+
+    def start(self):
+        """Crée le pool s'il n'existe pas (sans effet en mode inline)."""
+        if self.mode != "inline":
+            self._get_pool()
+
+    def shutdown(self):
+        """Arrête le pool (les calculs en cours sont terminés)."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+    def _discard_pool(self, pool):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.mode == "process":
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers, mp_context=_process_context()
+                        )
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="password"
+                        )
+        return self._pool
+
+
+def _process_context():
+    """Contexte multiprocessing sans fork() du processus serveur."""
+    methode = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(methode)
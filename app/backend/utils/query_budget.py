@@ -0,0 +1,125 @@
+"""
+Budget de requêtes SQL des services de Récy&Co.
+
+Chaque méthode publique d'un service déclare, avec le décorateur
+@query_budget(n), le nombre maximal de requêtes SQL qu'elle exécute sur son
+chemin normal (premier appel compris : caches vides, première partie d'un
+joueur...). Le budget est compté pour MySQL, le pire cas : sans UPDATE ...
+RETURNING, adjust_total_score() fait une requête de plus que sous SQLite.
+
+Le décorateur ne fait que poser un attribut sur la fonction : aucun coût à
+l'exécution. Les tests (tests/backend/test_query_budget.py) comptent les
+requêtes réellement exécutées avec QueryCounter et échouent si une
+modification dépasse le budget déclaré (requête ajoutée dans une boucle,
+relation chargée paresseusement : N+1).
+
+Classes:
+    QueryBudgetExceeded: Levée quand un bloc dépasse son budget
+    QueryCounter: Compte les requêtes SQL exécutées par le thread courant
+
+Functions:
+    query_budget: Déclare le budget de requêtes d'une méthode
+    get_query_budget: Lit le budget déclaré d'une méthode
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Nom de l'attribut posé par @query_budget sur la fonction décorée
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Déclare le nombre maximal de requêtes SQL d'une méthode de service.
+
+    Args:
+        max_queries (int): Nombre de requêtes autorisées (0 = aucun accès DB)
+
+    Returns:
+        callable: Décorateur qui retourne la fonction inchangée
+    """
+    if not isinstance(max_queries, int) or max_queries < 0:
+        raise ValueError("max_queries doit être un entier positif ou nul")
+
+    def decorateur(fn):
+        setattr(fn, BUDGET_ATTRIBUTE, max_queries)
+        return fn
+
+    return decorateur
+
+
+def get_query_budget(fn) -> Optional[int]:
+    """
+    Retourne le budget déclaré d'une fonction ou méthode (None si aucun).
+
+    Args:
+        fn: Fonction, méthode liée ou non liée
+
+    Returns:
+        int | None: Budget déclaré par @query_budget
+    """
+    return getattr(getattr(fn, "__func__", fn), BUDGET_ATTRIBUTE, None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un bloc de code a exécuté plus de requêtes SQL que son budget."""
+
+
+class QueryCounter:
+    """
+    Compte les requêtes SQL exécutées dans un bloc `with`.
+
+    Seules les requêtes du thread courant sont comptées : celles des threads
+    de fond (BadgeWorker en mode thread...) ne faussent pas la mesure.
+
+    Exemple :
+        with QueryCounter() as compteur:
+            score_service.get_user_stats(user_id)
+        compteur.assert_at_most(2)
+
+    Attributes:
+        statements (list): Texte SQL des requêtes exécutées, dans l'ordre
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self._thread_id = threading.get_ident()
+
+    @property
+    def count(self) -> int:
+        """Nombre de requêtes exécutées depuis l'entrée dans le bloc."""
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        self._thread_id = threading.get_ident()
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if threading.get_ident() == self._thread_id:
+            self.statements.append(statement)
+
+    def assert_at_most(self, budget: int, label: str = "bloc") -> None:
+        """
+        Vérifie que le bloc n'a pas dépassé son budget.
+
+        Args:
+            budget (int): Nombre de requêtes autorisées
+            label (str, optional): Nom du bloc mesuré (pour le message d'erreur)
+
+        Raises:
+            QueryBudgetExceeded: Si plus de `budget` requêtes ont été exécutées
+        """
+        if self.count > budget:
+            detail = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(self.statements, 1))
+            raise QueryBudgetExceeded(
+                f"{label} : {self.count} requêtes SQL pour un budget de {budget}\n{detail}"
+            )
@@ -0,0 +1,145 @@
+"""
+Routage lecture/écriture vers un réplica pour Récy&Co.
+
+Avec REPLICA_DATABASE_URL, la base secondaire est déclarée comme bind
+"replica" de Flask-SQLAlchemy. La session de db (RoutingSession) choisit
+la connexion de chaque requête SQL :
+- SELECT exécutés dans une méthode de service marquée @replica_read (ou
+  dans un bloc `with reads_from_replica():`) : réplica
+- tout le reste (écritures, flush, SELECT ... FOR UPDATE, lectures hors
+  méthodes marquées) : base principale
+
+Lecture de ses propres écritures : un réplica a quelques instants de retard.
+Dès qu'une requête HTTP écrit sur la base principale, ses lectures suivantes
+restent sur la base principale, et la réponse pose un cookie qui y garde les
+requêtes du même client pendant REPLICA_STICKY_SECONDS secondes (le cookie
+vaut pour tous les workers, contrairement à un état en mémoire).
+
+Sans REPLICA_DATABASE_URL, tout va sur la base principale.
+
+Classes:
+    RoutingSession: Session Flask-SQLAlchemy qui envoie les lectures marquées au réplica
+
+Functions:
+    replica_read: Décorateur des méthodes de service en lecture seule
+    reads_from_replica: Active ou désactive le réplica dans un bloc `with`
+    init_read_routing: Branche le cookie de lecture de ses écritures sur une application
+"""
+
+import functools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+import sqlalchemy as sa
+from flask import g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session as FlaskSession
+
+REPLICA_BIND = "replica"
+STICKY_COOKIE = "recyco_primary_until"
+
+_replica_read: ContextVar[bool] = ContextVar("replica_read", default=False)
+
+
+def replica_read(fn: Callable) -> Callable:
+    """
+    Marque une méthode de service en lecture seule : ses SELECT vont au réplica.
+
+    Args:
+        fn: Méthode de service (ne doit pas écrire en base)
+
+    Returns:
+        callable: Méthode exécutée avec le réplica activé
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with reads_from_replica():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def reads_from_replica(enabled: bool = True):
+    """
+    Envoie (ou non) au réplica les SELECT exécutés dans le bloc.
+
+    Args:
+        enabled (bool, optional): False force la base principale, même dans
+            une méthode marquée @replica_read (ex : données gardées en mémoire
+            par le worker, qui ne doivent pas revenir en arrière)
+    """
+    token = _replica_read.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_read.reset(token)
+
+
+class RoutingSession(FlaskSession):
+    """Session de db : lectures marquées vers le bind "replica", le reste vers la base principale."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and self._flushing) or isinstance(clause, sa.sql.expression.UpdateBase):
+            _mark_primary_write()
+        elif bind is None and self._replica_allowed(clause):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_allowed(self, clause) -> bool:
+        return (
+            _replica_read.get()
+            and isinstance(clause, sa.Select)
+            and clause._for_update_arg is None
+            and not _primary_forced()
+        )
+
+
+def _mark_primary_write() -> None:
+    if has_app_context():
+        g._primary_write = True
+
+
+def _primary_forced() -> bool:
+    """Lecture de ses propres écritures : requête qui a écrit, ou cookie encore valide."""
+    if not has_app_context():
+        return False
+    if g.get("_primary_write"):
+        return True
+    if not has_request_context():
+        return False
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def init_read_routing(app) -> None:
+    """
+    Pose le cookie de lecture de ses écritures après chaque requête qui a écrit.
+
+    Sans réplica configuré (REPLICA_DATABASE_URL vide), rien n'est branché.
+
+    Args:
+        app (Flask): Application dont la session de db est une RoutingSession
+    """
+    if not app.config.get("REPLICA_DATABASE_URL"):
+        return
+    sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+
+    @app.after_request
+    def poser_cookie_primaire(response):
+        if g.get("_primary_write"):
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{time.time() + sticky_seconds:.3f}",
+                max_age=math.ceil(sticky_seconds),
+                httponly=True,
+                samesite="Lax",
+                secure=app.config.get("SESSION_COOKIE_SECURE", False)
+            )
+        return response
@@ -0,0 +1,194 @@
+"""
+Révocation des refresh tokens pour Récy&Co.
+
+Chaque refresh token porte un identifiant unique (claim jti). Un token est
+révoqué quand il est utilisé (rotation : /api/refresh en délivre un
+nouveau) ou à la déconnexion. Les révocations sont enregistrées dans la
+table revoked_tokens, et un filtre de Bloom en mémoire les résume :
+- « absent du filtre » : le token n'a pas été révoqué par ce processus ni
+  avant son démarrage ; réponse sans requête SQL (cas courant)
+- « peut-être présent » : confirmation par une lecture de la table (le
+  filtre a quelques faux positifs, jamais de faux négatif)
+
+Le filtre est construit depuis la table au premier usage (is_revoked ou
+revoke), sans écriture : le démarrage d'une application (commandes CLI,
+migrations, scripts) ne touche pas à la table. Il est ensuite reconstruit
+toutes les `prune_seconds` secondes, après suppression des lignes dont le
+token a expiré (un filtre de Bloom ne sait pas retirer une entrée), ou à
+la demande par la commande `prune-revoked-tokens`.
+
+Une révocation faite par un autre worker n'est pas dans le filtre local :
+c'est la clé primaire de revoked_tokens qui garantit qu'un refresh token
+ne sert qu'une fois (revoke() retourne False au deuxième essai).
+
+Classes:
+    BloomFilter: Ensemble probabiliste compact (ajout et test d'appartenance)
+    RevocationStore: Révocations en base, filtrées en mémoire
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from db.models import RevokedToken
+
+
+class BloomFilter:
+    """
+    Filtre de Bloom : `key in filtre` est toujours vrai pour une clé ajoutée,
+    et faux avec une probabilité d'environ 1 - error_rate pour les autres.
+
+    Attributes:
+        capacity (int): Nombre de clés prévu
+        size (int): Nombre de bits du filtre
+        hashes (int): Nombre de positions testées par clé
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hachage : k positions tirées de deux entiers de 64 bits
+        empreinte = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(empreinte[:8], "little")
+        h2 = int.from_bytes(empreinte[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """
+    Refresh tokens révoqués : table revoked_tokens + filtre de Bloom local.
+
+    Attributes:
+        db: Instance SQLAlchemy
+        capacity (int): Taille minimale du filtre (révocations non expirées prévues)
+        error_rate (float): Taux de faux positifs visé
+        prune_seconds (float): Intervalle entre deux purges des révocations expirées
+    """
+
+    def __init__(self, db, capacity: int = 100000, error_rate: float = 0.01, prune_seconds: float = 3600) -> None:
+        """
+        Initialise un store vide (chargé au premier usage ou par rebuild()).
+
+        Args:
+            db: Instance SQLAlchemy
+            capacity (int, optional): Taille minimale du filtre
+            error_rate (float, optional): Taux de faux positifs visé (par défaut 1 %)
+            prune_seconds (float, optional): Intervalle entre deux purges (par défaut 1 h)
+        """
+        self.db = db
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.prune_seconds = prune_seconds
+
+        self._filter = None
+        self._rebuilt_at = None
+        self._lock = threading.Lock()
+
+    def rebuild(self) -> int:
+        """
+        Supprime les révocations expirées et reconstruit le filtre depuis la table.
+
+        Returns:
+            int: Nombre de révocations encore actives
+        """
+        with self._lock:
+            return self._rebuild()
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Indique si un token a été révoqué.
+
+        Args:
+            jti (str): Claim jti du token
+
+        Returns:
+            bool: True si le token est révoqué (confirmé par la table)
+        """
+        filtre = self._current_filter()
+        if jti not in filtre:
+            return False
+        return self.db.session.execute(
+            select(RevokedToken.jti).where(RevokedToken.jti == jti)
+        ).first() is not None
+
+    def revoke(self, jti: str, user_id: int, expires_at: float) -> bool:
+        """
+        Révoque un token (dans la transaction en cours, validée ici).
+
+        Args:
+            jti (str): Claim jti du token
+            user_id (int): Utilisateur du token
+            expires_at (float): Claim exp du token (secondes epoch)
+
+        Returns:
+            bool: True si le token vient d'être révoqué, False s'il l'était déjà
+        """
+        filtre = self._current_filter()
+        try:
+            self.db.session.execute(insert(RevokedToken).values(
+                jti=jti,
+                user_id=user_id,
+                expires_at=datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+            ))
+            self.db.session.commit()
+        except IntegrityError:
+            self.db.session.rollback()
+            filtre.add(jti)
+            return False
+        filtre.add(jti)
+        return True
+
+    def _current_filter(self) -> BloomFilter:
+        if self._rebuild_due():
+            with self._lock:
+                # Un autre thread a pu reconstruire le filtre pendant l'attente du verrou
+                if self._filter is None:
+                    self._load()
+                elif self._rebuild_due():
+                    self._rebuild()
+        return self._filter
+
+    def _rebuild_due(self) -> bool:
+        return self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= self.prune_seconds
+
+    def _rebuild(self) -> int:
+        self.db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= _utcnow()))
+        self.db.session.commit()
+        return self._load()
+
+    def _load(self) -> int:
+        # Premier usage : lecture seule, la purge attend la prochaine échéance
+        jtis = self.db.session.execute(select(RevokedToken.jti)).scalars().all()
+        self._filter = self._build_filter(jtis)
+        self._rebuilt_at = time.monotonic()
+        return len(jtis)
+
+    def _build_filter(self, jtis: Iterable[str]) -> BloomFilter:
+        jtis = list(jtis)
+        # Marge pour les révocations à venir avant la prochaine purge
+        filtre = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+        for jti in jtis:
+            filtre.add(jti)
+        return filtre
+
+
+def _utcnow():
+    """Date UTC sans fuseau, comme les colonnes DateTime."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
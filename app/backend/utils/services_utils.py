@@ -8,6 +8,8 @@ et récupérations d'entités courantes.
 
 from typing import Any, Dict, Optional, Tuple
 
+from sqlalchemy import select, update
+
 from db.models import User
 
 
@@ -115,3 +117,45 @@ def validate_limit(limit) -> Optional[Dict[str, Any]]:
             "status_code": 400
         }
     return None
+
+def adjust_total_score(db, user_id: int, delta, minimum=None) -> Optional[int]:
+    """
+    Modifie le score total d'un utilisateur par un UPDATE atomique côté serveur.
+
+    Exécute `UPDATE users SET total_score = total_score + :delta WHERE id = :user_id`
+    (avec `AND total_score >= :minimum` si demandé) au lieu de charger
+    l'utilisateur puis de faire le calcul en Python : deux requêtes
+    simultanées ne peuvent pas s'écraser. Le commit est laissé à l'appelant.
+
+    Args:
+        db: Instance SQLAlchemy (self.db depuis un service)
+        user_id (int): Identifiant de l'utilisateur
+        delta: Variation du score (int ou expression SQL, négative pour un débit)
+        minimum (optional): Score total minimal exigé avant modification
+            (int ou expression SQL, ex : prix d'un article)
+
+    Returns:
+        int | None: Nouveau score total, ou None si aucune ligne n'a été
+            modifiée (utilisateur introuvable ou score inférieur au minimum)
+
+    Note:
+        Le nouveau total est lu avec RETURNING quand le moteur le permet
+        (SQLite, PostgreSQL), sinon (MySQL, MariaDB) par un SELECT dans la
+        même transaction, la ligne étant alors verrouillée par l'UPDATE.
+    """
+
+    requete = (
+        update(User)
+        .where(User.id == user_id)
+        .values(total_score=User.total_score + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if minimum is not None:
+        requete = requete.where(User.total_score >= minimum)
+
+    if db.engine.dialect.update_returning:
+        return db.session.execute(requete.returning(User.total_score)).scalar()
+
+    if db.session.execute(requete).rowcount == 0:
+        return None
+    return db.session.execute(select(User.total_score).where(User.id == user_id)).scalar()
@@ -0,0 +1,47 @@
+"""
+Réglages SQLite du profil local (config.LocalConfig).
+
+Les PRAGMA sont appliqués à chaque nouvelle connexion du pool (la plupart
+ne valent que pour la connexion qui les exécute) :
+- journal_mode=WAL : les lectures ne bloquent plus l'écriture en cours
+  (mémorisé dans le fichier ; sans effet sur une base en mémoire)
+- synchronous=NORMAL : en WAL, pas de fsync à chaque commit, sans risque
+  de corruption (seuls les derniers commits peuvent être perdus en cas de
+  coupure de courant)
+- cache_size, mmap_size : cache de pages et lecture par projection mémoire
+- busy_timeout : un écrivain attend le verrou au lieu d'échouer tout de suite
+
+Functions:
+    init_sqlite_pragmas: Applique des PRAGMA à chaque connexion d'un moteur SQLite
+"""
+
+from typing import Dict, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def init_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Union[str, int]]) -> bool:
+    """
+    Applique des PRAGMA à chaque connexion ouverte par le moteur.
+
+    Args:
+        engine (Engine): Moteur SQLAlchemy (ignoré s'il ne s'agit pas de SQLite)
+        pragmas (dict): Nom du PRAGMA -> valeur, ex : {"journal_mode": "WAL"}
+
+    Returns:
+        bool: True si les PRAGMA ont été branchés (moteur SQLite)
+    """
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return False
+
+    @event.listens_for(engine, "connect")
+    def _appliquer_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nom, valeur in pragmas.items():
+                cursor.execute(f"PRAGMA {nom}={valeur}")
+        finally:
+            cursor.close()
+
+    return True
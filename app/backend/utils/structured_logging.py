@@ -0,0 +1,265 @@
+"""
+Journalisation structurée et non bloquante de l'API Récy&Co.
+
+Les modules journalisent avec le module logging standard
+(logger = logging.getLogger(__name__)). init_logging() branche sur le
+logger racine un QueueHandler : le thread de la requête ne fait que
+déposer l'enregistrement dans une file bornée, un QueueListener
+(thread de fond) le met en forme et l'écrit sur la sortie standard.
+
+- Format : une ligne JSON par enregistrement (ts, level, logger, message,
+  request_id, plus les champs passés dans extra={...})
+- Identifiant de requête : en-tête X-Request-ID reçu s'il est court et
+  sans caractère spécial (REQUEST_ID_PATTERN), sinon généré ; renvoyé dans
+  la réponse et ajouté à chaque enregistrement de la requête
+- Journal des requêtes (logger recyco.requests) : méthode, route, code
+  HTTP et durée en millisecondes
+- Échantillonnage par logger (LOG_SAMPLING) des enregistrements sous
+  WARNING, pour les événements de debug très fréquents
+- File pleine (sortie trop lente) : l'enregistrement est abandonné et
+  compté, la requête n'attend jamais l'écriture
+
+Classes:
+    JsonFormatter: Met en forme un enregistrement en une ligne JSON
+    RequestContextFilter: Ajoute l'identifiant de la requête en cours
+    SamplingFilter: Garde une fraction des enregistrements de certains loggers
+    DroppingQueueHandler: QueueHandler qui abandonne au lieu de bloquer
+
+Functions:
+    init_logging: Installe la file de journalisation et le journal des requêtes
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from flask import Flask, g, has_request_context, request
+
+# Logger du journal des requêtes HTTP
+REQUEST_LOGGER = "recyco.requests"
+
+# X-Request-ID accepté tel quel : ni valeur géante, ni retour à la ligne ou
+# caractère de contrôle qui fabriquerait de fausses lignes dans le journal
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+# Attributs propres à tout LogRecord : les autres viennent de extra={...}
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+# Handler installé sur le logger racine (un par processus)
+_handler: Optional["DroppingQueueHandler"] = None
+_handler_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement, champs extra={...} compris."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entree = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for cle, valeur in vars(record).items():
+            if cle not in _RECORD_ATTRS and not cle.startswith("_"):
+                entree[cle] = valeur
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entree["exception"] = record.exc_text
+        return json.dumps(entree, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Ajoute request_id aux enregistrements émis pendant une requête HTTP."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id") and has_request_context():
+            request_id = g.get("request_id")
+            if request_id is not None:
+                record.request_id = request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Garde une fraction des enregistrements sous WARNING de certains loggers.
+
+    Le taux du logger le plus précis s'applique : avec {"services": 0.5,
+    "services.score_service": 0.1}, services.score_service garde 10 % de
+    ses enregistrements, services.shop_service 50 %. Les avertissements
+    et les erreurs sont toujours gardés.
+
+    Attributes:
+        rates (dict): Nom de logger -> fraction gardée (0 à 1)
+    """
+
+    def __init__(self, rates: Dict[str, float]) -> None:
+        super().__init__()
+        self.rates = dict(rates)
+        self._par_logger: Dict[str, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        taux = self._par_logger.get(record.name)
+        if taux is None:
+            taux = self._par_logger[record.name] = self._rate_for(record.name)
+        return taux >= 1 or random.random() < taux
+
+    def _rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler sur une file bornée : file pleine, l'enregistrement est abandonné.
+
+    Attributes:
+        dropped (int): Enregistrements abandonnés depuis le démarrage
+    """
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Message et trace calculés ici (les arguments peuvent changer ensuite),
+        # mais laissés dans des champs séparés pour le JsonFormatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler qui relit sys.stdout à chaque écriture (sortie redirigée, tests)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _):
+        pass
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """
+    Lit LOG_SAMPLING : "logger=taux,logger=taux".
+
+    Args:
+        value (str): Ex : "services.score_service=0.1,recyco.requests=0.5"
+
+    Returns:
+        dict: Nom de logger -> fraction gardée
+    """
+    rates = {}
+    for paire in value.split(","):
+        nom, _, taux = paire.partition("=")
+        if nom.strip() and taux.strip():
+            rates[nom.strip()] = min(max(float(taux), 0.0), 1.0)
+    return rates
+
+
+def _install(level: str, queue_size: int, json_format: bool, sampling: Dict[str, float]) -> "DroppingQueueHandler":
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            sortie = _StdoutHandler()
+            sortie.setFormatter(JsonFormatter() if json_format else logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s", defaults={"request_id": "-"}
+            ))
+            _handler = DroppingQueueHandler(queue_size)
+            _handler.addFilter(RequestContextFilter())
+            listener = QueueListener(_handler.queue, sortie, respect_handler_level=True)
+            listener.start()
+            # Les enregistrements encore en file sont écrits avant l'arrêt du processus
+            atexit.register(listener.stop)
+            logging.getLogger().addHandler(_handler)
+
+        # Réglages de la dernière application construite
+        for filtre in [f for f in _handler.filters if isinstance(f, SamplingFilter)]:
+            _handler.removeFilter(filtre)
+        if sampling:
+            _handler.addFilter(SamplingFilter(sampling))
+        logging.getLogger().setLevel(level.upper())
+        return _handler
+
+
+def init_logging(app: Flask, registry=None) -> DroppingQueueHandler:
+    """
+    Installe la journalisation structurée et le journal des requêtes d'une application.
+
+    Args:
+        app (Flask): Application (réglages LOG_* de sa configuration)
+        registry (MetricsRegistry, optional): Registre /metrics où exporter
+            le nombre d'enregistrements abandonnés
+
+    Returns:
+        DroppingQueueHandler: Handler installé sur le logger racine
+    """
+    handler = _install(
+        app.config["LOG_LEVEL"],
+        app.config["LOG_QUEUE_SIZE"],
+        app.config["LOG_FORMAT"] == "json",
+        parse_sampling(app.config["LOG_SAMPLING"]),
+    )
+    if registry is not None:
+        registry.track_log_handler(handler)
+
+    request_logger = logging.getLogger(REQUEST_LOGGER)
+
+    @app.before_request
+    def _log_start():
+        recu = request.headers.get("X-Request-ID", "")
+        g.request_id = recu if REQUEST_ID_PATTERN.fullmatch(recu) else uuid.uuid4().hex
+        g._log_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        debut = g.pop("_log_start", None)
+        if debut is None:
+            return response
+        response.headers["X-Request-ID"] = g.request_id
+        if app.config["LOG_REQUESTS"]:
+            route = request.url_rule.rule if request.url_rule is not None else "<non trouvée>"
+            request_logger.log(
+                logging.WARNING if response.status_code >= 500 else logging.INFO,
+                "%s %s %s", request.method, route, response.status_code,
+                extra={
+                    "method": request.method,
+                    "route": route,
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - debut) * 1000, 2),
+                },
+            )
+        return response
+
+    return handler
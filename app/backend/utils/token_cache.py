@@ -0,0 +1,96 @@
+"""
+Cache des JWT déjà vérifiés pour Récy&Co.
+
+Un token d'accès est réutilisé jusqu'à JWT_EXP_MINUTES minutes, et une
+page de jeu appelle plusieurs routes protégées (/api/me, /api/scores...)
+avec le même cookie. Plutôt que de refaire la vérification HS256 et la
+lecture des claims à chaque requête, le payload vérifié est gardé en
+mémoire :
+- clé : empreinte SHA-256 du token (le token lui-même n'est pas conservé)
+- expiration : claim exp du token (une entrée n'est jamais servie au-delà)
+- taille bornée : l'entrée la moins récemment utilisée est retirée (LRU)
+
+Seuls les tokens valides sont mis en cache : un token invalide ou expiré
+est revérifié (et refusé) à chaque présentation.
+
+Classes:
+    TokenCache: Cache LRU thread-safe des payloads JWT vérifiés
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class TokenCache:
+    """
+    Cache LRU borné des payloads JWT vérifiés, thread-safe.
+
+    Attributes:
+        max_size (int): Nombre maximal de tokens gardés (0 = cache désactivé)
+        hits (int): Vérifications évitées depuis le démarrage
+        misses (int): Vérifications complètes depuis le démarrage
+    """
+
+    def __init__(self, max_size: int = 10000) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        # empreinte -> (exp en secondes epoch, payload)
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_verify(self, token: str, verify: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """
+        Retourne le payload du token, vérifié par `verify` s'il n'est pas en cache.
+
+        Args:
+            token (str): JWT présenté par le client
+            verify (callable): Vérification complète (ex : security.decode_token
+                avec la clé secrète) ; retourne le payload, ou None si invalide
+
+        Returns:
+            dict | None: Payload du token (à ne pas modifier), None si invalide
+        """
+        if self.max_size <= 0:
+            return verify(token)
+
+        cle = hashlib.sha256(token.encode()).digest()
+        maintenant = time.time()
+        with self._lock:
+            entree = self._entries.get(cle)
+            if entree is not None:
+                if entree[0] > maintenant:
+                    self._entries.move_to_end(cle)
+                    self.hits += 1
+                    return entree[1]
+                del self._entries[cle]
+            self.misses += 1
+
+        # Vérification hors verrou : les autres threads ne l'attendent pas
+        payload = verify(token)
+        exp = payload.get("exp") if payload is not None else None
+        if isinstance(exp, (int, float)) and exp > maintenant:
+            with self._lock:
+                self._entries[cle] = (exp, payload)
+                self._entries.move_to_end(cle)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def clear(self) -> None:
+        """Vide le cache (ex : changement de clé secrète)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Compteurs du cache.
+
+        Returns:
+            dict: hits, misses et size (entrées actuellement gardées)
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
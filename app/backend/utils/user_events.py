@@ -0,0 +1,59 @@
+"""
+Notification des suppressions de comptes pour Récy&Co.
+
+Plusieurs composants gardent des utilisateurs en mémoire dans chaque
+processus (classement LeaderboardIndex, cache d'existence d'AuthService).
+Quand un compte est supprimé, ils doivent l'oublier tout de suite plutôt
+qu'à leur prochaine resynchronisation.
+
+Toute suppression d'un User faite par la session SQLAlchemy
+(db.session.delete(user)) est relevée au flush, puis annoncée aux fonctions
+enregistrées par on_user_deleted() une fois la transaction validée (rien
+n'est annoncé en cas de rollback). Un delete(User) en masse ne donne pas
+les identifiants supprimés : il doit être suivi d'appels explicites.
+
+Functions:
+    on_user_deleted: Enregistre une fonction appelée pour chaque compte supprimé
+"""
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db.models import User
+
+# Clé dans app.extensions : les abonnés sont propres à chaque application
+EXTENSION_KEY = "recyco_user_deleted"
+
+
+def on_user_deleted(app, callback) -> None:
+    """
+    Enregistre une fonction à appeler après la suppression d'un compte.
+
+    Args:
+        app (Flask): Application dont les sessions sont surveillées
+        callback: Fonction appelée avec l'identifiant (int) du compte supprimé
+    """
+    app.extensions.setdefault(EXTENSION_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    supprimes = [instance.id for instance in session.deleted if isinstance(instance, User)]
+    if supprimes:
+        session.info.setdefault("users_deleted", set()).update(supprimes)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    supprimes = session.info.pop("users_deleted", None)
+    if not supprimes or not has_app_context():
+        return
+    for callback in current_app.extensions.get(EXTENSION_KEY, ()):
+        for user_id in supprimes:
+            callback(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("users_deleted", None)
@@ -0,0 +1,129 @@
+"""
+Benchmark : coût de sérialisation JSON des réponses, par route.
+
+Construit des réponses représentatives des routes les plus lourdes (mêmes
+dictionnaires que ceux renvoyés par les services) et mesure le temps de
+app.json.response() pour chacune, avec :
+- flask : DefaultJSONProvider d'origine (dates au format HTTP)
+- json : RecycoJSONProvider sans orjson (repli sur le module json standard)
+- orjson : RecycoJSONProvider avec orjson (si installé)
+
+Les réponses sont compactes, comme en production (app.debug = False).
+
+Usage (depuis la racine du dépôt) :
+    python app/benchmarks/bench_json.py
+    python app/benchmarks/bench_json.py --repeat 5000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="Sérialisations mesurées par route")
+    return parser.parse_args()
+
+
+def reponses():
+    """Réponses de service typiques, une par route mesurée."""
+    maintenant = datetime(2026, 10, 17, 14, 3, 0)
+    partie = {"points": 12, "correct_items": 12, "total_items": 15, "duration_ms": 41_250}
+    return {
+        "GET /api/leaderboard (100)": {
+            "success": True, "status_code": 200,
+            "data": [{"username": f"joueur{i}", "total_score": 10_000 - i} for i in range(100)],
+        },
+        "GET /api/leaderboard?window=week (100)": {
+            "success": True, "status_code": 200,
+            "data": [{"username": f"joueur{i}", "points": 900 - i, "games_played": 40} for i in range(100)],
+        },
+        "GET /api/scores/me/history (100)": {
+            "success": True, "status_code": 200,
+            "data": {
+                "scores": [
+                    {"id": 5000 - i, **partie, "played_at": maintenant - timedelta(minutes=i), "efficiency": 0.8}
+                    for i in range(100)
+                ],
+                "next_cursor": "MjAyNi0xMC0xN1QxMjo0MzowMHw0OTAx",
+            },
+        },
+        "POST /api/scores/batch (50)": {
+            "success": True, "status_code": 200,
+            "data": {
+                "user_id": 42, "total_score": 4_800, "accepted": 50, "rejected": 0,
+                "results": [{"index": i, "success": True} for i in range(50)],
+            },
+        },
+        "GET /api/badges/me (30)": {
+            "success": True, "status_code": 200,
+            "data": [
+                {"code": f"badge_{i}", "label": f"Badge {i}", "description": "Trier 100 déchets sans erreur",
+                 "awarded_at": maintenant - timedelta(days=i)}
+                for i in range(30)
+            ],
+        },
+        "GET /api/stats/me": {
+            "success": True, "status_code": 200,
+            "data": {
+                "games_played": 420, "best_points": 20, "total_points": 4_800, "total_correct_items": 4_800,
+                "total_items": 6_000, "total_duration_ms": 17_325_000, "best_efficiency": 1.0,
+                "last_played_at": maintenant,
+            },
+        },
+    }
+
+
+def mesurer(app, provider, donnees, repeat):
+    """Médiane (µs) du temps de provider.response(donnees)."""
+    durees = []
+    with app.test_request_context():
+        for _ in range(repeat):
+            debut = time.perf_counter()
+            provider.response(donnees)
+            durees.append(time.perf_counter() - debut)
+    return statistics.median(durees) * 1e6
+
+
+def main():
+    args = parse_args()
+
+    os.environ.setdefault("APP_ENV", "local")
+    os.environ.setdefault("LOCAL_DATABASE_URL", "sqlite://")
+    sys.path.insert(0, str(BACKEND))
+
+    from flask.json.provider import DefaultJSONProvider
+    from run import app
+    from utils import json_provider
+    from utils.json_provider import RecycoJSONProvider
+
+    # Réponses compactes, comme en production
+    app.debug = False
+
+    orjson = json_provider.orjson
+    moteurs = {"flask": DefaultJSONProvider(app), "json": RecycoJSONProvider(app)}
+    if orjson is not None:
+        moteurs["orjson"] = RecycoJSONProvider(app)
+
+    print(f"orjson : {'version ' + orjson.__version__ if orjson is not None else 'non installé'}")
+    print(f"\n{'route':<40}" + "".join(f"{nom:>12}" for nom in moteurs) + f"{'gain':>8}")
+    for route, donnees in reponses().items():
+        temps = {}
+        for nom, provider in moteurs.items():
+            json_provider.orjson = orjson if nom == "orjson" else None
+            temps[nom] = mesurer(app, provider, donnees, args.repeat)
+        json_provider.orjson = orjson
+        gain = temps["flask"] / temps[list(moteurs)[-1]]
+        print(f"{route:<40}" + "".join(f"{temps[nom]:>9.1f} µs" for nom in moteurs) + f"{gain:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark : débit de /api/login en fonction du nombre de connexions simultanées.
+
+Compare les modes de l'exécuteur bcrypt (utils/password_executor.py) :
+inline (calcul dans le thread de la requête), thread et process. Chaque
+niveau de concurrence envoie le même nombre de connexions via le client de
+test Flask (un client par thread) sur une base SQLite temporaire.
+
+Usage (depuis la racine du dépôt) :
+    python app/benchmarks/bench_login.py
+    python app/benchmarks/bench_login.py --modes inline,process --concurrency 1,4,16 --logins 64
+
+Les 503 (file d'attente du pool pleine) sont comptés à part : ils montrent
+la limite de charge au-delà de laquelle le serveur refuse plutôt que d'empiler.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="inline,thread,process", help="Modes de l'exécuteur à comparer")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Niveaux de concurrence")
+    parser.add_argument("--logins", type=int, default=32, help="Connexions par niveau de concurrence")
+    parser.add_argument("--workers", type=int, default=None, help="Taille du pool (par défaut : nombre de cœurs)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    db_file = Path(tempfile.mkdtemp()) / "bench_login.db"
+    os.environ["APP_ENV"] = "local"
+    os.environ["LOCAL_DATABASE_URL"] = f"sqlite:///{db_file}"
+    sys.path.insert(0, str(BACKEND))
+
+    from run import app, auth_service
+    from utils.password_executor import PasswordExecutor
+
+    app.config.update({"TESTING": True})
+    app.test_client().post("/api/register", json={
+        "username": "bench", "email": "bench@example.com", "password": "bench1234"
+    })
+
+    def login():
+        client = app.test_client()
+        debut = time.perf_counter()
+        res = client.post("/api/login", json={"email": "bench@example.com", "password": "bench1234"})
+        return res.status_code, time.perf_counter() - debut
+
+    print(f"{'mode':<8} {'conc.':>5} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'503':>5}")
+    for mode in args.modes.split(","):
+        executor = PasswordExecutor(mode=mode, max_workers=args.workers)
+        auth_service.password_executor = executor
+        login()  # démarrage du pool hors mesure
+
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            debut = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                resultats = list(pool.map(lambda _: login(), range(args.logins)))
+            duree = time.perf_counter() - debut
+
+            ok = sorted(latence for status, latence in resultats if status == 200)
+            refus = sum(1 for status, _ in resultats if status == 503)
+            p50 = statistics.median(ok) * 1000 if ok else 0
+            p95 = ok[int(len(ok) * 0.95) - 1] * 1000 if ok else 0
+            print(f"{mode:<8} {concurrency:>5} {len(ok) / duree:>9.1f} {p50:>8.1f} {p95:>8.1f} {refus:>5}")
+
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark : requêtes par seconde sur /api/rules, avant et après le cache.
+
+"avant" rejoue l'ancienne implémentation (ouverture + json.load de
+consignes.json puis jsonify à chaque requête) sur une route de test ;
+"après" interroge la vraie route /api/rules, qui sert le document
+pré-sérialisé, en clair, en gzip et en revalidation (If-None-Match → 304).
+
+Usage (depuis la racine du dépôt) :
+    python app/benchmarks/bench_rules.py
+    python app/benchmarks/bench_rules.py --requests 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def mesurer(client, path, headers, requests):
+    debut = time.perf_counter()
+    for _ in range(requests):
+        res = client.get(path, headers=headers)
+        assert res.status_code in (200, 304), res.status_code
+    duree = time.perf_counter() - debut
+    return requests / duree, len(res.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requêtes par scénario")
+    args = parser.parse_args()
+
+    os.environ["APP_ENV"] = "local"
+    os.environ["LOCAL_DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_rules.db'}"
+    sys.path.insert(0, str(BACKEND))
+
+    from flask import jsonify
+    from run import app
+
+    consignes = os.path.join(app.static_folder, "data", "consignes.json")
+
+    @app.route("/bench/rules-legacy")
+    def rules_legacy():
+        with open(consignes, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return jsonify(data)
+
+    client = app.test_client()
+    etag = client.get("/api/rules").headers["ETag"]
+
+    scenarios = [
+        ("avant (json.load + jsonify)", "/bench/rules-legacy", {}),
+        ("après, identity", "/api/rules", {}),
+        ("après, gzip", "/api/rules", {"Accept-Encoding": "gzip"}),
+        ("après, If-None-Match (304)", "/api/rules", {"If-None-Match": etag}),
+    ]
+
+    print(f"{'scénario':<30} {'req/s':>9} {'octets':>8}")
+    for nom, path, headers in scenarios:
+        debit, taille = mesurer(client, path, headers, args.requests)
+        print(f"{nom:<30} {debit:>9.0f} {taille:>8}")
+
+
+if __name__ == "__main__":
+    main()
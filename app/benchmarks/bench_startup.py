@@ -0,0 +1,81 @@
+"""
+Benchmark : temps de démarrage de l'application.
+
+Chaque mesure est faite dans un nouveau processus Python (imports à froid,
+comme au démarrage d'un worker gunicorn) :
+- import run : import du module seul (create_app n'est pas appelée)
+- create_app() : construction complète, caches chargés à la première requête
+- create_app(warm_caches=True) : construction avec préchauffage des caches
+- première requête : create_app() puis GET /api/badges, à froid et préchauffé
+
+Usage (depuis la racine du dépôt, base migrée et seedée) :
+    python app/benchmarks/bench_startup.py
+    python app/benchmarks/bench_startup.py --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+# Code exécuté dans le processus mesuré : affiche les durées (ms) en JSON
+MESURE = """
+import json, sys, time
+sys.path.insert(0, {backend!r})
+debut = time.perf_counter()
+import run
+durees = {{"import run": time.perf_counter() - debut}}
+if {construire!r}:
+    debut = time.perf_counter()
+    app = run.create_app(warm_caches={warm!r})
+    durees["create_app"] = time.perf_counter() - debut
+    debut = time.perf_counter()
+    app.test_client().get("/api/badges")
+    durees["première requête"] = time.perf_counter() - debut
+    app.config["services"]["badge_worker"].stop()
+print(json.dumps({{nom: duree * 1000 for nom, duree in durees.items()}}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Processus lancés par scénario")
+    return parser.parse_args()
+
+
+def mesurer(construire, warm, repeat):
+    """Médiane (ms) de chaque étape sur `repeat` processus."""
+    code = MESURE.format(backend=str(BACKEND), construire=construire, warm=warm)
+    essais = []
+    for _ in range(repeat):
+        sortie = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout
+        essais.append(json.loads(sortie.strip().splitlines()[-1]))
+    return {nom: statistics.median(essai[nom] for essai in essais) for nom in essais[0]}
+
+
+def main():
+    args = parse_args()
+    scenarios = {
+        "import run": (False, False),
+        "create_app()": (True, False),
+        "create_app(warm_caches=True)": (True, True),
+    }
+    etapes = ("import run", "create_app", "première requête")
+
+    print(f"{'scénario':<32}" + "".join(f"{etape:>20}" for etape in etapes))
+    for nom, (construire, warm) in scenarios.items():
+        temps = mesurer(construire, warm, args.repeat)
+        print(f"{nom:<32}" + "".join(
+            f"{temps[etape]:>17.1f} ms" if etape in temps else f"{'-':>20}" for etape in etapes
+        ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
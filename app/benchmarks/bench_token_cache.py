@@ -0,0 +1,84 @@
+"""
+Benchmark : débit de vérification des tokens d'accès, avec et sans cache.
+
+Mesure le nombre de vérifications par seconde de :
+- decode : utils.security.decode_token (HS256 + claims) à chaque appel
+- cache : TokenCache.get_or_verify (utils/token_cache.py), qui ne vérifie
+  chaque token qu'une fois jusqu'à son exp
+
+Les tokens sont tirés au hasard parmi --tokens tokens distincts (joueurs
+connectés), répartis sur --threads threads comme sous un serveur threadé.
+
+Usage (depuis la racine du dépôt) :
+    python app/benchmarks/bench_token_cache.py
+    python app/benchmarks/bench_token_cache.py --tokens 5000 --threads 8
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+SECRET = "bench-secret"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=1000, help="Tokens distincts (joueurs connectés)")
+    parser.add_argument("--requests", type=int, default=200_000, help="Vérifications mesurées par scénario")
+    parser.add_argument("--threads", type=int, default=4, help="Threads qui vérifient en parallèle")
+    parser.add_argument("--cache-size", type=int, default=10000, help="Taille du TokenCache")
+    return parser.parse_args()
+
+
+def mesurer(verifier, tokens, requests, threads):
+    """Vérifications par seconde, `requests` réparties sur `threads` threads."""
+    par_thread = requests // threads
+    tirages = [[random.choice(tokens) for _ in range(par_thread)] for _ in range(threads)]
+    depart = threading.Barrier(threads + 1)
+
+    def travailler(liste):
+        depart.wait()
+        for token in liste:
+            verifier(token)
+
+    workers = [threading.Thread(target=travailler, args=(liste,)) for liste in tirages]
+    for worker in workers:
+        worker.start()
+    depart.wait()
+    debut = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return par_thread * threads / (time.perf_counter() - debut)
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, str(BACKEND))
+
+    from utils import security
+    from utils.token_cache import TokenCache
+
+    tokens = [security.create_token({"id": i}, SECRET) for i in range(args.tokens)]
+
+    def decode(token):
+        return security.decode_token(token, SECRET)
+
+    cache = TokenCache(args.cache_size)
+
+    debit_decode = mesurer(decode, tokens, args.requests, args.threads)
+    debit_cache = mesurer(lambda t: cache.get_or_verify(t, decode), tokens, args.requests, args.threads)
+    stats = cache.stats()
+
+    print(f"{args.tokens} tokens, {args.requests} vérifications, {args.threads} threads")
+    print(f"{'decode':<8}{debit_decode:>14,.0f} vérif/s")
+    print(f"{'cache':<8}{debit_cache:>14,.0f} vérif/s  ({debit_cache / debit_decode:.1f}x, "
+          f"hits={stats['hits']} misses={stats['misses']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Test de charge de bout en bout de l'API Récy&Co (sans réseau).
+
+Le script construit l'application sur une base locale (SQLite temporaire
+par défaut), y injecte une population synthétique (utilisateurs, parties,
+badges, articles), puis lance des clients concurrents (un client de test
+Flask par thread) qui enchaînent les routes principales :
+
+    /api/login, /api/scores, /api/leaderboard, /api/stats/me,
+    /api/badges/me, /api/shop/purchase
+
+Pour chaque route : nombre de requêtes, débit, latences p50/p95/p99 et
+erreurs (code HTTP inattendu ou exception). Le résultat peut être enregistré
+comme référence (--save) puis comparé lors d'un prochain passage
+(--compare) : une route dont le p95 augmente ou dont le débit baisse de
+plus de --tolerance est signalée, et le script se termine avec le code 1.
+
+Usage (depuis la racine du dépôt) :
+    python app/benchmarks/load_test.py --save app/benchmarks/baseline.json
+    python app/benchmarks/load_test.py --compare app/benchmarks/baseline.json
+    python app/benchmarks/load_test.py --clients 16 --iterations 200 --users 2000
+
+Attention : la base indiquée par --database-url est vidée puis recréée.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+PASSWORD = "bench1234"
+
+# Répartition des requêtes d'un client après sa connexion
+SCENARIO = [
+    ("/api/scores", 40),
+    ("/api/leaderboard", 20),
+    ("/api/stats/me", 15),
+    ("/api/badges/me", 15),
+    ("/api/shop/purchase", 5),
+    ("/api/login", 5),
+]
+
+# Codes « métier » attendus (ex : achat refusé faute de points) : pas des erreurs
+EXPECTED_STATUS = {
+    "/api/shop/purchase": {200, 403, 409},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Base à utiliser (SQLite temporaire par défaut)")
+    parser.add_argument("--users", type=int, default=500, help="Utilisateurs synthétiques")
+    parser.add_argument("--scores-per-user", type=int, default=20, help="Parties historiques par utilisateur")
+    parser.add_argument("--items", type=int, default=30, help="Articles en boutique")
+    parser.add_argument("--clients", type=int, default=8, help="Clients concurrents")
+    parser.add_argument("--iterations", type=int, default=100, help="Requêtes par client (hors connexion initiale)")
+    parser.add_argument("--seed", type=int, default=42, help="Graine aléatoire (population et scénario)")
+    parser.add_argument("--save", metavar="FICHIER", help="Enregistre le résultat comme référence JSON")
+    parser.add_argument("--compare", metavar="FICHIER", help="Compare le résultat à une référence JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Dégradation tolérée (0.2 = 20 %%)")
+    return parser.parse_args()
+
+
+# ---------- Population synthétique ----------
+
+def seed_population(app, db, args):
+    """Remplit la base : utilisateurs, parties, statistiques, badges, articles."""
+    from sqlalchemy import bindparam, insert, update
+
+    from db.models import Badge, Score, ShopItem, User, UserBadge
+    from utils import security
+    from utils.badge_rules import DEFAULT_RULES
+
+    rng = random.Random(args.seed)
+    password_hash = security.hash_password(PASSWORD)  # un seul bcrypt pour toute la population
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.execute(insert(User), [
+            {
+                "username": f"bench{i}",
+                "email": f"bench{i}@example.com",
+                "password_hash": password_hash,
+                "total_score": 0,
+                "created_at": datetime.now(timezone.utc),
+            }
+            for i in range(args.users)
+        ])
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+
+        parties = []
+        totaux = {}
+        for user_id in user_ids:
+            for _ in range(args.scores_per_user):
+                total_items = rng.randint(5, 20)
+                correct = rng.randint(0, total_items)
+                parties.append({
+                    "user_id": user_id,
+                    "points": correct,
+                    "correct_items": correct,
+                    "total_items": total_items,
+                    "duration_ms": rng.randint(1000, 120000),
+                })
+                totaux[user_id] = totaux.get(user_id, 0) + correct
+        if parties:
+            db.session.execute(insert(Score), parties)
+        users = User.__table__
+        db.session.execute(
+            update(users).where(users.c.id == bindparam("uid")).values(total_score=bindparam("total")),
+            [{"uid": user_id, "total": total} for user_id, total in totaux.items()],
+        )
+
+        db.session.add_all([
+            Badge(code=code, label=code.title(), description=code, rule=rule, threshold=threshold)
+            for code, (rule, threshold) in DEFAULT_RULES.items()
+        ])
+        db.session.add_all([
+            ShopItem(sku=f"bench-{i}", name=f"Article {i}", price=rng.randint(10, 300))
+            for i in range(args.items)
+        ])
+        db.session.commit()
+
+        badge_ids = [badge_id for (badge_id,) in db.session.query(Badge.id)]
+        possessions = {
+            (user_id, badge_id)
+            for user_id in user_ids
+            for badge_id in rng.sample(badge_ids, k=min(len(badge_ids), rng.randint(0, 5)))
+        }
+        if possessions:
+            db.session.execute(insert(UserBadge), [
+                {"user_id": user_id, "badge_id": badge_id, "awarded_at": datetime.now()}
+                for user_id, badge_id in possessions
+            ])
+        db.session.commit()
+
+        item_ids = [item_id for (item_id,) in db.session.query(ShopItem.id)]
+        app.config["services"]["score"].rebuild_user_stats()
+
+    return item_ids
+
+
+# ---------- Clients ----------
+
+class Recorder:
+    """Latences et erreurs par route, partagées entre les threads clients."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(seconds)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+
+def run_client(app, client_id, args, item_ids, recorder):
+    rng = random.Random(args.seed * 1000 + client_id)
+    client = app.test_client()
+    email = f"bench{client_id % args.users}@example.com"
+    routes = [route for route, _ in SCENARIO]
+    weights = [weight for _, weight in SCENARIO]
+
+    def call(route):
+        if route == "/api/login":
+            method, body = client.post, {"email": email, "password": PASSWORD}
+        elif route == "/api/scores":
+            total_items = rng.randint(5, 20)
+            correct = rng.randint(0, total_items)
+            method, body = client.post, {
+                "points": correct,
+                "correct_items": correct,
+                "total_items": total_items,
+                "duration_ms": rng.randint(1000, 120000),
+            }
+        elif route == "/api/shop/purchase":
+            method, body = client.post, {"item_id": rng.choice(item_ids)}
+        else:
+            method, body = client.get, None
+
+        debut = time.perf_counter()
+        try:
+            res = method(route, json=body) if body is not None else method(route)
+            status = res.status_code
+        except Exception:
+            status = None
+        duree = time.perf_counter() - debut
+
+        attendus = EXPECTED_STATUS.get(route, {200})
+        recorder.record(route, duree, status in attendus)
+
+    call("/api/login")
+    for _ in range(args.iterations):
+        call(rng.choices(routes, weights)[0])
+
+
+# ---------- Rapport ----------
+
+def percentile(sorted_values, p):
+    """Percentile par rang le plus proche (valeurs déjà triées)."""
+    if not sorted_values:
+        return 0.0
+    rang = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rang, len(sorted_values)) - 1]
+
+
+def summarize(recorder, wall_seconds):
+    endpoints = {}
+    for route, valeurs in sorted(recorder.latencies.items()):
+        valeurs = sorted(valeurs)
+        endpoints[route] = {
+            "requests": len(valeurs),
+            "throughput_rps": round(len(valeurs) / wall_seconds, 2),
+            "p50_ms": round(percentile(valeurs, 50) * 1000, 2),
+            "p95_ms": round(percentile(valeurs, 95) * 1000, 2),
+            "p99_ms": round(percentile(valeurs, 99) * 1000, 2),
+            "errors": recorder.errors.get(route, 0),
+        }
+    return endpoints
+
+
+def print_report(endpoints, baseline=None):
+    print(f"{'route':<22} {'req':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>5}  comparaison")
+    for route, m in endpoints.items():
+        comparaison = ""
+        if baseline and route in baseline:
+            ref = baseline[route]
+            comparaison = f"p95 {_delta(m['p95_ms'], ref['p95_ms'])}, req/s {_delta(m['throughput_rps'], ref['throughput_rps'])}"
+        print(
+            f"{route:<22} {m['requests']:>6} {m['throughput_rps']:>8.1f} {m['p50_ms']:>8.1f} "
+            f"{m['p95_ms']:>8.1f} {m['p99_ms']:>8.1f} {m['errors']:>5}  {comparaison}"
+        )
+
+
+def _delta(valeur, reference):
+    if not reference:
+        return "n/a"
+    return f"{(valeur - reference) / reference * 100:+.0f} %"
+
+
+def find_regressions(endpoints, baseline, tolerance):
+    """Routes plus lentes que la référence au-delà de la tolérance."""
+    regressions = []
+    for route, ref in baseline.items():
+        m = endpoints.get(route)
+        if m is None:
+            continue
+        if ref["p95_ms"] and m["p95_ms"] > ref["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route} : p95 {m['p95_ms']:.1f} ms (référence {ref['p95_ms']:.1f} ms)")
+        if ref["throughput_rps"] and m["throughput_rps"] < ref["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{route} : {m['throughput_rps']:.1f} req/s (référence {ref['throughput_rps']:.1f} req/s)")
+        if m["errors"] > ref.get("errors", 0):
+            regressions.append(f"{route} : {m['errors']} erreur(s) (référence {ref.get('errors', 0)})")
+    return regressions
+
+
+def main():
+    args = parse_args()
+
+    os.environ["APP_ENV"] = "local"
+    os.environ["LOCAL_DATABASE_URL"] = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'load_test.db'}"
+    sys.path.insert(0, str(BACKEND))
+
+    from run import app, db
+
+    app.config.update({"TESTING": True})
+
+    debut = time.perf_counter()
+    item_ids = seed_population(app, db, args)
+    with app.app_context():
+        database = db.engine.dialect.name
+    print(f"Population : {args.users} utilisateurs, {args.users * args.scores_per_user} parties, "
+          f"{args.items} articles ({time.perf_counter() - debut:.1f} s)")
+
+    recorder = Recorder()
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        for future in [pool.submit(run_client, app, i, args, item_ids, recorder) for i in range(args.clients)]:
+            future.result()
+    wall = time.perf_counter() - debut
+    print(f"Charge     : {args.clients} clients × {args.iterations} requêtes en {wall:.1f} s\n")
+
+    endpoints = summarize(recorder, wall)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["endpoints"]
+    print_report(endpoints, baseline)
+
+    if args.save:
+        resultat = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "database_url")},
+            "database": database,
+            "endpoints": endpoints,
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(resultat, f, indent=2, ensure_ascii=False)
+        print(f"\nRéférence enregistrée dans {args.save}")
+
+    if baseline is not None:
+        regressions = find_regressions(endpoints, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Dégradations au-delà de {args.tolerance:.0%} :")
+            for ligne in regressions:
+                print(f"   - {ligne}")
+            return 1
+        print(f"\n✅ Aucune dégradation au-delà de {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 import pytest
@@ -6,6 +7,9 @@ import pytest
 backend_path = Path(__file__).parent.parent.parent / "backend"
 sys.path.insert(0, str(backend_path))
 
+# Configuration de test (TESTING, base TEST_DATABASE_URL) sauf choix explicite
+os.environ.setdefault("APP_ENV", "testing")
+
 from run import app, db
 
 @pytest.fixture(scope="session")
@@ -15,3 +19,10 @@ def client():
         db.create_all()
     with app.test_client() as client:
         yield client
+
+
+@pytest.fixture
+def count_queries():
+    """Compteur de requêtes SQL : `with count_queries() as compteur: ...`"""
+    from utils.query_budget import QueryCounter
+    return QueryCounter
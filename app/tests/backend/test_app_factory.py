@@ -0,0 +1,144 @@
+"""
+Fabrique d'application : create_app() construit une application
+indépendante de l'application par défaut, avec préchauffage optionnel.
+"""
+
+from run import app, create_app
+
+
+def test_create_app_warms_caches(client):
+    """Avec warm_caches, les catalogues sont chargés avant la première requête."""
+    froide = create_app(warm_caches=False)
+    chaude = create_app(warm_caches=True)
+    try:
+        assert froide is not app and chaude is not app
+        assert froide.config["services"]["badge"].catalog._entry is None
+        assert froide.config["services"]["shop"].catalog._entry is None
+        assert chaude.config["services"]["badge"].catalog._entry is not None
+        assert chaude.config["services"]["shop"].catalog._entry is not None
+
+        # Mêmes routes que l'application par défaut
+        assert sorted(r.rule for r in chaude.url_map.iter_rules()) == sorted(r.rule for r in app.url_map.iter_rules())
+        assert chaude.test_client().get("/api/badges").status_code == 200
+    finally:
+        for nouvelle in (froide, chaude):
+            nouvelle.config["services"]["badge_worker"].stop()
+
+
+def test_create_app_does_not_touch_the_database(count_queries, monkeypatch):
+    """Construire l'application (CLI, migrations, workers) n'exécute aucune requête SQL."""
+    import os
+
+    from config import Config, config
+
+    monkeypatch.setattr(Config, "BADGE_WORKER_MODE", "db")
+    # Profil local : la création des tables au démarrage est voulue (déjà faite ici)
+    monkeypatch.setattr(config[os.getenv("APP_ENV", "default")], "AUTO_CREATE_SCHEMA", False)
+    with count_queries() as compteur:
+        nouvelle = create_app(warm_caches=False)
+    worker = nouvelle.config["services"]["badge_worker"]
+    try:
+        assert compteur.statements == []
+        # Thread de badges démarré par la première requête du processus qui la sert
+        assert worker._thread is None
+        nouvelle.test_client().get("/api/rules")
+        assert worker._thread is not None
+
+        worker.stop()
+
+        # Enfant issu d'un fork : pas de thread hérité, jeton de réservation propre
+        jeton = worker._token
+        worker._reset_after_fork()
+        assert worker._thread is None and worker._token != jeton
+        worker.start()
+        assert worker._thread is not None
+    finally:
+        worker.stop()
+
+
+def test_local_profile_runs_on_embedded_sqlite(tmp_path, monkeypatch):
+    """Profil local : base SQLite en WAL, tables créées au démarrage."""
+    from sqlalchemy import inspect, text
+
+    from config import LocalConfig
+    from db import db
+
+    monkeypatch.setattr(LocalConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'local.db'}")
+    locale = create_app("local")
+    try:
+        with locale.app_context():
+            pragmas = {
+                nom: db.session.execute(text(f"PRAGMA {nom}")).scalar()
+                for nom in ("journal_mode", "synchronous", "foreign_keys")
+            }
+            assert pragmas == {"journal_mode": "wal", "synchronous": 1, "foreign_keys": 1}
+            assert {"users", "scores", "revoked_tokens"} <= set(inspect(db.engine).get_table_names())
+            db.session.remove()
+
+        res = locale.test_client().post(
+            "/api/register", json={"username": "local", "email": "local@example.com", "password": "test1234"}
+        )
+        assert res.status_code == 201
+    finally:
+        locale.config["services"]["badge_worker"].stop()
+        with locale.app_context():
+            db.engine.dispose()
+
+
+def test_replica_reads_and_read_your_writes(tmp_path, monkeypatch):
+    """Lectures marquées sur le réplica, sauf pour le client qui vient d'écrire."""
+    from sqlalchemy import insert
+
+    from config import LocalConfig
+    from db import db
+    from db.models import User, UserStats
+    from utils import security
+    from utils.read_routing import STICKY_COOKIE
+
+    monkeypatch.setattr(LocalConfig, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'primaire.db'}")
+    monkeypatch.setattr(LocalConfig, "REPLICA_DATABASE_URL", f"sqlite:///{tmp_path / 'replica.db'}")
+    repliquee = create_app("local")
+    try:
+        # Réplica en retard : même compte, une partie de moins
+        with repliquee.app_context():
+            compte = {"id": 1, "username": "replica", "email": "replica@example.com", "password_hash": "x"}
+            for engine, parties in ((db.engines[None], 4), (db.engines["replica"], 3)):
+                with engine.begin() as connexion:
+                    connexion.execute(insert(User).values(**compte))
+                    connexion.execute(insert(UserStats).values(
+                        user_id=1, games_played=parties, best_points=10, total_correct_items=0,
+                        total_duration_ms=0, best_efficiency=0
+                    ))
+        token = security.create_token({"id": 1}, repliquee.config["SECRET_KEY"])
+
+        def parties_jouees(visiteur):
+            res = visiteur.get("/api/stats/me")
+            assert res.status_code == 200
+            return res.get_json()["data"]["parties_jouees"]
+
+        joueur = repliquee.test_client()
+        joueur.set_cookie("access_token", token)
+        assert parties_jouees(joueur) == 3
+        assert joueur.get_cookie(STICKY_COOKIE) is None
+
+        res = joueur.post("/api/scores", json={"points": 10, "correct_items": 8, "total_items": 10})
+        assert res.status_code == 200
+        assert joueur.get_cookie(STICKY_COOKIE) is not None
+        # Le joueur relit ses propres écritures sur la base principale
+        assert parties_jouees(joueur) == 5
+
+        # Les autres clients (et le joueur une fois le délai passé) lisent le réplica
+        autre = repliquee.test_client()
+        autre.set_cookie("access_token", token)
+        assert parties_jouees(autre) == 3
+        joueur.set_cookie(STICKY_COOKIE, "0")
+        assert parties_jouees(joueur) == 3
+
+        # Le classement en mémoire est toujours chargé depuis la base principale
+        classement = autre.get("/api/leaderboard").get_json()["data"]
+        assert classement == [{"username": "replica", "total_score": 10}]
+    finally:
+        repliquee.config["services"]["badge_worker"].stop()
+        with repliquee.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
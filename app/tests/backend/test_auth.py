@@ -35,3 +35,79 @@ def test_me_route(client):
 
     res = client.get("/api/me", headers=headers)
     assert res.status_code == 200
+
+def test_token_for_unknown_user_is_rejected(client):
+    """Un token valide mais dont le compte n'existe pas doit être refusé."""
+    from run import app
+    from utils import security
+
+    token = security.create_token({"id": 987654321}, app.config["SECRET_KEY"])
+    client.set_cookie("access_token", token)
+    res = client.get("/api/scores/me")
+    assert res.status_code == 401
+    client.delete_cookie("access_token")
+
+def test_deleted_user_token_is_rejected_immediately(client):
+    """Un compte supprimé est refusé tout de suite, même s'il est dans le cache d'existence."""
+    from run import app, db, auth_service
+    from db.models import User
+    from utils import security
+
+    with app.app_context():
+        user = User(username="pytest-efface", email="pytest-efface@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        token = security.create_token({"id": user_id}, app.config["SECRET_KEY"])
+        assert auth_service.verify_access_token(token) == (user_id, None)
+
+        db.session.delete(user)
+        db.session.commit()
+        user_id_verifie, error = auth_service.verify_access_token(token)
+    assert user_id_verifie is None
+    assert error["status_code"] == 401
+
+def test_refresh_token_rotation_and_logout(client):
+    """Chaque refresh token ne sert qu'une fois ; la déconnexion révoque le dernier."""
+    from run import app, db, auth_service
+    from db.models import RevokedToken, User
+
+    with app.app_context():
+        user = User(username="pytest-rotation", email="pytest-rotation@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    try:
+        refresh = auth_service._create_refresh_token(user_id)
+        visiteur = app.test_client()
+        visiteur.set_cookie("refresh_token", refresh)
+
+        res = visiteur.post("/api/refresh")
+        assert res.status_code == 200
+        nouveau = visiteur.get_cookie("refresh_token").value
+        assert nouveau != refresh
+        assert visiteur.get_cookie("access_token") is not None
+
+        # Réutilisation de l'ancien token : refusée (filtre en mémoire, confirmé en base)
+        rejoue = app.test_client()
+        rejoue.set_cookie("refresh_token", refresh)
+        assert rejoue.post("/api/refresh").status_code == 401
+
+        # Un refresh token n'est pas un token d'accès
+        rejoue.set_cookie("access_token", nouveau)
+        assert rejoue.get("/api/scores/me").status_code == 401
+
+        assert visiteur.post("/api/logout").status_code == 200
+        visiteur.set_cookie("refresh_token", nouveau)
+        assert visiteur.post("/api/refresh").status_code == 401
+
+        # Après reconstruction (redémarrage), les révocations viennent de la table
+        with app.app_context():
+            assert auth_service.revocation.rebuild() >= 2
+            assert auth_service.revocation.is_revoked(auth_service.security.decode_token(
+                nouveau, app.config["SECRET_KEY"])["jti"])
+    finally:
+        with app.app_context():
+            RevokedToken.query.filter_by(user_id=user_id).delete()
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
@@ -10,3 +10,71 @@ def test_get_badges(client):
 
     res = client.get("/api/badges/me", headers=headers)
     assert res.status_code == 200
+
+def test_db_badge_events_follow_the_score_transaction(client):
+    """Mode db : l'événement de badges est validé ou annulé avec la partie."""
+    from run import app, db, badge_service
+    from db.models import BadgeEvent, User
+    from services.badge_worker import BadgeWorker
+    from utils.badge_rules import GameResult
+
+    worker = BadgeWorker(app, db, badge_service, mode="db")
+    with app.app_context():
+        user_id = db.session.query(User.id).limit(1).scalar()
+        avant = db.session.query(BadgeEvent).count()
+
+        worker.enqueue_in_transaction(user_id, [GameResult(5, 10, 3000)], 0)
+        db.session.rollback()
+        assert db.session.query(BadgeEvent).count() == avant
+
+        worker.enqueue_in_transaction(user_id, [GameResult(5, 10, 3000)], 0)
+        db.session.commit()
+        assert db.session.query(BadgeEvent).count() == avant + 1
+
+    # Le thread démarré reprend l'événement validé
+    worker.start()
+    assert worker.flush(timeout=5)
+    worker.stop()
+
+def test_db_badge_event_kept_when_evaluation_fails(client):
+    """Mode db : un événement dont l'évaluation échoue reste dans badge_events."""
+    from datetime import datetime
+
+    from run import app, db
+    from db.models import BadgeEvent, User
+    from services.badge_worker import CLAIM_TIMEOUT, MAX_ATTEMPTS, BadgeWorker
+    from utils.badge_rules import GameResult
+
+    class BadgeServiceEnPanne:
+        def check_and_award_badges(self, user_id, games, previous_total=None):
+            raise RuntimeError("base indisponible")
+
+    # Aucun autre événement en attente : ce worker ne réserve que le sien
+    app.config["services"]["badge_worker"].flush()
+    worker = BadgeWorker(app, db, BadgeServiceEnPanne(), mode="db")
+    with app.app_context():
+        user_id = db.session.query(User.id).limit(1).scalar()
+        worker.enqueue_in_transaction(user_id, [GameResult(5, 10, 3000)], 0)
+        db.session.commit()
+        event_id = db.session.query(BadgeEvent.id).order_by(BadgeEvent.id.desc()).limit(1).scalar()
+    try:
+        worker._run_db_batch()
+        with app.app_context():
+            event = db.session.get(BadgeEvent, event_id)
+            assert event is not None
+            assert (event.attempts, event.claimed_by) == (1, worker._token)
+
+            # Réservation expirée : repris ; au-delà de MAX_ATTEMPTS, plus distribué
+            event.claimed_at = datetime.now() - 2 * CLAIM_TIMEOUT
+            db.session.commit()
+            assert [e.id for e in worker._claim_db_events()] == [event_id]
+
+            db.session.query(BadgeEvent).filter_by(id=event_id).update(
+                {"claimed_at": datetime.now() - 2 * CLAIM_TIMEOUT, "attempts": MAX_ATTEMPTS}
+            )
+            db.session.commit()
+            assert worker._claim_db_events() == []
+    finally:
+        with app.app_context():
+            db.session.query(BadgeEvent).filter_by(id=event_id).delete()
+            db.session.commit()
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+import pytest
+
+from run import app
+from utils import json_provider
+
+
+@pytest.mark.parametrize("moteur", ["orjson", "json"])
+def test_json_provider_dates_are_iso(monkeypatch, moteur):
+    """Mêmes réponses avec orjson ou le module json : dates en ISO 8601."""
+    if moteur == "json":
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson non installé")
+
+    donnees = {
+        "played_at": datetime(2026, 10, 17, 14, 3, 0),
+        "bucket": date(2026, 10, 12),
+        "username": "Écolo",
+        "scores": [{"points": 3, "efficiency": 0.75}],
+    }
+    with app.test_request_context():
+        reponse = app.json.response(donnees)
+
+    assert reponse.mimetype == "application/json"
+    assert app.json.loads(reponse.get_data()) == {
+        "played_at": "2026-10-17T14:03:00",
+        "bucket": "2026-10-12",
+        "username": "Écolo",
+        "scores": [{"points": 3, "efficiency": 0.75}],
+    }
+    assert app.json.loads(app.json.dumps(donnees))["played_at"] == "2026-10-17T14:03:00"
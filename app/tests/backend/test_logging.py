@@ -0,0 +1,70 @@
+"""
+Journalisation structurée : identifiant de requête, format JSON,
+échantillonnage et file bornée qui abandonne au lieu de bloquer.
+"""
+
+import json
+import logging
+
+from run import app
+from utils.structured_logging import DroppingQueueHandler, JsonFormatter, SamplingFilter, parse_sampling
+
+
+def _record(name="services.score_service", level=logging.DEBUG, msg="Partie enregistrée", extra=None):
+    record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+    for cle, valeur in (extra or {}).items():
+        setattr(record, cle, valeur)
+    return record
+
+
+def test_request_id_is_returned_and_logged(client, caplog):
+    """Chaque réponse porte X-Request-ID, repris dans le journal des requêtes."""
+    res = client.get("/api/badges", headers={"X-Request-ID": "pytest-req-1"})
+    assert res.headers["X-Request-ID"] == "pytest-req-1"
+    assert len(client.get("/api/badges").headers["X-Request-ID"]) == 32
+
+    # Identifiant trop long ou avec des caractères de contrôle : remplacé
+    for invalide in ("x" * 65, "abc\tfaux", "a b", "abc\x1b[31m"):
+        renvoye = client.get("/api/badges", headers={"X-Request-ID": invalide}).headers["X-Request-ID"]
+        assert renvoye != invalide and len(renvoye) == 32
+
+    assert app.config["LOG_REQUESTS"] is True
+    assert any(isinstance(h, DroppingQueueHandler) for h in logging.getLogger().handlers)
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="recyco.requests"):
+        client.get("/api/leaderboard", headers={"X-Request-ID": "pytest-req-2"})
+    entree = next(r for r in caplog.records if r.name == "recyco.requests")
+    assert (entree.route, entree.status) == ("/api/leaderboard", 200)
+    assert entree.request_id == "pytest-req-2"
+    assert entree.duration_ms >= 0
+
+
+def test_json_formatter_keeps_extra_fields():
+    """Une ligne JSON par enregistrement, avec request_id et les champs extra."""
+    ligne = JsonFormatter().format(_record(extra={"request_id": "abc", "user_id": 7, "points": 4}))
+    entree = json.loads(ligne)
+    assert entree["message"] == "Partie enregistrée"
+    assert entree["level"] == "DEBUG"
+    assert (entree["request_id"], entree["user_id"], entree["points"]) == ("abc", 7, 4)
+
+
+def test_sampling_filter_per_logger():
+    """Le taux du logger le plus précis s'applique, jamais aux avertissements."""
+    assert parse_sampling("services=0.5, services.score_service=0 ,x=") == {
+        "services": 0.5, "services.score_service": 0.0
+    }
+    filtre = SamplingFilter({"services": 1.0, "services.score_service": 0.0})
+    assert not filtre.filter(_record())
+    assert filtre.filter(_record(level=logging.WARNING))
+    assert filtre.filter(_record(name="services.shop_service"))
+    assert filtre.filter(_record(name="autre"))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """File pleine : les enregistrements sont comptés comme abandonnés."""
+    handler = DroppingQueueHandler(maxsize=2)
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
@@ -0,0 +1,60 @@
+def test_metrics_export(client):
+    """Les routes appelées apparaissent dans /metrics avec leurs requêtes SQL."""
+    client.get("/api/leaderboard")
+
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.mimetype == "text/plain"
+
+    texte = res.get_data(as_text=True)
+    assert 'recyco_http_request_duration_seconds_count{blueprint="score",route="/api/leaderboard",method="GET"}' in texte
+    assert 'recyco_http_requests_total{blueprint="score",route="/api/leaderboard",method="GET",status="200"}' in texte
+    assert 'recyco_sql_statements_per_request_bucket{blueprint="score",route="/api/leaderboard",method="GET",le="+Inf"}' in texte
+    assert "# TYPE recyco_token_cache_hits_total counter" in texte
+
+def test_metrics_access_is_restricted(client, monkeypatch):
+    """/metrics exige le jeton s'il est défini, sinon une adresse autorisée."""
+    from run import app
+
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "jeton-collecteur")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer autre"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer jeton-collecteur"}).status_code == 200
+
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "")
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"}).status_code == 403
+    assert client.get("/metrics").status_code == 200
+
+def test_pool_metrics_export(client):
+    """Le pool de connexions est configuré depuis DB_POOL_* et mesuré sur /metrics."""
+    from run import app, db
+    from utils.metrics import MeteredQueuePool
+
+    with app.app_context():
+        pool = db.engine.pool
+    assert isinstance(pool, MeteredQueuePool)
+    assert pool.size() == app.config["DB_POOL_SIZE"]
+
+    client.get("/api/leaderboard")
+    texte = client.get("/metrics").get_data(as_text=True)
+    assert "recyco_db_pool_checked_out " in texte
+    assert "recyco_db_pool_overflow " in texte
+    assert "recyco_db_pool_checkouts_total " in texte
+    compte = next(ligne for ligne in texte.splitlines() if ligne.startswith("recyco_db_pool_wait_seconds_count"))
+    assert int(compte.split()[-1]) > 0
+
+
+def test_engine_options_follow_config(monkeypatch):
+    """Les réglages DB_POOL_* passent dans SQLALCHEMY_ENGINE_OPTIONS."""
+    from config import Config
+
+    reglages = Config()
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", "mysql+pymysql://u:p@db/recyco", raising=False)
+    monkeypatch.setattr(Config, "DB_POOL_SIZE", 8)
+    options = reglages.SQLALCHEMY_ENGINE_OPTIONS
+    assert options["pool_size"] == 8
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == Config.DB_POOL_RECYCLE
+
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", "sqlite://", raising=False)
+    assert "pool_size" not in reglages.SQLALCHEMY_ENGINE_OPTIONS
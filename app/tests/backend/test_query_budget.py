@@ -0,0 +1,203 @@
+"""
+Budgets de requêtes SQL : un changement qui ajoute des requêtes (N+1,
+relation chargée paresseusement dans une boucle...) fait échouer ces tests.
+
+Les budgets des méthodes de service sont déclarés dans le code avec
+@query_budget (utils/query_budget.py) ; ceux des routes sont déclarés ici.
+"""
+
+import inspect
+
+import pytest
+
+from run import app, db
+from db.models import RevokedToken, Score, ScoreRollup, ShopItem, User, UserBadge, UserInventory, UserStats
+from utils.badge_rules import GameResult
+from utils.query_budget import get_query_budget
+
+SERVICES = ("auth", "score", "badge", "shop")
+
+# Budget de chaque route (requêtes SQL du thread de la requête, utilisateur
+# connecté) : nombre mesuré, plus une requête quand un cache froid (classement,
+# catalogue, existence du compte) en ajoute une. Dans l'ordre d'appel :
+# /api/logout en dernier.
+ROUTE_BUDGETS = {
+    ("POST", "/api/register"): 3,
+    ("POST", "/api/login"): 2,
+    ("POST", "/api/refresh"): 3,
+    ("GET", "/api/me"): 2,
+    ("POST", "/api/scores"): 13,
+    ("POST", "/api/scores/batch"): 6,
+    ("GET", "/api/scores/me"): 1,
+    ("GET", "/api/scores/me/history"): 2,
+    ("GET", "/api/stats/me"): 1,
+    ("GET", "/api/leaderboard"): 1,
+    ("GET", "/api/leaderboard/around/me"): 1,
+    ("GET", "/api/badges/me"): 2,
+    ("GET", "/api/badges"): 1,
+    ("GET", "/api/shop/items"): 2,
+    ("POST", "/api/shop/can_purchase"): 3,
+    ("POST", "/api/shop/purchase"): 5,
+    ("GET", "/api/rules"): 0,
+    ("GET", "/metrics"): 0,
+    ("GET", "/"): 0,
+    ("GET", "/auth"): 0,
+    ("GET", "/jeu"): 0,
+    ("GET", "/infos"): 0,
+    ("GET", "/about"): 0,
+    ("GET", "/shop"): 0,
+    ("GET", "/guide"): 0,
+    ("GET", "/profil"): 0,
+    ("POST", "/api/logout"): 1,
+}
+
+EMAIL = "pytest-budget@example.com"
+ROUTE_EMAIL = "pytest-budget-route@example.com"
+PASSWORD = "test1234"
+ITEM_SKU = "pytest-budget-item"
+
+
+def _public_methods(service):
+    return [
+        (name, method) for name, method in inspect.getmembers(service, inspect.ismethod)
+        if not name.startswith("_")
+    ]
+
+
+def _extra_worker_queries():
+    """Requêtes d'attribution des badges faites dans la requête (mode inline seulement)."""
+    worker = app.config["services"]["badge_worker"]
+    if worker.mode == "inline":
+        return get_query_budget(app.config["services"]["badge"].check_and_award_badges)
+    return 0
+
+
+@pytest.fixture
+def budget_user(client, count_queries):
+    """Compte dédié, connecté sur son propre client de test, supprimé à la fin."""
+    auth = app.config["services"]["auth"]
+    with app.app_context():
+        with count_queries() as compteur:
+            user_id = auth.register_user("pytest-budget", EMAIL, PASSWORD)["data"]["id"]
+    compteur.assert_at_most(get_query_budget(auth.register_user), "AuthService.register_user")
+
+    utilisateur = app.test_client()
+    utilisateur.post("/api/login", json={"email": EMAIL, "password": PASSWORD})
+
+    yield utilisateur, user_id
+
+    with app.app_context():
+        for user in User.query.filter(User.email.in_([EMAIL, ROUTE_EMAIL])):
+            Score.query.filter_by(user_id=user.id).delete()
+            UserBadge.query.filter_by(user_id=user.id).delete()
+            UserInventory.query.filter_by(user_id=user.id).delete()
+            UserStats.query.filter_by(user_id=user.id).delete()
+            ScoreRollup.query.filter_by(user_id=user.id).delete()
+            RevokedToken.query.filter_by(user_id=user.id).delete()
+            db.session.delete(user)
+        db.session.commit()
+
+
+@pytest.fixture
+def budget_item(client):
+    """Article actif à 1 point, pour les chemins d'achat réussi et refusé."""
+    with app.app_context():
+        item = ShopItem(sku=ITEM_SKU, name="Article budget", price=1)
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+
+    yield item_id
+
+    with app.app_context():
+        UserInventory.query.filter_by(item_id=item_id).delete()
+        db.session.delete(db.session.get(ShopItem, item_id))
+        db.session.commit()
+
+
+def test_every_service_method_declares_a_budget():
+    """Chaque méthode publique des services déclare son budget de requêtes."""
+    manquants = [
+        f"{nom}.{methode}"
+        for nom in SERVICES
+        for methode, fn in _public_methods(app.config["services"][nom])
+        if get_query_budget(fn) is None
+    ]
+    assert manquants == []
+
+
+def test_every_route_declares_a_budget():
+    """Chaque route de l'application a un budget dans ROUTE_BUDGETS."""
+    manquantes = [
+        (methode, regle.rule)
+        for regle in app.url_map.iter_rules()
+        if regle.endpoint != "static"
+        for methode in sorted(regle.methods - {"HEAD", "OPTIONS"})
+        if (methode, regle.rule) not in ROUTE_BUDGETS
+    ]
+    assert manquantes == []
+
+
+def test_service_methods_stay_within_budget(budget_user, budget_item, count_queries):
+    """Les méthodes de service n'exécutent pas plus de requêtes que déclaré."""
+    _, user_id = budget_user
+    item_id = budget_item
+    services = app.config["services"]
+    auth, score, badge, shop = (services[nom] for nom in SERVICES)
+    game = {"points": 4, "correct_items": 4, "total_items": 5, "duration_ms": 2000}
+
+    appels = [
+        (auth.login_user, (EMAIL, PASSWORD)),
+        (score.add_score, (user_id, 4, 4, 5, 2000)),
+        (score.add_scores_bulk, (user_id, [game, game, game])),
+        (score.get_user_scores, (user_id,)),
+        (score.get_user_score_history, (user_id, None, 2)),
+        (score.get_leaderboard, ()),
+        (score.get_leaderboard, (15, "week")),
+        (score.get_user_rank, (user_id,)),
+        (score.get_leaderboard_around, (user_id,)),
+        (score.get_user_stats, (user_id,)),
+        (badge.check_and_award_badges, (user_id, [GameResult(correct_items=4, total_items=5, duration_ms=2000)])),
+        (badge.get_user_badges, (user_id,)),
+        (badge.get_all_badges, ()),
+        (shop.get_active_items, ()),
+        # Achat possible puis réussi, puis refusé (article déjà possédé)
+        (shop.can_purchase, (user_id, item_id)),
+        (shop.purchase_item, (user_id, item_id)),
+        (shop.can_purchase, (user_id, item_id)),
+        (shop.purchase_item, (user_id, item_id)),
+        (score.rebuild_user_stats, ()),
+    ]
+
+    for methode, args in appels:
+        budget = get_query_budget(methode)
+        if methode in (score.add_score, score.add_scores_bulk):
+            budget += _extra_worker_queries()
+        with app.app_context():
+            with count_queries() as compteur:
+                methode(*args)
+        compteur.assert_at_most(budget, methode.__qualname__)
+
+
+def test_routes_stay_within_budget(budget_user, budget_item, count_queries):
+    """Chaque route reste dans son budget de requêtes SQL."""
+    utilisateur, _ = budget_user
+    game = {"points": 4, "correct_items": 4, "total_items": 5, "duration_ms": 2000}
+    corps = {
+        ("POST", "/api/register"): {"username": "pytest-budget-route", "email": ROUTE_EMAIL, "password": PASSWORD},
+        ("POST", "/api/login"): {"email": EMAIL, "password": PASSWORD},
+        ("POST", "/api/scores"): game,
+        ("POST", "/api/scores/batch"): {"games": [game, game]},
+        ("POST", "/api/shop/can_purchase"): {"item_id": budget_item},
+        ("POST", "/api/shop/purchase"): {"item_id": budget_item},
+    }
+
+    for (methode, route), budget in ROUTE_BUDGETS.items():
+        if route.startswith("/api/scores") and methode == "POST":
+            budget += _extra_worker_queries()
+        # L'achat est appelé deux fois : réussi, puis refusé (article déjà possédé)
+        for _ in range(2 if route == "/api/shop/purchase" else 1):
+            with count_queries() as compteur:
+                res = utilisateur.open(route, method=methode, json=corps.get((methode, route)))
+            assert res.status_code < 500, route
+            compteur.assert_at_most(budget, f"{methode} {route}")
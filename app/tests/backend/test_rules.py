@@ -0,0 +1,17 @@
+def test_get_rules(client):
+    """Les consignes sont servies avec un ETag, puis en 304 si le client les a déjà."""
+    res = client.get("/api/rules")
+    assert res.status_code == 200
+    assert isinstance(res.get_json(), dict)
+    etag = res.headers["ETag"]
+
+    res = client.get("/api/rules", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.data == b""
+
+def test_get_rules_gzip(client):
+    """Le client qui accepte gzip reçoit la variante compressée."""
+    res = client.get("/api/rules", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["Vary"]
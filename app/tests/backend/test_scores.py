@@ -1,3 +1,5 @@
+import pytest
+
 def test_add_score(client):
     """Ajout d'un score après une partie."""
     login = client.post("/api/login", json={
@@ -32,3 +34,180 @@ def test_get_scores(client):
 
     res = client.get("/api/scores/me", headers=headers)
     assert res.status_code == 200
+
+def test_leaderboard_around_me(client):
+    """Vérifie que le rang de l'utilisateur et ses voisins sont renvoyés."""
+    client.post("/api/login", json={
+        "email": "pytest@example.com",
+        "password": "test1234"
+    })
+
+    res = client.get("/api/leaderboard/around/me?radius=2")
+    assert res.status_code == 200
+    data = res.get_json()["data"]
+    assert data["rank"] >= 1
+    assert any(entry["is_me"] for entry in data["entries"])
+    assert len(data["entries"]) <= 5
+
+    res = client.get("/api/leaderboard/around/me?radius=-1")
+    assert res.status_code == 400
+
+def test_add_scores_batch(client):
+    """Vérifie l'envoi groupé de parties avec un résultat par partie."""
+    client.post("/api/login", json={
+        "email": "pytest@example.com",
+        "password": "test1234"
+    })
+
+    res = client.post("/api/scores/batch", json={"games": [
+        {"points": 5, "correct_items": 5, "total_items": 10, "duration_ms": 4000},
+        {"points": -3}
+    ]})
+    assert res.status_code == 200
+    data = res.get_json()["data"]
+    assert data["accepted"] == 1
+    assert data["rejected"] == 1
+    assert [r["success"] for r in data["results"]] == [True, False]
+
+def test_score_history_pages(client):
+    """Parcourt l'historique page par page : chaque partie une seule fois, de la plus récente à la plus ancienne."""
+    client.post("/api/login", json={
+        "email": "pytest@example.com",
+        "password": "test1234"
+    })
+    client.post("/api/scores/batch", json={"games": [
+        {"points": p, "correct_items": p, "total_items": 10, "duration_ms": 3000} for p in range(1, 6)
+    ]})
+
+    vus = []
+    cursor = ""
+    for _ in range(100):  # garde-fou : un curseur qui n'avance pas ne doit pas bloquer la suite
+        res = client.get(f"/api/scores/me/history?limit=2&cursor={cursor}")
+        assert res.status_code == 200
+        data = res.get_json()["data"]
+        assert len(data["scores"]) <= 2
+        vus += [score["id"] for score in data["scores"]]
+        if data["next_cursor"] is None:
+            break
+        cursor = data["next_cursor"]
+    else:
+        pytest.fail("la pagination ne se termine pas")
+
+    assert len(vus) >= 5
+    assert len(vus) == len(set(vus))
+
+    assert client.get("/api/scores/me/history?cursor=pas-un-curseur").status_code == 400
+    assert client.get("/api/scores/me/history?limit=0").status_code == 400
+
+def test_deleted_user_leaves_leaderboard(client):
+    """Un compte supprimé sort du classement en mémoire dès le commit."""
+    from run import app, db, score_service
+    from db.models import User
+
+    with app.app_context():
+        user = User(username="pytest-supprime", email="pytest-supprime@example.com", password_hash="x", total_score=3)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        score_service.get_user_rank(user_id)
+        assert user_id in score_service.leaderboard
+
+        db.session.delete(user)
+        db.session.commit()
+    assert user_id not in score_service.leaderboard
+
+def test_user_stats_match_scores_after_several_games():
+    """total_score et user_stats restent égaux aux agrégats de scores, première partie comprise."""
+    from sqlalchemy import func
+    from run import app, db, score_service, badge_worker
+    from db.models import Score, ScoreRollup, User, UserBadge, UserStats
+
+    parties = [(12, 9, 10, 4000), (3, 1, 10, 9000), (20, 10, 10, 2500), (0, 0, 5, 1000)]
+    with app.app_context():
+        user = User(username="pytest-stats", email="pytest-stats@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        try:
+            for points, correctes, total, duree in parties:
+                assert score_service.add_score(user_id, points, correctes, total, duree)["success"]
+            badge_worker.flush()
+            db.session.expire_all()
+
+            games, total_points, best_points, total_correct, total_items, total_duration = db.session.query(
+                func.count(Score.id), func.sum(Score.points), func.max(Score.points),
+                func.sum(Score.correct_items), func.sum(Score.total_items), func.sum(Score.duration_ms)
+            ).filter(Score.user_id == user_id).one()
+            stats = db.session.get(UserStats, user_id)
+
+            assert games == len(parties)
+            assert db.session.get(User, user_id).total_score == total_points
+            assert (stats.games_played, stats.total_points, stats.best_points) == (games, total_points, best_points)
+            assert (stats.total_correct_items, stats.total_items, stats.total_duration_ms) == \
+                (total_correct, total_items, total_duration)
+            assert stats.best_efficiency == pytest.approx(max(c / t for _, c, t, _ in parties))
+            assert stats.last_played_at is not None
+        finally:
+            db.session.query(Score).filter_by(user_id=user_id).delete()
+            db.session.query(UserBadge).filter_by(user_id=user_id).delete()
+            db.session.query(UserStats).filter_by(user_id=user_id).delete()
+            db.session.query(ScoreRollup).filter_by(user_id=user_id).delete()
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+def test_played_at_uses_the_database_clock(client):
+    """Parties datées par l'application ou par la base : même horloge (UTC), mêmes périodes."""
+    import pytest
+    from sqlalchemy import func, select
+
+    from run import app, db
+    from services.score_service import _now
+
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            pytest.skip("CURRENT_TIMESTAMP MySQL : fuseau de la session")
+        base = db.session.execute(select(func.now())).scalar()
+        db.session.remove()
+    assert abs((_now() - base).total_seconds()) < 5
+
+
+def test_window_leaderboard_from_rollups(client):
+    """Les points de la semaine viennent de score_rollups, identiques après reconstruction."""
+    from run import app, db, score_service
+    from db.models import Score, ScoreRollup, User, UserBadge, UserStats
+
+    def agregats(user_id):
+        return sorted(
+            (ligne.period, ligne.bucket, ligne.points, ligne.games_played)
+            for ligne in ScoreRollup.query.filter_by(user_id=user_id)
+        )
+
+    with app.app_context():
+        user = User(username="pytest-semaine", email="pytest-semaine@example.com", password_hash="x", total_score=0)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        try:
+            assert score_service.add_score(user_id, 500, 10, 10, 1000)["success"]
+            game = {"points": 250, "correct_items": 5, "total_items": 5, "duration_ms": 1000}
+            assert score_service.add_scores_bulk(user_id, [game, game])["success"]
+
+            incremental = agregats(user_id)
+            assert {periode for periode, _, _, _ in incremental} == {"day", "week", "month"}
+            assert all((points, parties) == (1000, 3) for _, _, points, parties in incremental)
+
+            score_service.rebuild_score_rollups()
+            db.session.expire_all()
+            assert agregats(user_id) == incremental
+
+            # Client sans contexte conservé : la requête est faite dans le contexte du test
+            visiteur = app.test_client()
+            res = visiteur.get("/api/leaderboard?window=week&limit=100")
+            assert res.status_code == 200
+            assert {"username": "pytest-semaine", "points": 1000, "games_played": 3} in res.get_json()["data"]
+            assert visiteur.get("/api/leaderboard?window=year").status_code == 400
+        finally:
+            for modele in (Score, UserBadge, UserStats, ScoreRollup):
+                db.session.query(modele).filter_by(user_id=user_id).delete()
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
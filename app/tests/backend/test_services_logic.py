@@ -19,8 +19,14 @@ from app.backend.services.auth_service import AuthService
 from app.backend.services.score_service import ScoreService
 from app.backend.services.badge_service import BadgeService
 from app.backend.services.shop_service import ShopService
+from app.backend.services.badge_worker import BadgeWorker
 
 from app.backend.utils import security, validators
+from app.backend.utils.leaderboard_index import LeaderboardIndex
+from app.backend.utils.password_executor import PasswordExecutor, PasswordExecutorBusy
+from app.backend.utils.token_cache import TokenCache
+from app.backend.utils.revocation import BloomFilter
+from app.backend.utils.badge_rules import BadgeRuleEngine, GameResult
 from app.backend.db.models import User, Score, Badge, ShopItem
 
 # ============================================================
@@ -144,6 +150,116 @@ def test_refresh_access_token(monkeypatch, auth_service):
     result = auth_service.refresh_access_token("old.jwt.token")
     assert "new" in result
 
+def test_password_executor_rejects_when_queue_full():
+    """Au-delà des places du pool, la demande est refusée au lieu d'attendre"""
+    import threading
+    executor = PasswordExecutor(mode="thread", max_workers=1, max_pending=0, queue_timeout=0.05)
+    debut, fin = threading.Event(), threading.Event()
+
+    def calcul_long():
+        debut.set()
+        fin.wait(5)
+        return "ok"
+
+    occupant = threading.Thread(target=executor.run, args=(calcul_long,))
+    occupant.start()
+    try:
+        assert debut.wait(5)
+        with pytest.raises(PasswordExecutorBusy):
+            executor.run(calcul_long)
+    finally:
+        fin.set()
+        occupant.join()
+        executor.shutdown()
+
+    assert executor.verify_password("recy1234", security.hash_password("recy1234"))
+
+def test_password_executor_process_pool_survives_broken_pool():
+    """Pool créé sans fork au démarrage ; un pool cassé ne fait pas échouer la requête"""
+    import os
+    from concurrent.futures.process import BrokenProcessPool
+    executor = PasswordExecutor(mode="process", max_workers=1, max_pending=1, queue_timeout=0.5)
+    executor.start()
+    try:
+        pool = executor._pool
+        assert pool is not None
+        assert pool._mp_context.get_start_method() != "fork"
+        empreinte = security.hash_password("recy1234")
+        assert executor.verify_password("recy1234", empreinte)
+
+        # Processus du pool tué (OOM...) : l'opération est refaite dans la requête
+        for processus in list(pool._processes.values()):
+            os.kill(processus.pid, 9)
+        try:
+            pool.submit(os.getpid).result(timeout=5)
+        except BrokenProcessPool:
+            pass
+        assert executor.verify_password("recy1234", empreinte)
+        assert executor._pool is not pool
+    finally:
+        executor.shutdown()
+
+def test_token_cache_hits_expiry_and_eviction(monkeypatch):
+    """Le payload vérifié est réutilisé jusqu'à son exp, dans la limite de max_size"""
+    import app.backend.utils.token_cache as token_cache
+
+    maintenant = [1000.0]
+    monkeypatch.setattr(token_cache.time, "time", lambda: maintenant[0])
+    verifies = []
+
+    def verify(token):
+        verifies.append(token)
+        return None if token == "invalide" else {"id": 1, "exp": 1060}
+
+    cache = TokenCache(max_size=2)
+    assert cache.get_or_verify("a", verify) == {"id": 1, "exp": 1060}
+    assert cache.get_or_verify("a", verify)["id"] == 1
+    assert verifies == ["a"]
+
+    # Un token invalide n'est jamais mis en cache
+    assert cache.get_or_verify("invalide", verify) is None
+    assert cache.get_or_verify("invalide", verify) is None
+    assert verifies.count("invalide") == 2
+
+    # LRU : "a" (utilisé récemment) reste, "b" sort à l'arrivée de "c"
+    cache.get_or_verify("b", verify)
+    cache.get_or_verify("a", verify)
+    cache.get_or_verify("c", verify)
+    cache.get_or_verify("b", verify)
+    assert verifies.count("b") == 2 and verifies.count("a") == 1
+
+    # Au-delà de exp, le token est revérifié
+    maintenant[0] = 1060
+    cache.get_or_verify("a", verify)
+    assert verifies.count("a") == 2
+    assert cache.stats() == {"hits": 2, "misses": 7, "size": 2}
+
+def test_auth_service_reuses_verified_tokens(auth_service, monkeypatch):
+    """verify_access_token ne revérifie pas la signature d'un token déjà vu"""
+    import time
+
+    appels = []
+
+    def decode(token, secret):
+        appels.append(token)
+        return {"id": 1, "exp": time.time() + 60}
+
+    monkeypatch.setattr(auth_service.security, "decode_token", decode)
+    monkeypatch.setattr(auth_service, "_user_exists", lambda user_id: True)
+    for _ in range(3):
+        assert auth_service.verify_access_token("token-1") == (1, None)
+    assert appels == ["token-1"]
+    assert auth_service.token_cache.stats()["hits"] == 2
+
+def test_bloom_filter_has_no_false_negatives():
+    """Toute clé ajoutée est trouvée ; peu de faux positifs à la capacité prévue"""
+    filtre = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        filtre.add(f"jti-{i}")
+    assert all(f"jti-{i}" in filtre for i in range(1000))
+    faux_positifs = sum(f"autre-{i}" in filtre for i in range(10000))
+    assert faux_positifs < 300
+
 # ============================================================
 # 🧮 SCORE SERVICE TESTS
 # ============================================================
@@ -179,6 +295,106 @@ def test_check_and_award_badges(monkeypatch, badge_service):
     res = badge_service.check_and_award_badges(1, 10)
     assert res[0]["code"] == "FIRST_GAME"
 
+def test_leaderboard_index_order_and_rank():
+    """Le classement en mémoire reste trié après les mises à jour"""
+    index = LeaderboardIndex()
+    index.load([(1, "sam", 30), (2, "recy", 50), (3, "zoe", 30)])
+    assert [u for u, _, _ in index.top(3)] == [2, 1, 3]
+    assert index.rank_of(3) == 2  # ex-aequo avec sam
+
+    index.upsert(3, 60)
+    assert index.top(1) == [(3, "zoe", 60)]
+    assert index.rank_of(1) == 3
+
+    index.remove(2)
+    assert len(index) == 2
+    assert index.rank_of(2) is None
+
+def test_leaderboard_index_ignores_updates_before_load():
+    """Un index jamais chargé ne doit pas devenir un classement partiel"""
+    index = LeaderboardIndex()
+    index.upsert(1, 10, "sam")
+    assert index.is_stale()
+    assert len(index) == 0
+
+def test_leaderboard_index_around_is_consistent():
+    """Position, rang et fenêtre sont lus ensemble ; un joueur retiré n'a plus de voisinage"""
+    index = LeaderboardIndex()
+    index.load([(1, "sam", 30), (2, "recy", 50), (3, "zoe", 30), (4, "max", 10)])
+
+    voisinage = index.around(3, 1)
+    assert voisinage.position == 2
+    assert voisinage.rank == 2  # ex-aequo avec sam
+    assert voisinage.start == 1
+    assert voisinage.first_rank == 2
+    assert [u for u, _, _ in voisinage.entries] == [1, 3, 4]
+    assert voisinage.total_players == 4
+
+    index.remove(3)
+    assert index.around(3, 1) is None
+
+def test_badge_rule_engine_thresholds():
+    """Les seuils franchis, les règles de partie et les méta-badges sont détectés"""
+    catalogue = [
+        Badge(id=1, code="AMI_DE_RECY", label="", description=""),
+        Badge(id=2, code="TRIEUR_APPLIQUE", label="", description=""),
+        Badge(id=3, code="CUSTOM_50", label="", description="", rule="total_score_at_least", threshold=50),
+        Badge(id=4, code="TRIEUR_RAPIDE", label="", description=""),
+        Badge(id=5, code="COLLECTION_2", label="", description="", rule="badge_count_at_least", threshold=2),
+        Badge(id=6, code="SANS_REGLE", label="", description=""),
+    ]
+    engine = BadgeRuleEngine(catalogue)
+    assert engine.ignored == ["SANS_REGLE"]
+
+    # 20 -> 60 points : seuils 25 et 50 franchis, partie rapide, puis méta-badge
+    gagnes = engine.evaluate(set(), 60, [GameResult(5, 10, 1500)], previous_total=20)
+    assert sorted(gagnes) == [1, 3, 4, 5]
+
+    # Seuils déjà possédés : rien de nouveau
+    assert engine.evaluate({1, 3, 4, 5}, 70, [GameResult(5, 10, 9000)], previous_total=60) == []
+
+    # Badge manquant sous l'ancien total : rattrapage
+    assert engine.evaluate({3}, 70, [], previous_total=60) == [1, 5]
+
+def test_badge_worker_merges_events_per_user():
+    """Les événements d'un même utilisateur sont évalués ensemble, depuis le plus petit total"""
+    class FakeBadgeService:
+        def __init__(self):
+            self.calls = []
+        def check_and_award_badges(self, user_id, games, previous_total=None):
+            self.calls.append((user_id, list(games), previous_total))
+
+    fake = FakeBadgeService()
+    worker = BadgeWorker(None, FakeDB(), fake, mode="inline")
+    worker.process([
+        (1, [GameResult(5, 10, 3000)], 20),
+        (2, [GameResult(1, 1, 500)], None),
+        (1, [GameResult(8, 10, 2500)], 10),
+    ])
+
+    assert fake.calls == [
+        (1, [GameResult(5, 10, 3000), GameResult(8, 10, 2500)], 10),
+        (2, [GameResult(1, 1, 500)], None),
+    ]
+
+def test_badge_worker_full_queue_evaluates_in_request():
+    """File pleine : l'événement est évalué tout de suite au lieu d'être perdu ou de bloquer"""
+    class FakeBadgeService:
+        def __init__(self):
+            self.calls = []
+        def check_and_award_badges(self, user_id, games, previous_total=None):
+            self.calls.append(user_id)
+
+    fake = FakeBadgeService()
+    worker = BadgeWorker(None, FakeDB(), fake, mode="thread", max_queue=1)
+    worker.start = lambda: None  # pas de thread : la file ne se vide pas
+
+    worker.submit(1, [GameResult(5, 10, 3000)], 0)
+    worker.submit(2, [GameResult(5, 10, 3000)], 0)
+
+    assert fake.calls == [2]
+    assert worker._queue.qsize() == 1
+
 # ============================================================
 # 🛍️ SHOP SERVICE TESTS
 # ============================================================
@@ -16,3 +16,56 @@ def test_purchase_item(client):
 
     res = client.post("/api/shop/purchase", json={"item_id": 1}, headers=headers)
     assert res.status_code in [200, 400, 404]
+
+def test_shop_items_cache_follows_catalog_changes(client):
+    """Le catalogue en cache est rechargé dès qu'un article change (nouvel ETag)."""
+    from run import app, db
+    from db.models import ShopItem
+
+    avant = client.get("/api/shop/items")
+    assert client.get("/api/shop/items", headers={"If-None-Match": avant.headers["ETag"]}).status_code == 304
+
+    with app.app_context():
+        item = ShopItem(sku="pytest-cache", name="Article de test", price=1)
+        db.session.add(item)
+        db.session.commit()
+        item_id = item.id
+
+    try:
+        apres = client.get("/api/shop/items", headers={"If-None-Match": avant.headers["ETag"]})
+        assert apres.status_code == 200
+        assert item_id in [article["id"] for article in apres.get_json()["data"]]
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(ShopItem, item_id))
+            db.session.commit()
+
+def test_purchase_item_debits_once(client):
+    """Un achat débite une seule fois ; le deuxième est refusé sans débit."""
+    from run import app, db, shop_service
+    from db.models import ShopItem, User, UserInventory
+
+    with app.app_context():
+        user = User(username="pytest-achat", email="pytest-achat@example.com", password_hash="x", total_score=15)
+        item = ShopItem(sku="pytest-achat", name="Article achat", price=10)
+        cher = ShopItem(sku="pytest-achat-cher", name="Article cher", price=100)
+        db.session.add_all([user, item, cher])
+        db.session.commit()
+        user_id, item_id, cher_id = user.id, item.id, cher.id
+
+    try:
+        with app.app_context():
+            premier = shop_service.purchase_item(user_id, item_id)
+            assert premier["status_code"] == 200
+            assert premier["data"]["new_total_score"] == 5
+
+            assert shop_service.purchase_item(user_id, item_id)["status_code"] == 409
+            assert shop_service.purchase_item(user_id, cher_id)["status_code"] == 403
+            assert shop_service.purchase_item(user_id, 999999)["status_code"] == 404
+            assert db.session.get(User, user_id).total_score == 5
+    finally:
+        with app.app_context():
+            UserInventory.query.filter_by(user_id=user_id).delete()
+            db.session.delete(db.session.get(User, user_id))
+            ShopItem.query.filter(ShopItem.id.in_([item_id, cher_id])).delete()
+            db.session.commit()